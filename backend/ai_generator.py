@@ -1,6 +1,100 @@
-from typing import Any, Dict, List, Optional
-
-from llm_providers import BaseLLMProvider
+import asyncio
+import functools
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from llm_providers import (
+    BaseLLMProvider,
+    BatchRequest,
+    LLMResponse,
+    ToolCall,
+    ToolResult,
+)
+from response_cache import ExactMatchCache, SemanticCache
+
+# Query keywords that call for a larger response token budget
+OUTLINE_KEYWORDS = frozenset(
+    {
+        "outline",
+        "structure",
+        "topics covered",
+        "lesson list",
+        "what topics",
+        "course structure",
+        "what is covered",
+    }
+)
+COMPARISON_KEYWORDS = frozenset(
+    {
+        "compare",
+        "comparison",
+        "difference",
+        "versus",
+        "vs",
+        "vs.",
+        "both",
+        "similarities",
+    }
+)
+
+
+def _keyword_pattern(keywords: frozenset) -> re.Pattern:
+    """
+    Compile keywords into a single case-insensitive alternation.
+
+    Only the start of each keyword is anchored to a word boundary, so
+    inflections like "differences" or "compared" still match while short
+    keywords such as "vs" no longer fire inside words like "canvas".
+    """
+    alternation = "|".join(
+        re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)
+    )
+    return re.compile(rf"\b(?:{alternation})", re.IGNORECASE)
+
+
+_OUTLINE_RE = _keyword_pattern(OUTLINE_KEYWORDS)
+_COMPARISON_RE = _keyword_pattern(COMPARISON_KEYWORDS)
+
+# Instruction RAGSystem puts in front of every user question. It is the same
+# for all queries, so it is stripped before a query is embedded for the
+# semantic cache; otherwise it pulls unrelated short questions together
+QUESTION_PREFIX = "Answer this question about course materials: "
+
+
+# Questions that never need course search. Both patterns must match the whole
+# question, optionally after an instruction prefix ending in a colon (as added
+# by RAGSystem.query), so anything else keeps tools enabled
+_NUMBER = r"\(?\s*-?\d+(?:\.\d+)?\s*\)?"
+_ARITHMETIC_RE = re.compile(
+    rf"(?:^|:)\s*(?:(?:what\s+is|what's|calculate|compute)\s+)?"
+    rf"{_NUMBER}(?:\s*(?:[-+*/x×÷^%]|plus|minus|times|divided\s+by)\s*{_NUMBER})+"
+    r"\s*[?=.!]*\s*$",
+    re.IGNORECASE,
+)
+_SMALL_TALK_RE = re.compile(
+    r"(?:^|:)\s*(?:hi|hello|hey|thanks|thank\s+you|good\s+(?:morning|afternoon|evening))"
+    r"(?:\s+there)?\s*[!.?]*\s*$",
+    re.IGNORECASE,
+)
+
+
+def _classify_intent(query: str) -> str:
+    """
+    Classify a query as "general" or "course".
+
+    Only questions that certainly need no course material (plain arithmetic,
+    greetings) are "general"; everything else is "course" so the model keeps
+    its tools whenever there is doubt.
+    """
+    if _ARITHMETIC_RE.search(query) or _SMALL_TALK_RE.search(query):
+        return "general"
+    return "course"
+
+
+def _question_text(query: str) -> str:
+    """The user's question within a query, without the RAG instruction prefix"""
+    return query.removeprefix(QUESTION_PREFIX)
 
 
 class AIGenerator:
@@ -53,14 +147,23 @@ Response Guidelines:
 - For general queries: Provide comprehensive answers without unnecessary verbosity
 """
 
-    def __init__(self, provider: BaseLLMProvider):
+    def __init__(
+        self,
+        provider: BaseLLMProvider,
+        response_cache: Optional[SemanticCache] = None,
+        exact_cache: Optional[ExactMatchCache] = None,
+    ):
         """
         Initialize AIGenerator with a provider.
 
         Args:
             provider: Implementation of BaseLLMProvider (AnthropicProvider or GroqProvider)
+            response_cache: Optional semantic cache for direct answers
+            exact_cache: Optional cache for byte-identical repeat requests
         """
         self.provider = provider
+        self.response_cache = response_cache
+        self.exact_cache = exact_cache
 
     def generate_response(
         self,
@@ -82,16 +185,34 @@ Response Guidelines:
             Generated response as string
         """
 
+        # Skip tool schemas for questions that cannot need a course search
+        if tools and _classify_intent(query) == "general":
+            tools = None
+
         # Store tools and query for sequential calling in _handle_tool_execution
         self.available_tools = tools
         self.current_query = query  # Store for adaptive token determination
 
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history
-            else self.SYSTEM_PROMPT
-        )
+        # Conversation history travels separately from the static system prompt
+        # so providers can cache the prompt prefix across requests
+        system_context = self._build_system_context(conversation_history)
+
+        # Identical repeats (client retries, re-requests) are answered before
+        # any embedding or provider work; history is part of the key
+        exact_key = (query, conversation_history, self._tool_tag(tools))
+        if self.exact_cache is not None:
+            cached = self.exact_cache.get(exact_key)
+            if cached is not None:
+                return cached
+
+        # Serve paraphrases of earlier standalone questions from the cache.
+        # Queries with history are skipped since their answer depends on it
+        cache_vector = None
+        if self.response_cache is not None and not conversation_history:
+            cache_vector = self.response_cache.embed(_question_text(query))
+            cached = self.response_cache.get(cache_vector, self._tool_tag(tools))
+            if cached is not None:
+                return cached
 
         # Build initial messages
         messages = [{"role": "user", "content": query}]
@@ -104,7 +225,8 @@ Response Guidelines:
         # Get response from provider with adaptive token limit
         response = self.provider.generate_response(
             messages=messages,
-            system_prompt=system_content,
+            system_prompt=self.SYSTEM_PROMPT,
+            system_context=system_context,
             tools=tools,
             temperature=0,
             max_tokens=adaptive_max_tokens,
@@ -113,17 +235,18 @@ Response Guidelines:
         # Handle tool execution if needed
         if response.requires_tool_execution and tool_manager:
             return self._handle_tool_execution(
-                response, messages, system_content, tool_manager
+                response, messages, system_context, tool_manager
             )
 
         # Return direct response
+        self._cache_response(exact_key, cache_vector, tools, response)
         return response.content
 
     def _handle_tool_execution(
         self,
         initial_response,
         base_messages: List[Dict[str, Any]],
-        system_prompt: str,
+        system_context: Optional[str],
         tool_manager,
     ):
         """
@@ -138,16 +261,16 @@ Response Guidelines:
         Args:
             initial_response: The LLMResponse containing tool use requests
             base_messages: Base messages list
-            system_prompt: System prompt for the conversation
+            system_context: Per-request system context (conversation history)
             tool_manager: Manager to execute tools
 
         Returns:
             Final response text after tool execution
         """
-        from config import Config
-
         MAX_ROUNDS = 2  # Support up to 2 sequential tool calling rounds
-        messages = base_messages.copy()
+        # Copy-on-write: each round builds a new list from the previous one,
+        # so a list already handed to the provider is never mutated
+        messages = base_messages
         current_response = initial_response
 
         # Loop through rounds, executing tools and getting responses
@@ -155,62 +278,43 @@ Response Guidelines:
             if Config.DEBUG:
                 print(f"[DEBUG] Tool calling round {round_num}/{MAX_ROUNDS}")
 
-            # STEP 1: Add assistant's response with tool calls to message history
-            # Provider-specific format handling
-            if hasattr(current_response.raw_response, "content"):
-                # Anthropic format
-                messages.append(
-                    {
-                        "role": "assistant",
-                        "content": current_response.raw_response.content,
-                    }
-                )
-            elif hasattr(current_response.raw_response, "choices"):
-                # Groq format
-                messages.append(
-                    {
-                        "role": "assistant",
-                        "content": current_response.raw_response.choices[
-                            0
-                        ].message.content
-                        or "",
-                        "tool_calls": current_response.raw_response.choices[
-                            0
-                        ].message.tool_calls,
-                    }
-                )
-
-            # STEP 2: Execute all tool calls from current response
-            tool_results = []
-            for tool_call in current_response.tool_calls:
-                try:
-                    if Config.DEBUG:
-                        print(
-                            f"[DEBUG] Executing tool: {tool_call['name']} with params: {tool_call['input']}"
-                        )
-
-                    tool_result = tool_manager.execute_tool(
-                        tool_call["name"], **tool_call["input"]
-                    )
+            # STEP 1: Start this round's turn with the assistant's tool calls
+            turn = [
+                self.provider.build_assistant_message(current_response.raw_response)
+            ]
 
-                    tool_results.append(
-                        {"tool_call_id": tool_call["id"], "content": tool_result}
+            # STEP 2: Execute all tool calls from current response as one batch,
+            # so calls to the same tool can share embedding and search work
+            tool_calls = current_response.tool_calls
+            if Config.DEBUG:
+                for tool_call in tool_calls:
+                    print(
+                        f"[DEBUG] Executing tool: {tool_call.name} with params: {tool_call.input}"
                     )
+            try:
+                outputs = tool_manager.execute_tools_batch(
+                    [(tool_call.name, tool_call.input) for tool_call in tool_calls]
+                )
+            except Exception as e:
+                # Terminate on tool execution error
+                names = ", ".join(dict.fromkeys(tc.name for tc in tool_calls))
+                error_msg = f"Error executing tool '{names}': {str(e)}"
+                if Config.DEBUG:
+                    print(f"[DEBUG] {error_msg}")
+                return error_msg
 
-                    if Config.DEBUG:
-                        print(f"[DEBUG] Tool result preview: {tool_result[:100]}...")
-
-                except Exception as e:
-                    # Terminate on tool execution error
-                    error_msg = f"Error executing tool '{tool_call['name']}': {str(e)}"
-                    if Config.DEBUG:
-                        print(f"[DEBUG] {error_msg}")
-                    return error_msg
+            tool_results = [
+                ToolResult(tool_call.id, tool_result)
+                for tool_call, tool_result in zip(tool_calls, outputs)
+            ]
+            if Config.DEBUG:
+                for tool_result in outputs:
+                    print(f"[DEBUG] Tool result preview: {tool_result[:100]}...")
 
-            # STEP 3: Add tool results to message history
+            # STEP 3: Add tool results and append the turn to message history
             if tool_results:
-                result_messages = self.provider.build_tool_result_messages(tool_results)
-                messages.extend(result_messages)
+                turn.extend(self.provider.build_tool_result_messages(tool_results))
+            messages = [*messages, *turn]
 
             # STEP 4: Determine if tools should be available for next API call
             is_final_round = round_num == MAX_ROUNDS
@@ -221,7 +325,7 @@ Response Guidelines:
                 print(f"[DEBUG] Tools for next call: {tools_status}")
 
             # STEP 5: Determine adaptive token limit based on tools used
-            tool_names = [tc["name"] for tc in current_response.tool_calls]
+            tool_names = [tc.name for tc in current_response.tool_calls]
             adaptive_max_tokens = self._determine_max_tokens(
                 query=self.current_query if hasattr(self, "current_query") else "",
                 used_tools=True,
@@ -235,7 +339,8 @@ Response Guidelines:
             try:
                 next_response = self.provider.generate_response(
                     messages=messages,
-                    system_prompt=system_prompt,
+                    system_prompt=self.SYSTEM_PROMPT,
+                    system_context=system_context,
                     tools=tools_for_next_call,
                     temperature=0,
                     max_tokens=adaptive_max_tokens,
@@ -275,6 +380,505 @@ Response Guidelines:
         # Safety fallback (should never reach here due to loop range)
         return "Unable to complete request."
 
+    async def agenerate_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Async variant of generate_response.
+
+        Provider responses are streamed and each tool call starts executing
+        as soon as the model has finished emitting it, overlapping tool I/O
+        with decoding of the rest of the response. Query and tools are passed
+        down explicitly instead of being stored on the instance, so one
+        AIGenerator can serve concurrent requests.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            on_text: Optional callback receiving text deltas as the provider
+                decodes them, in every round
+
+        Returns:
+            Generated response as string
+        """
+        if tools and _classify_intent(query) == "general":
+            tools = None
+
+        system_context = self._build_system_context(conversation_history)
+
+        exact_key = (query, conversation_history, self._tool_tag(tools))
+        if self.exact_cache is not None:
+            cached = self.exact_cache.get(exact_key)
+            if cached is not None:
+                return cached
+
+        cache_vector = None
+        if self.response_cache is not None and not conversation_history:
+            # Embedding is CPU-bound; keep it off the event loop
+            cache_vector = await asyncio.to_thread(
+                self.response_cache.embed, _question_text(query)
+            )
+            cached = self.response_cache.get(cache_vector, self._tool_tag(tools))
+            if cached is not None:
+                return cached
+
+        messages = [{"role": "user", "content": query}]
+
+        adaptive_max_tokens = self._determine_max_tokens(
+            query=query, used_tools=False, tool_names=None
+        )
+
+        response, pending = await self._astream_round(
+            tool_manager,
+            on_text,
+            messages=messages,
+            system_prompt=self.SYSTEM_PROMPT,
+            system_context=system_context,
+            tools=tools,
+            temperature=0,
+            max_tokens=adaptive_max_tokens,
+        )
+
+        if response.requires_tool_execution and tool_manager:
+            return await self._ahandle_tool_execution(
+                response,
+                pending,
+                messages,
+                system_context,
+                tool_manager,
+                query,
+                tools,
+                on_text,
+            )
+
+        self._cancel_pending(pending)
+        self._cache_response(exact_key, cache_vector, tools, response)
+        return response.content
+
+    async def astream_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the response text as it is generated.
+
+        Runs agenerate_response and yields text deltas as the provider decodes
+        them, so the first tokens reach the caller long before the answer is
+        complete. Text the model writes before calling tools is streamed as
+        well. Answers that are not decoded by the provider (cache hits, tool
+        errors, the round-limit fallback) are yielded as a single chunk.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+
+        Yields:
+            Chunks of response text
+        """
+        chunks: asyncio.Queue = asyncio.Queue()
+        generation = asyncio.create_task(
+            self.agenerate_response(
+                query,
+                conversation_history,
+                tools,
+                tool_manager,
+                on_text=chunks.put_nowait,
+            )
+        )
+        # Runs after the last text delta was queued, ending the loop below
+        generation.add_done_callback(lambda _: chunks.put_nowait(None))
+
+        streamed = []
+        try:
+            while (chunk := await chunks.get()) is not None:
+                streamed.append(chunk)
+                yield chunk
+            result = await generation
+        finally:
+            generation.cancel()
+
+        if result and not "".join(streamed).endswith(result):
+            yield result
+
+    async def agenerate_responses(
+        self,
+        queries: List[str],
+        conversation_histories: Optional[List[Optional[str]]] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        concurrency: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Generate responses for many queries concurrently.
+
+        At most `concurrency` queries are in flight at once, and a query
+        rejected with HTTP 429 is retried with exponential backoff.
+
+        Args:
+            queries: The user questions to answer
+            conversation_histories: Optional history per query, aligned with
+                queries
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            concurrency: Maximum in-flight queries (default
+                Config.BATCH_CONCURRENCY)
+
+        Returns:
+            Generated responses in the same order as queries
+        """
+        if conversation_histories is None:
+            conversation_histories = [None] * len(queries)
+        elif len(conversation_histories) != len(queries):
+            raise ValueError("conversation_histories must align with queries")
+
+        semaphore = asyncio.Semaphore(concurrency or Config.BATCH_CONCURRENCY)
+
+        async def generate(query: str, history: Optional[str]) -> str:
+            async with semaphore:
+                return await self._with_rate_limit_retry(
+                    self.agenerate_response, query, history, tools, tool_manager
+                )
+
+        return await asyncio.gather(
+            *[
+                generate(query, history)
+                for query, history in zip(queries, conversation_histories)
+            ]
+        )
+
+    async def precompute_responses(
+        self,
+        queries: List[str],
+        tools: Optional[List] = None,
+        poll_interval: Optional[float] = None,
+    ) -> int:
+        """
+        Answer standalone queries through the provider's batch API and cache them.
+
+        Meant for prewarming the response caches offline, e.g. with expected
+        questions for a course catalog. Answers that would need tool
+        execution cannot be completed in a batch and are skipped. Providers
+        without a batch API answer the same requests directly instead, at
+        most Config.BATCH_CONCURRENCY at a time.
+
+        Args:
+            queries: Standalone questions to answer (no conversation history)
+            tools: Tools later requests will offer, so cached entries match them
+            poll_interval: Seconds between batch status checks (default
+                Config.BATCH_POLL_INTERVAL)
+
+        Returns:
+            Number of answers added to the caches
+        """
+        if self.exact_cache is None and self.response_cache is None:
+            return 0
+
+        requests = {}
+        for index, query in enumerate(queries):
+            query_tools = None if _classify_intent(query) == "general" else tools
+            requests[f"query-{index}"] = (
+                query,
+                query_tools,
+                BatchRequest(
+                    custom_id=f"query-{index}",
+                    messages=[{"role": "user", "content": query}],
+                    system_prompt=self.SYSTEM_PROMPT,
+                    tools=query_tools,
+                    max_tokens=self._determine_max_tokens(query),
+                ),
+            )
+
+        batch_requests = [request for _, _, request in requests.values()]
+        if self.provider.supports_batches:
+            batch_id = await self.provider.asubmit_batch(batch_requests)
+            responses = await self.provider.await_batch_results(
+                batch_id, poll_interval or Config.BATCH_POLL_INTERVAL
+            )
+        else:
+            responses = await self._answer_requests_directly(batch_requests)
+
+        cached = 0
+        for custom_id, response in responses.items():
+            query, query_tools, _ = requests[custom_id]
+            if response.requires_tool_execution or not response.content:
+                continue
+            cache_vector = None
+            if self.response_cache is not None:
+                cache_vector = await asyncio.to_thread(
+                    self.response_cache.embed, _question_text(query)
+                )
+            exact_key = (query, None, self._tool_tag(query_tools))
+            self._cache_response(exact_key, cache_vector, query_tools, response)
+            cached += 1
+        return cached
+
+    async def _answer_requests_directly(
+        self, requests: List[BatchRequest]
+    ) -> Dict[str, LLMResponse]:
+        """
+        Answer batch requests with regular provider calls.
+
+        Like a batch job, only succeeded requests are returned, keyed by
+        custom_id; rate-limited requests are retried with backoff.
+        """
+        semaphore = asyncio.Semaphore(Config.BATCH_CONCURRENCY)
+
+        async def answer(request: BatchRequest) -> LLMResponse:
+            async with semaphore:
+                return await self._with_rate_limit_retry(
+                    self.provider.agenerate_response,
+                    request.messages,
+                    request.system_prompt,
+                    request.tools,
+                    request.temperature,
+                    request.max_tokens,
+                    request.system_context,
+                )
+
+        outcomes = await asyncio.gather(
+            *[answer(request) for request in requests], return_exceptions=True
+        )
+        return {
+            request.custom_id: outcome
+            for request, outcome in zip(requests, outcomes)
+            if not isinstance(outcome, BaseException)
+        }
+
+    @staticmethod
+    async def _with_rate_limit_retry(func, *args):
+        """Await func(*args), retrying with exponential backoff on HTTP 429"""
+        delay = Config.RATE_LIMIT_BACKOFF
+        for attempt in range(Config.RATE_LIMIT_MAX_RETRIES + 1):
+            try:
+                return await func(*args)
+            except Exception as e:
+                if (
+                    not AIGenerator._is_rate_limited(e)
+                    or attempt == Config.RATE_LIMIT_MAX_RETRIES
+                ):
+                    raise
+                if Config.DEBUG:
+                    print(f"[DEBUG] Rate limited, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    @staticmethod
+    def _is_rate_limited(error: Exception) -> bool:
+        """Whether a provider call failed with HTTP 429"""
+        # Both provider SDKs expose the HTTP status on API errors
+        return getattr(error, "status_code", None) == 429
+
+    async def _ahandle_tool_execution(
+        self,
+        initial_response,
+        pending: Dict[str, asyncio.Task],
+        base_messages: List[Dict[str, Any]],
+        system_context: Optional[str],
+        tool_manager,
+        query: str,
+        tools: Optional[List],
+        on_text: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Async counterpart of _handle_tool_execution.
+
+        Follows the same round structure, but tool calls are already running
+        by the time a round's response has finished streaming; this only
+        awaits them. Tool handlers are synchronous, so each one runs in a
+        worker thread via asyncio.to_thread.
+
+        Args:
+            initial_response: The LLMResponse containing tool use requests
+            pending: Tool tasks started while streaming, keyed by tool call id
+            base_messages: Base messages list
+            system_context: Per-request system context (conversation history)
+            tool_manager: Manager to execute tools
+            query: Original query, used for adaptive token limits
+            tools: Tool definitions offered to the model in non-final rounds
+            on_text: Optional callback receiving streamed text deltas
+
+        Returns:
+            Final response text after tool execution
+        """
+        MAX_ROUNDS = 2
+        messages = base_messages
+        current_response = initial_response
+
+        for round_num in range(1, MAX_ROUNDS + 1):
+            if Config.DEBUG:
+                print(f"[DEBUG] Async tool calling round {round_num}/{MAX_ROUNDS}")
+
+            turn = [
+                self.provider.build_assistant_message(current_response.raw_response)
+            ]
+
+            # Tools were dispatched while streaming; start any the stream
+            # did not surface and wait for the whole round
+            tool_calls = current_response.tool_calls
+            outcomes = await asyncio.gather(
+                *[
+                    pending.get(tc.id) or self._start_tool(tool_manager, tc)
+                    for tc in tool_calls
+                ],
+                return_exceptions=True,
+            )
+
+            tool_results = []
+            for tool_call, outcome in zip(tool_calls, outcomes):
+                if isinstance(outcome, Exception):
+                    # Terminate on tool execution error, same as the sync path
+                    error_msg = (
+                        f"Error executing tool '{tool_call.name}': {str(outcome)}"
+                    )
+                    if Config.DEBUG:
+                        print(f"[DEBUG] {error_msg}")
+                    return error_msg
+                tool_results.append(ToolResult(tool_call.id, outcome))
+
+            if tool_results:
+                turn.extend(self.provider.build_tool_result_messages(tool_results))
+            messages = [*messages, *turn]
+
+            is_final_round = round_num == MAX_ROUNDS
+            tools_for_next_call = None if is_final_round else tools
+
+            adaptive_max_tokens = self._determine_max_tokens(
+                query=query,
+                used_tools=True,
+                tool_names=[tc.name for tc in tool_calls],
+            )
+
+            try:
+                next_response, pending = await self._astream_round(
+                    tool_manager,
+                    on_text,
+                    messages=messages,
+                    system_prompt=self.SYSTEM_PROMPT,
+                    system_context=system_context,
+                    tools=tools_for_next_call,
+                    temperature=0,
+                    max_tokens=adaptive_max_tokens,
+                )
+            except Exception as e:
+                # Rate limits propagate so a retrying caller backs off and
+                # retries the query, whichever round hit the limit
+                if self._is_rate_limited(e):
+                    raise
+                error_msg = f"Error calling LLM: {str(e)}"
+                if Config.DEBUG:
+                    print(f"[DEBUG] {error_msg}")
+                return error_msg
+
+            if not next_response.requires_tool_execution:
+                self._cancel_pending(pending)
+                return next_response.content
+
+            if is_final_round:
+                self._cancel_pending(pending)
+                return next_response.content or "Search limit reached."
+
+            current_response = next_response
+
+        return "Unable to complete request."
+
+    async def _astream_round(
+        self,
+        tool_manager,
+        on_text: Optional[Callable[[str], None]] = None,
+        **request,
+    ) -> Tuple[LLMResponse, Dict[str, asyncio.Task]]:
+        """
+        Stream one provider call, starting each tool as soon as it is emitted.
+
+        Args:
+            tool_manager: Manager to execute tools, or None to only collect
+            on_text: Optional callback receiving text deltas
+            **request: Keyword arguments for provider.astream_response
+
+        Returns:
+            Tuple of (final LLMResponse, tool tasks keyed by tool call id)
+        """
+        pending: Dict[str, asyncio.Task] = {}
+        response = None
+        try:
+            async for event in self.provider.astream_response(**request):
+                if event.type == "text" and on_text is not None:
+                    on_text(event.text)
+                elif event.type == "tool_call" and tool_manager is not None:
+                    tool_call = event.tool_call
+                    pending[tool_call.id] = self._start_tool(tool_manager, tool_call)
+                elif event.type == "done":
+                    response = event.response
+        except BaseException:
+            self._cancel_pending(pending)
+            raise
+        return response, pending
+
+    @staticmethod
+    def _start_tool(tool_manager, tool_call: ToolCall) -> asyncio.Task:
+        """Start a tool call as a task; blocking tools run in worker threads"""
+        return asyncio.create_task(
+            tool_manager.aexecute_tool(tool_call.name, **tool_call.input)
+        )
+
+    @staticmethod
+    def _cancel_pending(pending: Dict[str, asyncio.Task]):
+        """Drop tool tasks whose results will not be used"""
+        for task in pending.values():
+            task.cancel()
+
+    def _cache_response(
+        self, exact_key: tuple, cache_vector, tools: Optional[List], response
+    ):
+        """
+        Store a direct answer in the response caches.
+
+        Answers that went through tool execution are never cached: their
+        citations are collected by the tool manager during execution and
+        would be missing on a cache hit. Answers are generated at
+        temperature 0, so a repeated request would get the same answer.
+        """
+        if response.requires_tool_execution or not response.content:
+            return
+        if self.exact_cache is not None:
+            self.exact_cache.put(exact_key, response.content)
+        if cache_vector is not None:
+            self.response_cache.put(
+                cache_vector, response.content, self._tool_tag(tools)
+            )
+
+    @staticmethod
+    def _tool_tag(tools: Optional[List]) -> Optional[tuple]:
+        """Identify the tool set offered to the model, for cache matching"""
+        if not tools:
+            return None
+        return tuple(sorted(tool["name"] for tool in tools))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _build_system_context(conversation_history: Optional[str]) -> Optional[str]:
+        """
+        Format conversation history as the dynamic part of the system prompt.
+
+        History only changes once per exchange, so follow-up calls within a
+        session (retries, tool rounds, cache checks) reuse the same string.
+        """
+        if not conversation_history:
+            return None
+        return f"Previous conversation:\n{conversation_history}"
+
     def _determine_max_tokens(
         self,
         query: str,
@@ -297,35 +901,12 @@ Response Guidelines:
         Returns:
             Appropriate max_tokens value for this query type
         """
-        from config import Config
-
-        query_lower = query.lower()
-
         # Outline queries: Need space for full lesson lists with descriptions
-        outline_keywords = [
-            "outline",
-            "structure",
-            "topics covered",
-            "lesson list",
-            "what topics",
-            "course structure",
-            "what is covered",
-        ]
-        if any(keyword in query_lower for keyword in outline_keywords):
+        if _OUTLINE_RE.search(query):
             return Config.TOKEN_BUDGET_OUTLINE
 
         # Comparison queries: Need space to synthesize multiple sources
-        comparison_keywords = [
-            "compare",
-            "comparison",
-            "difference",
-            "versus",
-            "vs",
-            "vs.",
-            "both",
-            "similarities",
-        ]
-        if any(keyword in query_lower for keyword in comparison_keywords):
+        if _COMPARISON_RE.search(query):
             return Config.TOKEN_BUDGET_COMPARISON
 
         # Tool-based queries: Moderate educational detail
@@ -2,34 +2,47 @@ import warnings
 
 warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
 from config import config
 from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
+from middleware import CachedCORSMiddleware
 from models import Source
 from pydantic import BaseModel
 from rag_system import RAGSystem
 
+# orjson serializes responses several times faster when it is installed
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
 
-def debug_print(*args, **kwargs):
-    """Print only if DEBUG mode is enabled"""
+
+def debug_print(message: str, *args):
+    """Print only if DEBUG mode is enabled, formatting args lazily"""
     if config.DEBUG:
-        print(*args, **kwargs)
+        print(message % args if args else message)
 
 
 # Initialize FastAPI app
-app = FastAPI(title="Course Materials RAG System", root_path="")
+app = FastAPI(
+    title="Course Materials RAG System",
+    root_path="",
+    default_response_class=DefaultResponse,
+)
 
 # Add trusted host middleware for proxy
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 
-# Enable CORS with proper settings for proxy
+# Enable CORS with proper settings for proxy; preflight responses are reused
 app.add_middleware(
-    CORSMiddleware,
+    CachedCORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
@@ -37,6 +50,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Returned for blank queries without calling the RAG system
+EMPTY_QUERY_ANSWER = "Please enter a question about the course materials."
+
 # Initialize RAG system as None, will be created in startup event
 rag_system = None
 
@@ -71,10 +87,9 @@ class CourseStats(BaseModel):
 async def query_documents(request: QueryRequest):
     """Process a query and return response with sources"""
     try:
-        debug_print(f"[APP] Received query: {request.query}")
-        debug_print(f"[APP] RAG system type: {type(rag_system)}")
+        debug_print("[APP] Received query: %s", request.query)
         debug_print(
-            f"[APP] Provider type: {type(rag_system.ai_generator.provider).__name__}"
+            "[APP] Provider type: %s", type(rag_system.ai_generator.provider).__name__
         )
 
         # Create session if not provided
@@ -82,14 +97,20 @@ async def query_documents(request: QueryRequest):
         if not session_id:
             session_id = rag_system.session_manager.create_session()
 
-        debug_print("[APP] Calling rag_system.query()...")
-        # Process query using RAG system
-        answer, sources = rag_system.query(request.query, session_id)
-        debug_print(f"[APP] Got answer: {answer[:50]}...")
+        # Blank queries never reach the model or the vector store
+        if not request.query.strip():
+            return QueryResponse(
+                answer=EMPTY_QUERY_ANSWER, sources=[], session_id=session_id
+            )
+
+        debug_print("[APP] Calling rag_system.aquery()...")
+        # Process query using RAG system; blocking search work runs in threads
+        answer, sources = await rag_system.aquery(request.query, session_id)
+        debug_print("[APP] Got answer: %.50s...", answer)
 
         return QueryResponse(answer=answer, sources=sources, session_id=session_id)
     except Exception as e:
-        debug_print(f"[APP] ERROR: {e}")
+        debug_print("[APP] ERROR: %s", e)
         import traceback
 
         traceback.print_exc()
@@ -114,6 +135,11 @@ async def startup_event():
     """Initialize RAG system and load initial documents on startup"""
     global rag_system
 
+    # Bounded pool for tool execution (embedding + vector search)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=config.TOOL_EXECUTOR_WORKERS)
+    )
+
     print("Initializing RAG system...")
     rag_system = RAGSystem(config)
     print(
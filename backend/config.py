@@ -42,8 +42,37 @@ class Config:
     TOKEN_BUDGET_CONTENT: int = 1200  # Standard content search queries
     TOKEN_BUDGET_GENERAL: int = 1000  # General knowledge queries
 
+    # Semantic response cache (direct answers to standalone questions)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Minimum cosine similarity for a hit
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+
+    # Exact-match response cache (identical query, history and tools)
+    EXACT_CACHE_ENABLED: bool = True
+    EXACT_CACHE_TTL: float = 300.0  # Seconds before a cached answer expires
+    EXACT_CACHE_MAX_ENTRIES: int = 10000
+
+    # Search result cache (near-duplicate course_search queries)
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_THRESHOLD: float = 0.97  # Minimum cosine similarity for a hit
+    SEARCH_CACHE_MAX_ENTRIES: int = 1000
+
+    # Batch generation (AIGenerator.agenerate_responses)
+    BATCH_CONCURRENCY: int = 32  # Maximum queries in flight at once
+    RATE_LIMIT_MAX_RETRIES: int = 3  # Retries after an HTTP 429 response
+    RATE_LIMIT_BACKOFF: float = 1.0  # First retry delay in seconds, doubled each retry
+    BATCH_POLL_INTERVAL: float = 30.0  # Seconds between offline batch status checks
+
+    # Worker threads for blocking tool execution in the API server
+    TOOL_EXECUTOR_WORKERS: int = 8
+
     # Database paths
-    CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
+    # ChromaDB storage location; empty string keeps the data in memory
+    CHROMA_PATH: str = "./chroma_db"
+    # Persistent query embedding cache (SQLite); empty string disables it
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache.db"
+    # Query embeddings kept in memory per vector store; 0 disables
+    EMBEDDING_MEMORY_CACHE_SIZE: int = 1024
 
 
 config = Config()
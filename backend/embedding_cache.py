@@ -0,0 +1,70 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """On-disk cache of text embeddings that survives process restarts"""
+
+    def __init__(self, path: str, model_name: str):
+        """
+        Args:
+            path: SQLite database file, created if missing
+            model_name: Embedding model the vectors come from; part of every key,
+                so switching models never serves vectors from the old one
+        """
+        self.model_name = model_name
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets readers proceed while another connection writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb (key BLOB PRIMARY KEY, vec BLOB)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding of text, or None on a miss"""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return the cached embedding of each text, None where missing"""
+        keys = [self._key(text) for text in texts]
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vec FROM emb WHERE key IN ({placeholders})", keys
+            ).fetchall()
+        found: Dict[bytes, np.ndarray] = {
+            key: np.frombuffer(vec, dtype=np.float32) for key, vec in rows
+        }
+        return [found.get(key) for key in keys]
+
+    def put(self, text: str, vector: Sequence[float]):
+        """Store the embedding of text"""
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: List[str], vectors: Sequence[Sequence[float]]):
+        """Store the embeddings of several texts in one transaction"""
+        rows = [
+            (self._key(text), np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO emb (key, vec) VALUES (?, ?)", rows
+            )
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _key(self, text: str) -> bytes:
+        """Digest of the model name and text"""
+        return hashlib.sha256(
+            self.model_name.encode() + b"\x00" + text.encode()
+        ).digest()
@@ -1,15 +1,94 @@
+import asyncio
+import functools
 import json
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import anthropic
+import httpx
+from config import config
+from groq import AsyncGroq, DefaultAsyncHttpxClient, DefaultHttpxClient, Groq
+from groq.types.chat import ChatCompletion, ChatCompletionMessage
+from groq.types.chat.chat_completion import Choice
+from groq.types.chat.chat_completion_message_tool_call import (
+    ChatCompletionMessageToolCall,
+    Function,
+)
+
+
+def debug_print(message: str, *args):
+    """
+    Print only if DEBUG mode is enabled.
+
+    Pass values as printf-style args rather than pre-formatting the message,
+    so nothing is formatted when DEBUG is off.
+    """
+    if config.DEBUG:
+        print(message % args if args else message)
 
 
-def debug_print(*args, **kwargs):
-    """Print only if DEBUG mode is enabled"""
-    from config import config
+# orjson parses tool arguments several times faster when it is installed
+try:
+    import orjson
 
-    if config.DEBUG:
-        print(*args, **kwargs)
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _parse_tool_arguments(arguments: Optional[str]) -> Dict[str, Any]:
+    """Parse a tool call's JSON argument string; empty arguments mean no input"""
+    if not arguments:
+        return {}
+    return _json_loads(arguments)
+
+
+# Anthropic prompt-caching marker for static request prefixes
+_EPHEMERAL = {"type": "ephemeral"}
+
+# Connection pool shared by all requests of a provider's HTTP client
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+
+
+# System prompts in provider-native form, built once per distinct prompt and
+# history. Results are shared between requests and must not be mutated
+@functools.lru_cache(maxsize=256)
+def _anthropic_system_blocks(
+    system_prompt: str, system_context: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Anthropic system blocks with a cache breakpoint after the static prompt"""
+    blocks = [{"type": "text", "text": system_prompt, "cache_control": _EPHEMERAL}]
+    if system_context:
+        blocks.append({"type": "text", "text": system_context})
+    return blocks
+
+
+@functools.lru_cache(maxsize=256)
+def _groq_system_message(
+    system_prompt: str, system_context: Optional[str]
+) -> Dict[str, str]:
+    """Groq system message joining the static prompt and per-request context"""
+    if system_context:
+        system_prompt = f"{system_prompt}\n\n{system_context}"
+    return {"role": "system", "content": system_prompt}
+
+
+@dataclass(slots=True, frozen=True)
+class ToolCall:
+    """A tool invocation requested by the model"""
+
+    id: str
+    name: str
+    input: Dict[str, Any]
+
+
+@dataclass(slots=True)
+class ToolResult:
+    """Output of an executed tool call, sent back to the model"""
+
+    tool_call_id: str
+    content: str
 
 
 @dataclass
@@ -18,13 +97,45 @@ class LLMResponse:
 
     content: str
     requires_tool_execution: bool
-    tool_calls: List[Dict[str, Any]]
+    tool_calls: List[ToolCall]
     raw_response: Any
 
 
+@dataclass
+class StreamEvent:
+    """
+    Incremental event emitted while a response is streamed.
+
+    type is "text" for a decoded text delta, "tool_call" once a tool call is
+    complete and can be executed, and "done" for the final event carrying the
+    full LLMResponse.
+    """
+
+    type: str
+    text: str = ""
+    tool_call: Optional[ToolCall] = None
+    response: Optional[LLMResponse] = None
+
+
+@dataclass
+class BatchRequest:
+    """One request of an offline batch job, identified by custom_id"""
+
+    custom_id: str
+    messages: List[Dict[str, Any]]
+    system_prompt: str
+    tools: Optional[List[Dict[str, Any]]] = None
+    temperature: float = 0
+    max_tokens: int = 800
+    system_context: Optional[str] = None
+
+
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers"""
 
+    # Whether asubmit_batch/await_batch_results talk to a batch API
+    supports_batches: bool = False
+
     @abstractmethod
     def generate_response(
         self,
@@ -33,18 +144,97 @@ class BaseLLMProvider(ABC):
         tools: Optional[List[Dict[str, Any]]] = None,
         temperature: float = 0,
         max_tokens: int = 800,
+        system_context: Optional[str] = None,
+    ) -> LLMResponse:
+        """
+        Generate response with normalized output.
+
+        system_prompt is the static instruction prefix shared by every request;
+        system_context carries per-request additions such as conversation
+        history. Keeping them apart lets providers cache the static prefix.
+        """
+        pass
+
+    @abstractmethod
+    async def agenerate_response(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0,
+        max_tokens: int = 800,
+        system_context: Optional[str] = None,
     ) -> LLMResponse:
-        """Generate response with normalized output"""
+        """Async variant of generate_response using the provider's async client"""
         pass
 
+    async def astream_response(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0,
+        max_tokens: int = 800,
+        system_context: Optional[str] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        Stream a response as StreamEvents, ending with a "done" event.
+
+        Tool calls are yielded as soon as each one is complete, before the
+        rest of the response has been decoded. This default implementation
+        wraps agenerate_response for providers without streaming support.
+        """
+        response = await self.agenerate_response(
+            messages=messages,
+            system_prompt=system_prompt,
+            tools=tools,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            system_context=system_context,
+        )
+        if response.content:
+            yield StreamEvent("text", text=response.content)
+        for tool_call in response.tool_calls:
+            yield StreamEvent("tool_call", tool_call=tool_call)
+        yield StreamEvent("done", response=response)
+
+    async def asubmit_batch(self, requests: List[BatchRequest]) -> str:
+        """
+        Submit requests as one offline batch job.
+
+        Batches trade latency (up to 24 hours) for lower cost and no rate
+        limit pressure. Only available when supports_batches is set;
+        providers without a batch API raise NotImplementedError.
+
+        Returns:
+            Batch job ID for await_batch_results
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batches")
+
+    async def await_batch_results(
+        self, batch_id: str, poll_interval: float = 30.0
+    ) -> Dict[str, LLMResponse]:
+        """
+        Wait for a batch job to finish and collect its results.
+
+        Returns:
+            LLMResponses of the succeeded requests, keyed by custom_id
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batches")
+
     @abstractmethod
     def convert_tool_definition(self, tool_def: Dict[str, Any]) -> Dict[str, Any]:
         """Convert Anthropic-style tool definition to provider format"""
         pass
 
+    @abstractmethod
+    def build_assistant_message(self, raw_response: Any) -> Dict[str, Any]:
+        """Build the assistant turn echoing a tool-use response back to the API"""
+        pass
+
     @abstractmethod
     def build_tool_result_messages(
-        self, tool_results: List[Dict[str, Any]]
+        self, tool_results: List[ToolResult]
     ) -> List[Dict[str, Any]]:
         """Build tool result messages in provider format"""
         pass
@@ -53,11 +243,22 @@ class BaseLLMProvider(ABC):
 class AnthropicProvider(BaseLLMProvider):
     """Provider implementation for Anthropic's Claude API"""
 
-    def __init__(self, api_key: str, model: str):
-        import anthropic
+    supports_batches = True
 
-        self.client = anthropic.Anthropic(api_key=api_key)
+    def __init__(self, api_key: str, model: str):
+        # Clients are created once and reused so every request shares their
+        # keep-alive connection pools; both are safe for concurrent use
+        self.client = anthropic.Anthropic(
+            api_key=api_key,
+            http_client=anthropic.DefaultHttpxClient(limits=_HTTP_LIMITS),
+        )
+        self.async_client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=_HTTP_LIMITS),
+        )
         self.model = model
+        # Last (definitions, definitions with cache breakpoint) pair
+        self._last_tools: Optional[tuple] = None
 
     def generate_response(
         self,
@@ -66,39 +267,154 @@ class AnthropicProvider(BaseLLMProvider):
         tools: Optional[List[Dict[str, Any]]] = None,
         temperature: float = 0,
         max_tokens: int = 800,
+        system_context: Optional[str] = None,
     ) -> LLMResponse:
         """Generate response using Anthropic API"""
+        api_params = self._build_api_params(
+            messages, system_prompt, system_context, tools, temperature, max_tokens
+        )
+
+        # Get response from Claude
+        response = self.client.messages.create(**api_params)
+        return self._parse_response(response)
+
+    async def agenerate_response(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0,
+        max_tokens: int = 800,
+        system_context: Optional[str] = None,
+    ) -> LLMResponse:
+        """Generate response using the async Anthropic client"""
+        api_params = self._build_api_params(
+            messages, system_prompt, system_context, tools, temperature, max_tokens
+        )
+
+        response = await self.async_client.messages.create(**api_params)
+        return self._parse_response(response)
+
+    async def astream_response(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0,
+        max_tokens: int = 800,
+        system_context: Optional[str] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream a response using the async Anthropic client"""
+        api_params = self._build_api_params(
+            messages, system_prompt, system_context, tools, temperature, max_tokens
+        )
+
+        async with self.async_client.messages.stream(**api_params) as stream:
+            async for event in stream:
+                if event.type == "text":
+                    yield StreamEvent("text", text=event.text)
+                elif (
+                    event.type == "content_block_stop"
+                    and event.content_block.type == "tool_use"
+                ):
+                    block = event.content_block
+                    yield StreamEvent(
+                        "tool_call",
+                        tool_call=ToolCall(block.id, block.name, block.input),
+                    )
+            response = await stream.get_final_message()
+
+        yield StreamEvent("done", response=self._parse_response(response))
+
+    async def asubmit_batch(self, requests: List[BatchRequest]) -> str:
+        """Submit requests through the Message Batches API"""
+        batch = await self.async_client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": request.custom_id,
+                    "params": self._build_api_params(
+                        request.messages,
+                        request.system_prompt,
+                        request.system_context,
+                        request.tools,
+                        request.temperature,
+                        request.max_tokens,
+                    ),
+                }
+                for request in requests
+            ]
+        )
+        return batch.id
+
+    async def await_batch_results(
+        self, batch_id: str, poll_interval: float = 30.0
+    ) -> Dict[str, LLMResponse]:
+        """Poll a message batch until it has ended and parse its results"""
+        batches = self.async_client.messages.batches
+        while (await batches.retrieve(batch_id)).processing_status != "ended":
+            await asyncio.sleep(poll_interval)
+
+        # Errored, canceled and expired requests are left out
+        return {
+            entry.custom_id: self._parse_response(entry.result.message)
+            async for entry in await batches.results(batch_id)
+            if entry.result.type == "succeeded"
+        }
+
+    def _build_api_params(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        system_context: Optional[str],
+        tools: Optional[List[Dict[str, Any]]],
+        temperature: float,
+        max_tokens: int,
+    ) -> Dict[str, Any]:
+        """Build request parameters shared by the sync and async paths"""
         api_params = {
             "model": self.model,
             "temperature": temperature,
             "max_tokens": max_tokens,
             "messages": messages,
-            "system": system_prompt,
+            # The static prompt is a cache breakpoint; per-request context
+            # follows it so it never invalidates the cached prefix
+            "system": _anthropic_system_blocks(system_prompt, system_context),
         }
 
         # Add tools if available
         if tools:
-            api_params["tools"] = tools
+            api_params["tools"] = self._cacheable_tools(tools)
             api_params["tool_choice"] = {"type": "auto"}
 
-        # Get response from Claude
-        response = self.client.messages.create(**api_params)
+        return api_params
 
+    def _cacheable_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Tool definitions with a cache breakpoint, built once per definitions list"""
+        # Fast path: the same definitions list is passed on every round
+        last = self._last_tools
+        if last is not None and last[0] is tools:
+            return last[1]
+
+        # Caching the last tool caches every tool definition before it
+        marked = [*tools[:-1], {**tools[-1], "cache_control": _EPHEMERAL}]
+        # Holding a reference keeps the list alive, so the identity check
+        # above can never match a different list at a reused address
+        self._last_tools = (tools, marked)
+        return marked
+
+    def _parse_response(self, response) -> LLMResponse:
+        """Normalize an Anthropic message into an LLMResponse"""
         # Check if tool use is required
         requires_tool_execution = response.stop_reason == "tool_use"
 
         # Extract tool calls if present
         tool_calls = []
         if requires_tool_execution:
-            for content_block in response.content:
-                if content_block.type == "tool_use":
-                    tool_calls.append(
-                        {
-                            "id": content_block.id,
-                            "name": content_block.name,
-                            "input": content_block.input,
-                        }
-                    )
+            tool_calls = [
+                ToolCall(block.id, block.name, block.input)
+                for block in response.content
+                if block.type == "tool_use"
+            ]
 
         # Get text content
         content = ""
@@ -116,20 +432,23 @@ class AnthropicProvider(BaseLLMProvider):
         """Anthropic format is our base format, no conversion needed"""
         return tool_def
 
+    def build_assistant_message(self, raw_response: Any) -> Dict[str, Any]:
+        """Echo the assistant's content blocks, including its tool_use blocks"""
+        return {"role": "assistant", "content": raw_response.content}
+
     def build_tool_result_messages(
-        self, tool_results: List[Dict[str, Any]]
+        self, tool_results: List[ToolResult]
     ) -> List[Dict[str, Any]]:
         """Build Anthropic-formatted tool result messages"""
         # Anthropic expects tool results as content blocks in a user message
-        result_blocks = []
-        for result in tool_results:
-            result_blocks.append(
-                {
-                    "type": "tool_result",
-                    "tool_use_id": result["tool_call_id"],
-                    "content": result["content"],
-                }
-            )
+        result_blocks = [
+            {
+                "type": "tool_result",
+                "tool_use_id": result.tool_call_id,
+                "content": result.content,
+            }
+            for result in tool_results
+        ]
 
         return [{"role": "user", "content": result_blocks}]
 
@@ -138,13 +457,21 @@ class GroqProvider(BaseLLMProvider):
     """Provider implementation for Groq's API (OpenAI-compatible)"""
 
     def __init__(self, api_key: str, model: str):
-        debug_print(
-            f"[DEBUG] Initializing GroqProvider with API key: {api_key[:20] if api_key else 'NONE'}..."
-        )
-        debug_print(f"[DEBUG] Model: {model}")
-        # Store API key instead of client for async-safe usage
+        debug_print("[DEBUG] Initializing GroqProvider with model: %s", model)
         self.api_key = api_key
         self.model = model
+        # Clients are created once and reused so every request shares their
+        # keep-alive connection pools; both are safe for concurrent use
+        self.client = Groq(
+            api_key=api_key, http_client=DefaultHttpxClient(limits=_HTTP_LIMITS)
+        )
+        self.async_client = AsyncGroq(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(limits=_HTTP_LIMITS),
+        )
+        # Last definitions list and its conversion; only one is kept, since
+        # the tool manager hands out the same list on every request
+        self._last_tools: Optional[tuple] = None
         debug_print("[DEBUG] GroqProvider initialized")
 
     def generate_response(
@@ -154,33 +481,174 @@ class GroqProvider(BaseLLMProvider):
         tools: Optional[List[Dict[str, Any]]] = None,
         temperature: float = 0,
         max_tokens: int = 800,
+        system_context: Optional[str] = None,
     ) -> LLMResponse:
         """Generate response using Groq API"""
-        debug_print("[DEBUG] GroqProvider.generate_response called")
-        debug_print(f"[DEBUG] self.api_key type: {type(self.api_key)}")
-        debug_print(
-            f"[DEBUG] self.api_key value: {self.api_key[:30] if self.api_key else 'NONE'}..."
+        debug_print("[DEBUG] GroqProvider.generate_response called (%s)", self.model)
+
+        api_params = self._build_api_params(
+            messages, system_prompt, system_context, tools, temperature, max_tokens
+        )
+
+        debug_print("[DEBUG] Making Groq API call with params: %s", api_params.keys())
+
+        # Get response from Groq
+        try:
+            response = self.client.chat.completions.create(**api_params)
+            debug_print("[DEBUG] Groq API call successful")
+        except Exception as e:
+            debug_print("[DEBUG] Groq API call failed: %s", e)
+            raise
+
+        return self._parse_response(response)
+
+    async def agenerate_response(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0,
+        max_tokens: int = 800,
+        system_context: Optional[str] = None,
+    ) -> LLMResponse:
+        """Generate response using the async Groq client"""
+        api_params = self._build_api_params(
+            messages, system_prompt, system_context, tools, temperature, max_tokens
+        )
+
+        try:
+            response = await self.async_client.chat.completions.create(**api_params)
+            debug_print("[DEBUG] Async Groq API call successful")
+        except Exception as e:
+            debug_print("[DEBUG] Async Groq API call failed: %s", e)
+            raise
+
+        return self._parse_response(response)
+
+    async def astream_response(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0,
+        max_tokens: int = 800,
+        system_context: Optional[str] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream a response using the async Groq client"""
+        api_params = self._build_api_params(
+            messages, system_prompt, system_context, tools, temperature, max_tokens
         )
-        debug_print(
-            f"[DEBUG] self.api_key length: {len(self.api_key) if self.api_key else 0}"
+
+        stream = await self.async_client.chat.completions.create(
+            **api_params, stream=True
         )
 
-        # Create fresh client for each request (async-safe)
-        from groq import Groq
+        text_parts = []
+        # Tool call fragments keyed by index; arguments arrive in pieces
+        calls: Dict[int, Dict[str, Any]] = {}
+        emitted = set()
+        finish_reason = None
+        last_chunk = None
+
+        async for chunk in stream:
+            last_chunk = chunk
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta
+
+            if delta.content:
+                text_parts.append(delta.content)
+                yield StreamEvent("text", text=delta.content)
+
+            for fragment in delta.tool_calls or []:
+                # Calls stream in index order, so a new index means every
+                # earlier call is complete and can start executing
+                for index in sorted(calls):
+                    if index < fragment.index and index not in emitted:
+                        emitted.add(index)
+                        yield StreamEvent(
+                            "tool_call", tool_call=self._stream_tool_call(calls[index])
+                        )
+
+                call = calls.setdefault(
+                    fragment.index, {"id": None, "name": "", "arguments": ""}
+                )
+                if fragment.id:
+                    call["id"] = fragment.id
+                if fragment.function:
+                    call["name"] += fragment.function.name or ""
+                    call["arguments"] += fragment.function.arguments or ""
+
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+
+        if finish_reason == "tool_calls":
+            for index in sorted(calls):
+                if index not in emitted:
+                    yield StreamEvent(
+                        "tool_call", tool_call=self._stream_tool_call(calls[index])
+                    )
+
+        response = self._build_streamed_completion(
+            last_chunk, "".join(text_parts), calls, finish_reason
+        )
+        yield StreamEvent("done", response=self._parse_response(response))
 
-        debug_print("[DEBUG] About to create Groq client...")
-        client = Groq(api_key=self.api_key)
-        debug_print(f"[DEBUG] Created fresh Groq client: {client}")
-        debug_print(f"[DEBUG] Model: {self.model}")
+    @staticmethod
+    def _stream_tool_call(call: Dict[str, Any]) -> ToolCall:
+        """Normalize an accumulated streamed tool call"""
+        return ToolCall(
+            call["id"], call["name"], _parse_tool_arguments(call["arguments"])
+        )
 
-        # Build messages with system prompt as first message
-        groq_messages = [{"role": "system", "content": system_prompt}] + messages
+    @staticmethod
+    def _build_streamed_completion(last_chunk, content, calls, finish_reason):
+        """Assemble streamed deltas into a ChatCompletion for _parse_response"""
+        tool_calls = [
+            ChatCompletionMessageToolCall(
+                id=call["id"],
+                type="function",
+                function=Function(
+                    name=call["name"], arguments=call["arguments"] or "{}"
+                ),
+            )
+            for _, call in sorted(calls.items())
+        ]
+        message = ChatCompletionMessage(
+            role="assistant", content=content or None, tool_calls=tool_calls or None
+        )
+        return ChatCompletion(
+            id=last_chunk.id if last_chunk else "",
+            object="chat.completion",
+            created=last_chunk.created if last_chunk else 0,
+            model=last_chunk.model if last_chunk else "",
+            choices=[
+                Choice(
+                    index=0,
+                    finish_reason=finish_reason or "stop",
+                    message=message,
+                    logprobs=None,
+                )
+            ],
+        )
+
+    def _build_api_params(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        system_context: Optional[str],
+        tools: Optional[List[Dict[str, Any]]],
+        temperature: float,
+        max_tokens: int,
+    ) -> Dict[str, Any]:
+        """Build request parameters shared by the sync and async paths"""
+        # Build messages with system prompt as first message. The static
+        # prompt always leads so Groq's prefix caching can reuse it
+        groq_messages = [_groq_system_message(system_prompt, system_context), *messages]
 
         # Convert tools to Groq format if provided
-        groq_tools = None
-        if tools:
-            groq_tools = [self.convert_tool_definition(t) for t in tools]
-            debug_print(f"[DEBUG] Tools converted: {len(groq_tools)} tools")
+        groq_tools = self._convert_tools(tools) if tools else None
 
         api_params = {
             "model": self.model,
@@ -194,18 +662,25 @@ class GroqProvider(BaseLLMProvider):
             api_params["tools"] = groq_tools
             api_params["tool_choice"] = "auto"
 
-        debug_print(
-            f"[DEBUG] Making Groq API call with params: {list(api_params.keys())}"
-        )
+        return api_params
 
-        # Get response from Groq
-        try:
-            response = client.chat.completions.create(**api_params)
-            debug_print("[DEBUG] Groq API call successful")
-        except Exception as e:
-            debug_print(f"[DEBUG] Groq API call failed: {e}")
-            raise
+    def _convert_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Tool definitions in Groq's format, converted once per definitions list"""
+        # Fast path: the same definitions list is passed on every round
+        last = self._last_tools
+        if last is not None and last[0] is tools:
+            return last[1]
+
+        groq_tools = [self.convert_tool_definition(t) for t in tools]
+        debug_print("[DEBUG] Tools converted: %d tools", len(groq_tools))
+
+        # Holding a reference keeps the list alive, so the identity check
+        # above can never match a different list at a reused address
+        self._last_tools = (tools, groq_tools)
+        return groq_tools
 
+    def _parse_response(self, response) -> LLMResponse:
+        """Normalize a Groq chat completion into an LLMResponse"""
         # Check if tool use is required
         message = response.choices[0].message
         requires_tool_execution = (
@@ -214,19 +689,17 @@ class GroqProvider(BaseLLMProvider):
             and message.tool_calls is not None
         )
 
-        # Extract tool calls if present
+        # Extract tool calls if present, parsing arguments from JSON strings
         tool_calls = []
         if requires_tool_execution:
-            for tool_call in message.tool_calls:
-                # Parse arguments from JSON string
-                arguments = json.loads(tool_call.function.arguments)
-                tool_calls.append(
-                    {
-                        "id": tool_call.id,
-                        "name": tool_call.function.name,
-                        "input": arguments,
-                    }
+            tool_calls = [
+                ToolCall(
+                    tool_call.id,
+                    tool_call.function.name,
+                    _parse_tool_arguments(tool_call.function.arguments),
                 )
+                for tool_call in message.tool_calls
+            ]
 
         # Get text content
         content = ""
@@ -251,18 +724,25 @@ class GroqProvider(BaseLLMProvider):
             },
         }
 
+    def build_assistant_message(self, raw_response: Any) -> Dict[str, Any]:
+        """Echo the assistant message with its tool_calls"""
+        message = raw_response.choices[0].message
+        return {
+            "role": "assistant",
+            "content": message.content or "",
+            "tool_calls": message.tool_calls,
+        }
+
     def build_tool_result_messages(
-        self, tool_results: List[Dict[str, Any]]
+        self, tool_results: List[ToolResult]
     ) -> List[Dict[str, Any]]:
         """Build Groq/OpenAI-formatted tool result messages"""
         # Groq expects individual messages with role="tool"
-        messages = []
-        for result in tool_results:
-            messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": result["tool_call_id"],
-                    "content": result["content"],
-                }
-            )
-        return messages
+        return [
+            {
+                "role": "tool",
+                "tool_call_id": result.tool_call_id,
+                "content": result.content,
+            }
+            for result in tool_results
+        ]
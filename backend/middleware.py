@@ -0,0 +1,45 @@
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+
+# Status code, raw headers and body of a preflight response
+_Preflight = Tuple[int, Tuple[Tuple[bytes, bytes], ...], bytes]
+
+
+class CachedCORSMiddleware(CORSMiddleware):
+    """CORS middleware that reuses preflight responses for repeated requests"""
+
+    # Origins and requested headers come from clients, so the number of
+    # distinct preflights kept is capped
+    MAX_CACHED_PREFLIGHTS = 1024
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._preflight_cache: Dict[Tuple[str, str, Optional[str]], _Preflight] = {}
+
+    def preflight_response(self, request_headers: Headers) -> Response:
+        """Return the cached preflight response for this origin, method and headers"""
+        key = (
+            request_headers["origin"],
+            request_headers["access-control-request-method"],
+            request_headers.get("access-control-request-headers"),
+        )
+        cached = self._preflight_cache.get(key)
+        if cached is None:
+            response = super().preflight_response(request_headers)
+            if len(self._preflight_cache) < self.MAX_CACHED_PREFLIGHTS:
+                self._preflight_cache[key] = (
+                    response.status_code,
+                    tuple(response.raw_headers),
+                    response.body,
+                )
+            return response
+
+        # Only the header values are cached; each request gets its own
+        # Response so nothing downstream can mutate a shared header list
+        status_code, raw_headers, body = cached
+        response = Response(body, status_code=status_code)
+        response.raw_headers = list(raw_headers)
+        return response
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import List, Optional
 
 from pydantic import BaseModel
@@ -29,7 +30,10 @@ class CourseChunk(BaseModel):
     chunk_index: int  # Position of this chunk in the document
 
 
-class Source(BaseModel):
+# Created for every search hit, so a slotted dataclass rather than a model;
+# pydantic still validates and serializes it inside API response models
+@dataclass(frozen=True, slots=True)
+class Source:
     """Represents a source citation with optional link"""
 
     display_text: str  # "Course Title - Lesson N"
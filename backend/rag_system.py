@@ -1,9 +1,10 @@
 import os
 from typing import Dict, List, Optional, Tuple
 
-from ai_generator import AIGenerator
+from ai_generator import QUESTION_PREFIX, AIGenerator
 from document_processor import DocumentProcessor
-from models import Course
+from models import Course, CourseChunk
+from response_cache import ExactMatchCache, SemanticCache
 from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
 from session_manager import SessionManager
 from vector_store import VectorStore
@@ -42,18 +43,45 @@ class RAGSystem:
             config.CHUNK_SIZE, config.CHUNK_OVERLAP
         )
         self.vector_store = VectorStore(
-            config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
+            config.CHROMA_PATH,
+            config.EMBEDDING_MODEL,
+            config.MAX_RESULTS,
+            embedding_cache_path=config.EMBEDDING_CACHE_PATH,
+            embedding_memory_cache_size=config.EMBEDDING_MEMORY_CACHE_SIZE,
         )
 
+        # Reuse the vector store's embedding model for the response cache
+        response_cache = None
+        if config.SEMANTIC_CACHE_ENABLED:
+            response_cache = SemanticCache(
+                self.vector_store.embedding_function,
+                threshold=config.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=config.SEMANTIC_CACHE_MAX_ENTRIES,
+            )
+        exact_cache = None
+        if config.EXACT_CACHE_ENABLED:
+            exact_cache = ExactMatchCache(
+                ttl=config.EXACT_CACHE_TTL, max_entries=config.EXACT_CACHE_MAX_ENTRIES
+            )
+
         # Create LLM provider and initialize AI generator
         provider = create_llm_provider(config)
-        self.ai_generator = AIGenerator(provider)
+        self.ai_generator = AIGenerator(
+            provider, response_cache=response_cache, exact_cache=exact_cache
+        )
 
         self.session_manager = SessionManager(config.MAX_HISTORY)
 
         # Initialize search tools
         self.tool_manager = ToolManager()
-        self.search_tool = CourseSearchTool(self.vector_store)
+        search_cache = None
+        if config.SEARCH_CACHE_ENABLED:
+            search_cache = SemanticCache(
+                self.vector_store.embedding_function,
+                threshold=config.SEARCH_CACHE_THRESHOLD,
+                max_entries=config.SEARCH_CACHE_MAX_ENTRIES,
+            )
+        self.search_tool = CourseSearchTool(self.vector_store, search_cache)
         self.outline_tool = CourseOutlineTool(self.vector_store)
         self.tool_manager.register_tool(self.search_tool)
         self.tool_manager.register_tool(self.outline_tool)
@@ -112,6 +140,9 @@ class RAGSystem:
 
         # Get existing course titles to avoid re-processing
         existing_course_titles = set(self.vector_store.get_existing_course_titles())
+        # New courses and their chunks, written in one batch after the loop
+        new_courses: List[Tuple[Course, List[CourseChunk]]] = []
+        queued_titles = set()
 
         # Process each file in the folder
         for file_name in os.listdir(folder_path):
@@ -126,21 +157,47 @@ class RAGSystem:
                         self.document_processor.process_course_document(file_path)
                     )
 
-                    if course and course.title not in existing_course_titles:
-                        # This is a new course - add it to the vector store
-                        self.vector_store.add_course_metadata(course)
-                        self.vector_store.add_course_content(course_chunks)
-                        total_courses += 1
-                        total_chunks += len(course_chunks)
+                    if (
+                        course
+                        and course.title not in existing_course_titles
+                        and course.title not in queued_titles
+                    ):
+                        # This is a new course - queue it for the vector store
+                        new_courses.append((course, course_chunks))
+                        queued_titles.add(course.title)
                         print(
-                            f"Added new course: {course.title} ({len(course_chunks)} chunks)"
+                            f"Found new course: {course.title} ({len(course_chunks)} chunks)"
                         )
-                        existing_course_titles.add(course.title)
                     elif course:
                         print(f"Course already exists: {course.title} - skipping")
                 except Exception as e:
                     print(f"Error processing {file_name}: {e}")
 
+        if not new_courses:
+            return 0, 0
+
+        # Content goes in before the catalog entry: a course only counts as
+        # existing, and is skipped on the next run, once both are stored
+        try:
+            self.vector_store.add_course_content(
+                [chunk for _, chunks in new_courses for chunk in chunks]
+            )
+            self.vector_store.add_courses_metadata([c for c, _ in new_courses])
+            total_courses = len(new_courses)
+            total_chunks = sum(len(chunks) for _, chunks in new_courses)
+        except Exception as e:
+            # Retry one course at a time so a single bad course is all that's lost
+            print(f"Error adding courses to the vector store: {e}")
+            for course, course_chunks in new_courses:
+                try:
+                    self.vector_store.add_course_content(course_chunks)
+                    self.vector_store.add_course_metadata(course)
+                    total_courses += 1
+                    total_chunks += len(course_chunks)
+                except Exception as e:
+                    print(f"Error adding course {course.title}: {e}")
+
+        print(f"Added {total_courses} new courses ({total_chunks} chunks)")
         return total_courses, total_chunks
 
     def query(
@@ -157,13 +214,16 @@ class RAGSystem:
             Tuple of (response, sources list - empty for tool-based approach)
         """
         # Create prompt for the AI with clear instructions
-        prompt = f"""Answer this question about course materials: {query}"""
+        prompt = f"{QUESTION_PREFIX}{query}"
 
         # Get conversation history if session exists
         history = None
         if session_id:
             history = self.session_manager.get_conversation_history(session_id)
 
+        # Collect sources for this query only
+        self.tool_manager.reset_sources()
+
         # Generate response using AI with tools
         response = self.ai_generator.generate_response(
             query=prompt,
@@ -172,7 +232,47 @@ class RAGSystem:
             tool_manager=self.tool_manager,
         )
 
-        # Get sources from the search tool
+        return self._finish_query(query, session_id, response)
+
+    async def aquery(
+        self, query: str, session_id: Optional[str] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Async variant of query() for callers running on an event loop.
+
+        The provider is awaited and tools run in worker threads, so a slow
+        search does not hold up other requests served by the same loop.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+
+        Returns:
+            Tuple of (response, sources list)
+        """
+        prompt = f"{QUESTION_PREFIX}{query}"
+
+        history = None
+        if session_id:
+            history = self.session_manager.get_conversation_history(session_id)
+
+        # Bound to this request's context; tool tasks and threads inherit it
+        self.tool_manager.reset_sources()
+
+        response = await self.ai_generator.agenerate_response(
+            query=prompt,
+            conversation_history=history,
+            tools=self.tool_manager.get_tool_definitions(),
+            tool_manager=self.tool_manager,
+        )
+
+        return self._finish_query(query, session_id, response)
+
+    def _finish_query(
+        self, query: str, session_id: Optional[str], response: str
+    ) -> Tuple[str, List[str]]:
+        """Collect sources and record the exchange after a response is generated"""
+        # Get sources from this query's tool executions
         sources = self.tool_manager.get_last_sources()
 
         # Reset sources after retrieving them
@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+class SemanticCache:
+    """Similarity cache that maps embedded texts to previously computed values"""
+
+    def __init__(
+        self,
+        embedding_function: Callable[[List[str]], Sequence[Sequence[float]]],
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+    ):
+        """
+        Args:
+            embedding_function: Callable embedding a list of texts, e.g. the
+                vector store's SentenceTransformer embedding function
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Capacity; the least recently used entry is evicted
+        """
+        self.embedding_function = embedding_function
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        # Normalized vectors live in one contiguous matrix so a lookup is a
+        # single matrix-vector product; allocated on first insert
+        self._vectors: Optional[np.ndarray] = None
+        self._values: List[Any] = []
+        self._tags: List[Hashable] = []
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        # Reused similarity buffer so lookups don't allocate a result array
+        self._scores = np.empty(max_entries, dtype=np.float32)
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a text into a unit-length vector"""
+        return self.normalize(self.embedding_function([text])[0])
+
+    @staticmethod
+    def normalize(vector: Sequence[float]) -> np.ndarray:
+        """Scale an embedding computed elsewhere to a unit-length float32 vector"""
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, vector: np.ndarray, tag: Hashable = None) -> Optional[Any]:
+        """
+        Return the value of the most similar entry with a matching tag.
+
+        Args:
+            vector: Normalized query vector from embed()
+            tag: Entries only match when stored with an equal tag
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            count = len(self._values)
+            if not count:
+                return None
+
+            # Vectors from embed() are unit length, so cosine similarity is a
+            # plain dot product; the single best match is the common case
+            scores = np.matmul(self._vectors[:count], vector, out=self._scores[:count])
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            if self._tags[best] == tag:
+                self._touch(best)
+                return self._values[best]
+
+            # The closest entry has another tag; check the remaining entries
+            # above the threshold, best-scoring first
+            candidates = np.flatnonzero(scores >= self.threshold)
+            for index in candidates[np.argsort(-scores[candidates])]:
+                if self._tags[index] == tag:
+                    self._touch(index)
+                    return self._values[index]
+            return None
+
+    def put(self, vector: np.ndarray, value: Any, tag: Hashable = None):
+        """Store a value under a normalized vector, evicting the LRU entry if full"""
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros(
+                    (self.max_entries, vector.shape[0]), dtype=np.float32
+                )
+
+            if len(self._values) < self.max_entries:
+                index = len(self._values)
+                self._values.append(value)
+                self._tags.append(tag)
+            else:
+                index = int(np.argmin(self._last_used))
+                self._values[index] = value
+                self._tags[index] = tag
+
+            self._vectors[index] = vector
+            self._touch(index)
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._values.clear()
+            self._tags.clear()
+            self._last_used[:] = 0
+
+    def _touch(self, index: int):
+        """Mark an entry as most recently used"""
+        self._clock += 1
+        self._last_used[index] = self._clock
+
+
+class LRUCache:
+    """Size-bounded LRU cache whose entries never expire"""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: Capacity; the least recently used entry is evicted
+        """
+        self.max_entries = max_entries
+        # Ordered from least to most recently used
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value stored under key, or None if missing"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value under key, evicting the LRU entry if full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ExactMatchCache:
+    """LRU cache with a time-to-live for byte-identical requests"""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000):
+        """
+        Args:
+            ttl: Seconds an entry stays valid after it was stored
+            max_entries: Capacity; the least recently used entry is evicted
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expiry time, value), ordered from least to most recently used
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value stored under key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value under key, evicting the LRU entry if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
@@ -1,13 +1,22 @@
+import asyncio
+import inspect
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from models import Source
+from response_cache import SemanticCache
 from vector_store import SearchResults, VectorStore
 
+EMPTY_QUERY_MESSAGE = "Please provide a search query."
+
 
 class Tool(ABC):
     """Abstract base class for all tools"""
 
+    # Receives the sources of each execution; set by ToolManager.register_tool
+    _sources_sink: Optional[Callable[[List[Source]], None]] = None
+
     @abstractmethod
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
@@ -18,12 +27,40 @@ class Tool(ABC):
         """Execute the tool with given parameters"""
         pass
 
+    def execute_batch(self, calls: List[Dict[str, Any]]) -> List[str]:
+        """Execute the tool once per parameter set; override to share work"""
+        return [self.execute(**kwargs) for kwargs in calls]
+
+    async def aexecute(self, **kwargs) -> str:
+        """Execute the tool without blocking the event loop"""
+        # Runs on the loop's default executor, sized at app startup
+        return await asyncio.to_thread(self.execute, **kwargs)
+
+    def set_sources_sink(self, sink: Callable[[List[Source]], None]):
+        """Route the sources of every execution to sink"""
+        self._sources_sink = sink
+
+    def _report_sources(self, sources: List[Source]):
+        """Record the sources of one execution and pass them to the sink"""
+        self.last_sources = sources
+        if sources and self._sources_sink is not None:
+            self._sources_sink(sources)
+
 
 class CourseSearchTool(Tool):
     """Tool for searching course content with semantic course name matching"""
 
-    def __init__(self, vector_store: VectorStore):
+    def __init__(
+        self, vector_store: VectorStore, search_cache: Optional[SemanticCache] = None
+    ):
+        """
+        Args:
+            vector_store: Store to search
+            search_cache: Optional similarity cache of formatted results, so
+                near-duplicate queries skip the vector search
+        """
         self.store = vector_store
+        self.search_cache = search_cache
         self.last_sources: List[Source] = []  # Track sources from last search
 
     def get_tool_definition(self) -> Dict[str, Any]:
@@ -68,87 +105,246 @@ class CourseSearchTool(Tool):
         Returns:
             Formatted search results or error message
         """
+        query, course_name, lesson_number = self._search_params(
+            query, course_name, lesson_number
+        )
+        # Nothing to embed or search for
+        if not query or not query.strip():
+            return EMPTY_QUERY_MESSAGE
+
+        if self.search_cache is None:
+            output, sources = self._search(query, course_name, lesson_number)
+            self._report_sources(sources)
+            return output
+
+        # The query is embedded once, for the cache lookup and the search
+        query_embedding = self.store.embed_query(query)
+        cache_vector, tag = self._cache_key(query_embedding, course_name, lesson_number)
+        cached = self.search_cache.get(cache_vector, tag)
+        if cached is not None:
+            output, sources = cached
+            self._report_sources(list(sources))
+            return output
+
+        output, sources = self._search(
+            query, course_name, lesson_number, query_embedding
+        )
+        self._report_sources(sources)
+        # Only formatted results are cached; errors and misses are retried
+        if sources:
+            self.search_cache.put(cache_vector, (output, tuple(sources)), tag)
+        return output
+
+    def execute_batch(self, calls: List[Dict[str, Any]]) -> List[str]:
+        """
+        Execute several searches with a single batched vector store lookup.
+
+        Args:
+            calls: Keyword arguments of each execute() call
+
+        Returns:
+            Formatted search results or error message per call, in order
+        """
+        params = [self._search_params(**kwargs) for kwargs in calls]
+        outputs: List[Optional[str]] = [None] * len(params)
+        embeddings: List[Any] = [None] * len(params)
+        cache_keys: List[Optional[tuple]] = [None] * len(params)
+        # Sources of the whole batch, deduplicated by (course_title, lesson_number)
+        batch_sources: Dict[tuple, Source] = {}
+
+        searchable = []
+        for index, (query, _, _) in enumerate(params):
+            if not query or not query.strip():
+                outputs[index] = EMPTY_QUERY_MESSAGE
+            else:
+                searchable.append(index)
+
+        # The cache lookup needs every query embedded up front; do it in one
+        # forward pass, and reuse the embeddings for the search on a miss
+        if self.search_cache is not None and searchable:
+            batch = self.store.embed_batch([params[i][0] for i in searchable])
+            for index, embedding in zip(searchable, batch):
+                embeddings[index] = embedding
+
+        pending = []
+        for index in searchable:
+            query, course_name, lesson_number = params[index]
+            if self.search_cache is not None:
+                cache_keys[index] = self._cache_key(
+                    embeddings[index], course_name, lesson_number
+                )
+                cached = self.search_cache.get(*cache_keys[index])
+                if cached is not None:
+                    outputs[index], sources = cached
+                    self._report_sources(list(sources))
+                    for source in sources:
+                        batch_sources.setdefault(
+                            (source.course_title, source.lesson_number), source
+                        )
+                    continue
+            pending.append(index)
+
+        if pending:
+            search_kwargs = {}
+            if self.search_cache is not None:
+                search_kwargs["query_embeddings"] = [embeddings[i] for i in pending]
+            results = self.store.search_batch(
+                [params[i][0] for i in pending],
+                course_names=[params[i][1] for i in pending],
+                lesson_numbers=[params[i][2] for i in pending],
+                **search_kwargs,
+            )
+            for index, result in zip(pending, results):
+                outputs[index], sources = self._render(
+                    result, *params[index], embeddings[index]
+                )
+                self._report_sources(sources)
+                for source in sources:
+                    batch_sources.setdefault(
+                        (source.course_title, source.lesson_number), source
+                    )
+                if cache_keys[index] is not None and sources:
+                    cache_vector, tag = cache_keys[index]
+                    self.search_cache.put(
+                        cache_vector, (outputs[index], tuple(sources)), tag
+                    )
+
+        self.last_sources = list(batch_sources.values())
+        return outputs
 
-        # Normalize empty strings to None (some LLM providers pass "" instead of null)
+    @staticmethod
+    def _search_params(
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> Tuple[str, Optional[str], Optional[int]]:
+        """Positional search parameters of one execute() call"""
+        # Some LLM providers pass "" instead of null for optional arguments
         if course_name == "":
             course_name = None
         if lesson_number == "":
             lesson_number = None
+        return query, course_name, lesson_number
+
+    def _cache_key(
+        self,
+        query_embedding,
+        course_name: Optional[str],
+        lesson_number: Optional[int],
+    ) -> Tuple[Any, tuple]:
+        """Cache vector and tag for a search; the data version invalidates on writes"""
+        cache_vector = self.search_cache.normalize(query_embedding)
+        return cache_vector, (course_name, lesson_number, self.store.data_version)
+
+    def _search(
+        self,
+        query: str,
+        course_name: Optional[str],
+        lesson_number: Optional[int],
+        query_embedding=None,
+    ) -> Tuple[str, List[Source]]:
+        """Search the vector store; returns the tool output and its sources"""
+        search_kwargs = {}
+        if query_embedding is not None:
+            search_kwargs["query_embedding"] = query_embedding
 
         # Use the vector store's unified search interface
         results = self.store.search(
-            query=query, course_name=course_name, lesson_number=lesson_number
+            query=query,
+            course_name=course_name,
+            lesson_number=lesson_number,
+            **search_kwargs,
         )
+        return self._render(results, query, course_name, lesson_number, query_embedding)
 
-        # Handle errors with intelligent fallback
-        if results.error:
-            # If course filter failed but query is good, try without filter as fallback
-            if course_name and "No course found" in results.error:
-                fallback_results = self.store.search(query=query)
-                if not fallback_results.is_empty() and not fallback_results.error:
-                    # Add note about fallback
-                    return (
-                        f"[Searched all courses since '{course_name}' wasn't found]\n\n"
-                        + self._format_results(fallback_results)
-                    )
-            # Return original error if fallback didn't help
-            return results.error
-
-        # Handle empty results
-        if results.is_empty():
-            filter_info = ""
-            if course_name:
-                filter_info += f" in course '{course_name}'"
-            if lesson_number:
-                filter_info += f" in lesson {lesson_number}"
-            return f"No relevant content found{filter_info}."
-
-        # Format and return results
-        return self._format_results(results)
-
-    def _format_results(self, results: SearchResults) -> str:
-        """Format search results with course and lesson context"""
-        formatted = []
-        seen_sources = {}  # Track unique sources by (course_title, lesson_number)
+    def _render(
+        self,
+        results: SearchResults,
+        query: str,
+        course_name: Optional[str],
+        lesson_number: Optional[int],
+        query_embedding=None,
+    ) -> Tuple[str, List[Source]]:
+        """
+        Turn search results into tool output, retrying failed course filters.
 
-        for doc, meta in zip(results.documents, results.metadata):
-            course_title = meta.get("course_title", "unknown")
-            lesson_num = meta.get("lesson_number")
+        Sources are returned rather than stored on the tool, since concurrent
+        calls share this instance.
+        """
+        # If course filter failed but query is good, try without filter as fallback
+        if results.error and course_name and "No course found" in results.error:
+            search_kwargs = {}
+            if query_embedding is not None:
+                search_kwargs["query_embedding"] = query_embedding
+            fallback_results = self.store.search(query=query, **search_kwargs)
+            if not fallback_results.error and not fallback_results.is_empty():
+                # Add note about fallback
+                text, sources = self._format_results(fallback_results)
+                return (
+                    f"[Searched all courses since '{course_name}' wasn't found]\n\n"
+                    + text,
+                    sources,
+                )
 
-            # Build context header for LLM (unchanged)
-            header = f"[{course_title}"
-            if lesson_num is not None:
-                header += f" - Lesson {lesson_num}"
-            header += "]"
+        # Error, empty and formatted outcomes are decided in one place; only
+        # formatted results have sources
+        sources: List[Source] = []
+
+        def format_fn(formatted_results: SearchResults) -> str:
+            text, found = self._format_results(formatted_results)
+            sources.extend(found)
+            return text
+
+        return results.render(course_name, lesson_number, format_fn), sources
+
+    def _format_results(self, results: SearchResults) -> Tuple[str, List[Source]]:
+        """Format search results with course and lesson context, plus their sources"""
+        formatted = []
+        # Header per unique (course_title, lesson_number) key, in first-seen
+        # order; hits from the same lesson reuse one header string
+        headers: Dict[tuple, str] = {}
+
+        # Bound once so the loop body does no attribute lookups
+        append = formatted.append
+        get_header = headers.get
 
-            # Create unique key for deduplication
+        for doc, meta in zip(results.documents, results.metadata):
+            meta_get = meta.get
+            course_title = meta_get("course_title", "unknown")
+            lesson_num = meta_get("lesson_number")
             source_key = (course_title, lesson_num)
 
-            # Only create Source object if we haven't seen this (course, lesson) combination
-            if source_key not in seen_sources:
-                # Build display text for UI
-                display_text = course_title
+            # Build context header for LLM
+            header = get_header(source_key)
+            if header is None:
                 if lesson_num is not None:
-                    display_text += f" - Lesson {lesson_num}"
+                    header = f"[{course_title} - Lesson {lesson_num}]"
+                else:
+                    header = f"[{course_title}]"
+                headers[source_key] = header
+
+            append(f"{header}\n{doc}")
 
-                # Look up best available link
-                url = self.store.get_source_link(course_title, lesson_num)
+        # Resolve every link in one lookup rather than one per source
+        links = self.store.get_source_links_batch(list(headers))
 
-                # Create and store Source object
-                source = Source(
+        sources = []
+        for course_title, lesson_num in headers:
+            # Build display text for UI
+            if lesson_num is not None:
+                display_text = f"{course_title} - Lesson {lesson_num}"
+            else:
+                display_text = course_title
+
+            sources.append(
+                Source(
                     display_text=display_text,
                     course_title=course_title,
                     lesson_number=lesson_num,
-                    url=url,
+                    url=links.get((course_title, lesson_num)),
                 )
-                seen_sources[source_key] = source
-
-            formatted.append(f"{header}\n{doc}")
-
-        # Convert deduplicated sources to list
-        self.last_sources = list(seen_sources.values())
-
-        return "\n\n".join(formatted)
+            )
+        return "\n\n".join(formatted), sources
 
 
 class CourseOutlineTool(Tool):
@@ -202,15 +398,8 @@ class CourseOutlineTool(Tool):
             self.last_sources = []
             return f"Course not found: '{course_title}'. Please check the course name."
 
-        # Retrieve all course metadata
-        all_courses = self.store.get_all_courses_metadata()
-
-        # Find specific course
-        course_data = None
-        for course in all_courses:
-            if course.get("title") == resolved_title:
-                course_data = course
-                break
+        # Look up the resolved course's metadata
+        course_data = self.store.get_course_metadata(resolved_title)
 
         if not course_data:
             self.last_sources = []
@@ -223,7 +412,7 @@ class CourseOutlineTool(Tool):
             lesson_number=None,
             url=course_data.get("course_link"),
         )
-        self.last_sources = [source]
+        self._report_sources([source])
 
         # Format and return outline
         return self._format_outline(course_data)
@@ -236,16 +425,19 @@ class CourseOutlineTool(Tool):
         lessons = course_data.get("lessons", [])
         lesson_count = course_data.get("lesson_count", len(lessons))
 
-        # Build header
-        outline = f"Course: {title}\n"
-        outline += f"Course Link: {link}\n"
-        outline += f"Instructor: {instructor}\n"
-        outline += f"Total Lessons: {lesson_count}\n\n"
-        outline += "Lesson Outline:\n"
+        # Build header; lines are joined once at the end
+        lines = [
+            f"Course: {title}",
+            f"Course Link: {link}",
+            f"Instructor: {instructor}",
+            f"Total Lessons: {lesson_count}",
+            "",
+            "Lesson Outline:",
+        ]
 
         if not lessons:
-            outline += "  (No lesson details available)\n"
-            return outline
+            lines.append("  (No lesson details available)")
+            return "\n".join(lines) + "\n"
 
         # Format each lesson
         for lesson in lessons:
@@ -253,12 +445,90 @@ class CourseOutlineTool(Tool):
             lesson_title = lesson.get("lesson_title", "Untitled")
             lesson_link = lesson.get("lesson_link", "")
 
-            outline += f"  Lesson {lesson_num}: {lesson_title}"
+            lines.append(f"  Lesson {lesson_num}: {lesson_title}")
             if lesson_link:
-                outline += f"\n    Link: {lesson_link}"
-            outline += "\n"
+                lines.append(f"    Link: {lesson_link}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _build_argument_normalizer(
+    tool_def: Dict[str, Any],
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build the function that prepares a model's arguments for a tool.
+
+    The schema is inspected once here: nullable properties get the
+    empty-string-to-None normalization some providers need, and tools
+    without nullable properties get a pass-through.
+    """
+    properties = tool_def.get("input_schema", {}).get("properties", {})
+    nullable = tuple(
+        name
+        for name, schema in properties.items()
+        if isinstance(schema.get("type"), list) and "null" in schema["type"]
+    )
+
+    if not nullable:
+
+        def passthrough(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            return kwargs
+
+        return passthrough
+
+    def normalize_nullable(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # Some LLM providers pass "" instead of null for optional arguments
+        for name in nullable:
+            if kwargs.get(name) == "":
+                kwargs = {**kwargs, name: None}
+        return kwargs
+
+    return normalize_nullable
+
+
+def _build_dispatcher(
+    tool: Tool, tool_def: Dict[str, Any]
+) -> Callable[[Dict[str, Any]], str]:
+    """
+    Build the function that runs a model's tool call against tool.execute.
+
+    When execute() takes exactly the schema's properties, in schema order,
+    the arguments are passed positionally; any other signature, or a call
+    with unknown or missing required arguments, falls back to keyword
+    expansion so the tool reports the mismatch itself.
+    """
+    normalize = _build_argument_normalizer(tool_def)
+    properties = list(tool_def.get("input_schema", {}).get("properties", {}))
+    try:
+        parameters = list(inspect.signature(tool.execute).parameters.values())
+    except (TypeError, ValueError):
+        parameters = []
+
+    if (
+        not parameters
+        or [p.name for p in parameters] != properties
+        or any(
+            p.kind is not inspect.Parameter.POSITIONAL_OR_KEYWORD for p in parameters
+        )
+    ):
+
+        def dispatch_keywords(kwargs: Dict[str, Any]) -> str:
+            return tool.execute(**normalize(kwargs))
 
-        return outline
+        return dispatch_keywords
+
+    names = tuple(p.name for p in parameters)
+    defaults = tuple(p.default for p in parameters)
+    known = frozenset(names)
+    required = frozenset(p.name for p in parameters if p.default is p.empty)
+
+    def dispatch_positional(kwargs: Dict[str, Any]) -> str:
+        kwargs = normalize(kwargs)
+        if not known.issuperset(kwargs) or not required.issubset(kwargs):
+            return tool.execute(**kwargs)
+        return tool.execute(*[kwargs.get(name, d) for name, d in zip(names, defaults)])
+
+    return dispatch_positional
 
 
 class ToolManager:
@@ -266,6 +536,22 @@ class ToolManager:
 
     def __init__(self):
         self.tools = {}
+        # Sources reported by tools, keyed by (course_title, lesson_number).
+        # Held in a context variable so concurrent queries sharing this
+        # manager each collect their own; tool threads inherit the context
+        self._sources: ContextVar[Optional[Dict[tuple, Source]]] = ContextVar(
+            f"tool_sources_{id(self)}", default=None
+        )
+        # Definitions are static, so they are built once at registration and
+        # the same list is handed out on every request
+        self._definitions: Dict[str, Dict[str, Any]] = {}
+        self._definitions_cache: List[Dict[str, Any]] = []
+        # Per-tool argument normalizers specialized on the tool's input
+        # schema; every execution path goes through them
+        self._normalizers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        # Per-tool dispatchers for synchronous execution, built once at
+        # registration so a call does not re-expand its arguments
+        self._dispatchers: Dict[str, Callable[[Dict[str, Any]], str]] = {}
 
     def register_tool(self, tool: Tool):
         """Register any tool that implements the Tool interface"""
@@ -274,28 +560,79 @@ class ToolManager:
         if not tool_name:
             raise ValueError("Tool must have a 'name' in its definition")
         self.tools[tool_name] = tool
+        self._definitions[tool_name] = tool_def
+        self._definitions_cache = list(self._definitions.values())
+        self._normalizers[tool_name] = _build_argument_normalizer(tool_def)
+        self._dispatchers[tool_name] = _build_dispatcher(tool, tool_def)
+        if hasattr(tool, "set_sources_sink"):
+            tool.set_sources_sink(self._on_sources)
 
     def get_tool_definitions(self) -> list:
         """Get all tool definitions for Anthropic tool calling"""
-        return [tool.get_tool_definition() for tool in self.tools.values()]
+        return self._definitions_cache
 
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
         if tool_name not in self.tools:
             return f"Tool '{tool_name}' not found"
 
-        return self.tools[tool_name].execute(**kwargs)
+        return self._dispatchers[tool_name](kwargs)
+
+    async def aexecute_tool(self, tool_name: str, **kwargs) -> str:
+        """Execute a tool by name without blocking the event loop"""
+        if tool_name not in self.tools:
+            return f"Tool '{tool_name}' not found"
+
+        return await self.tools[tool_name].aexecute(
+            **self._normalizers[tool_name](kwargs)
+        )
+
+    def execute_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Execute several tool calls, dispatching calls to the same tool as one batch.
+
+        Args:
+            calls: (tool_name, kwargs) pairs, e.g. every tool call of one model turn
+
+        Returns:
+            Tool output per call, in order
+        """
+        outputs: List[Optional[str]] = [None] * len(calls)
+        grouped: Dict[str, List[int]] = {}
+        for index, (tool_name, _) in enumerate(calls):
+            if tool_name in self.tools:
+                grouped.setdefault(tool_name, []).append(index)
+            else:
+                outputs[index] = f"Tool '{tool_name}' not found"
+
+        for tool_name, indices in grouped.items():
+            normalize = self._normalizers[tool_name]
+            results = self.tools[tool_name].execute_batch(
+                [normalize(calls[index][1]) for index in indices]
+            )
+            for index, result in zip(indices, results):
+                outputs[index] = result
+        return outputs
+
+    def _on_sources(self, sources: List[Source]):
+        """Collect sources reported by a tool, skipping duplicates"""
+        collected = self._sources.get()
+        if collected is None:
+            collected = {}
+            self._sources.set(collected)
+        for source in sources:
+            collected.setdefault((source.course_title, source.lesson_number), source)
 
     def get_last_sources(self) -> List[Source]:
-        """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources") and tool.last_sources:
-                return tool.last_sources
-        return []
+        """Get sources from every tool execution since the last reset"""
+        collected = self._sources.get()
+        return list(collected.values()) if collected else []
 
     def reset_sources(self):
-        """Reset sources from all tools that track sources"""
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources"):
-                tool.last_sources = []
+        """
+        Start a new, empty source collection.
+
+        Call before running a query so tools executed in worker threads or
+        tasks report into the same collection as the caller.
+        """
+        self._sources.set({})
@@ -37,7 +37,7 @@ class TestQueryEndpoint:
         assert data["session_id"] == "test-session-123"
 
         # Verify RAG system was called correctly
-        mock_rag_system.query.assert_called_once_with("What is MCP?", "test-session-123")
+        mock_rag_system.aquery.assert_awaited_once_with("What is MCP?", "test-session-123")
 
     def test_query_with_existing_session_id(self, client, mock_rag_system):
         """Test query with existing session ID"""
@@ -58,7 +58,7 @@ class TestQueryEndpoint:
 
         # Verify session manager was NOT called to create new session
         mock_rag_system.session_manager.create_session.assert_not_called()
-        mock_rag_system.query.assert_called_once_with(
+        mock_rag_system.aquery.assert_awaited_once_with(
             "Tell me about Prompt Engineering",
             existing_session
         )
@@ -107,13 +107,17 @@ class TestQueryEndpoint:
 
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        # Empty query should still be processed
-        mock_rag_system.query.assert_called_once()
+        data = response.json()
+        assert data["answer"] == "Please enter a question about the course materials."
+        assert data["sources"] == []
+        assert data["session_id"] == "test-session-123"
+        # Empty query is answered without calling the RAG system
+        mock_rag_system.aquery.assert_not_awaited()
 
     def test_query_rag_system_error(self, client, mock_rag_system):
         """Test query when RAG system raises exception"""
         # Arrange
-        mock_rag_system.query.side_effect = Exception("Database connection failed")
+        mock_rag_system.aquery.side_effect = Exception("Database connection failed")
         request_data = {
             "query": "Test query"
         }
@@ -128,7 +132,7 @@ class TestQueryEndpoint:
     def test_query_response_structure(self, client, mock_rag_system):
         """Test that response matches QueryResponse model"""
         # Arrange
-        mock_rag_system.query.return_value = (
+        mock_rag_system.aquery.return_value = (
             "Multiple sources answer",
             [
                 Source(
@@ -168,6 +172,30 @@ class TestQueryEndpoint:
             assert "lesson_number" in source
             assert "url" in source
 
+    async def test_concurrent_queries_not_serialized(self, test_app, mock_rag_system):
+        """Test that a slow query does not block other in-flight queries"""
+        import asyncio
+        import httpx
+
+        # Each query only finishes once both are in flight
+        both_started = asyncio.Barrier(2)
+
+        async def slow_query(query, session_id):
+            await asyncio.wait_for(both_started.wait(), timeout=5)
+            return f"Answer to {query}", []
+
+        mock_rag_system.aquery.side_effect = slow_query
+
+        transport = httpx.ASGITransport(app=test_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            first, second = await asyncio.gather(
+                ac.post("/api/query", json={"query": "first"}),
+                ac.post("/api/query", json={"query": "second"}),
+            )
+
+        assert first.json()["answer"] == "Answer to first"
+        assert second.json()["answer"] == "Answer to second"
+
 
 @pytest.mark.api
 class TestCoursesEndpoint:
@@ -300,6 +328,42 @@ class TestCORSMiddleware:
         # Assert - OPTIONS request should succeed
         assert response.status_code in [status.HTTP_200_OK, status.HTTP_204_NO_CONTENT]
 
+    def test_repeated_preflight_returns_same_headers(self, client):
+        """Test that identical preflights get identical responses"""
+        headers = {
+            "Origin": "http://localhost:8000",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "Content-Type"
+        }
+
+        first = client.options("/api/query", headers=headers)
+        second = client.options("/api/query", headers=headers)
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.headers == second.headers
+        assert second.headers["access-control-allow-headers"] == "Content-Type"
+
+    def test_cached_preflight_headers_not_shared(self):
+        """Test that each preflight gets its own header list"""
+        from middleware import CachedCORSMiddleware
+        from starlette.datastructures import Headers
+
+        middleware = CachedCORSMiddleware(app=Mock(), allow_origins=["*"], allow_headers=["*"])
+        headers = Headers({
+            "origin": "http://localhost:8000",
+            "access-control-request-method": "POST",
+        })
+
+        first = middleware.preflight_response(headers)
+        first.raw_headers.append((b"x-extra", b"1"))
+        second = middleware.preflight_response(headers)
+        third = middleware.preflight_response(headers)
+
+        assert second is not third
+        assert second.raw_headers is not third.raw_headers
+        assert (b"x-extra", b"1") not in second.raw_headers
+        assert second.body == first.body
+
 
 @pytest.mark.api
 class TestErrorHandling:
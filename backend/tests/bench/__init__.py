@@ -0,0 +1,2 @@
+# backend/tests/bench/__init__.py
+# Microbenchmarks of vector store and search tool hot paths
@@ -0,0 +1,52 @@
+# backend/tests/bench/test_vector_store_bench.py
+# Microbenchmarks of VectorStore ingest and search, and CourseSearchTool.execute
+#
+# Needs pytest-benchmark. Run and save a baseline with
+#   pytest backend/tests/bench --benchmark-only --benchmark-autosave
+# and compare later runs against it with --benchmark-compare.
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from search_tools import CourseSearchTool  # noqa: E402
+
+pytestmark = pytest.mark.bench
+
+
+def test_search_latency(benchmark, temp_chroma_db):
+    results = benchmark(temp_chroma_db.search, "MCP protocol")
+    assert not results.error
+
+
+def test_filtered_search_latency(benchmark, temp_chroma_db):
+    results = benchmark(
+        temp_chroma_db.search, "MCP protocol", course_name="MCP", lesson_number=0
+    )
+    assert not results.error
+
+
+def test_resolve_course_name(benchmark, temp_chroma_db):
+    resolved = benchmark(temp_chroma_db._resolve_course_name, "MCP")
+    assert resolved == "MCP: Build Rich-Context AI Apps with Anthropic"
+
+
+def test_search_tool_execute(benchmark, temp_chroma_db):
+    # No search cache, so every round runs the full search and formatting
+    tool = CourseSearchTool(temp_chroma_db)
+    result = benchmark(tool.execute, "How do I build an MCP server?")
+    assert "[MCP: Build Rich-Context AI Apps with Anthropic" in result
+
+
+def test_ingest(benchmark, fresh_chroma_db, sample_courses, sample_chunks):
+    def reset():
+        fresh_chroma_db.clear_all_data()
+
+    def ingest():
+        for course in sample_courses:
+            fresh_chroma_db.add_course_metadata(course)
+        fresh_chroma_db.add_course_content(sample_chunks)
+
+    # Collections are emptied before every round so each one ingests from scratch
+    benchmark.pedantic(ingest, setup=reset, rounds=20, iterations=1)
+    assert fresh_chroma_db.get_course_count() == len(sample_courses)
@@ -1,45 +1,100 @@
 # backend/tests/conftest.py
 # Pytest fixtures and shared test utilities
 
+import functools
+import json
 import os
-import shutil
 import sys
-import tempfile
-from typing import Any, Dict, List
-from unittest.mock import MagicMock, Mock
+from types import SimpleNamespace
+from typing import Any, Dict
+from unittest.mock import AsyncMock, MagicMock, Mock
 
 import pytest
 
 # Add parent directory to path to import backend modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import Config
-from models import Course, CourseChunk, Lesson, Source
-from vector_store import SearchResults, VectorStore
+# Backend modules are imported inside the fixtures that need them, so
+# collecting tests that never touch chromadb doesn't pay for importing it
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def shared_embedding_functions():
+    """Hand every VectorStore in the session one embedding function per model
+
+    chromadb keeps loaded SentenceTransformer models in a class-level dict,
+    but sharing the wrapper too makes each store construction a cache lookup
+    regardless of what the installed chromadb version does. Request it from
+    any fixture or test that constructs a VectorStore. Yields the cached
+    embedding function lookup, keyed by model name.
+    """
+    from chromadb.utils import embedding_functions
+
+    original = embedding_functions.SentenceTransformerEmbeddingFunction
+
+    @functools.lru_cache(maxsize=4)
+    def get_embedding_function(model_name):
+        return original(model_name=model_name)
+
+    def factory(model_name="all-MiniLM-L6-v2", **kwargs):
+        if kwargs:
+            return original(model_name=model_name, **kwargs)
+        return get_embedding_function(model_name)
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(
+            embedding_functions, "SentenceTransformerEmbeddingFunction", factory
+        )
+        yield get_embedding_function
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_embedding_model(request):
+    """Load and run the embedding model before the first test, if any needs it
+
+    Keeps the multi-second model load out of the first store-backed test's
+    timing. Sessions that never build a VectorStore skip it entirely.
+    """
+    needs_model = any(
+        "shared_embedding_functions" in item.fixturenames
+        for item in request.session.items
+    )
+    if not needs_model:
+        return
+
+    get_embedding_function = request.getfixturevalue("shared_embedding_functions")
+    model_name = request.getfixturevalue("mock_config").EMBEDDING_MODEL
+    try:
+        get_embedding_function(model_name)(["warmup"])
+    except Exception:
+        # The tests that need the model report the failure themselves
+        return
+
+
+@pytest.fixture(scope="session")
 def mock_config():
-    """Mock configuration for testing"""
-    config = Mock(spec=Config)
-    config.DEBUG = False
-    config.LLM_PROVIDER = "groq"
-    config.GROQ_API_KEY = "test_groq_key_1234567890"
-    config.GROQ_MODEL = "llama-3.3-70b-versatile"
-    config.ANTHROPIC_API_KEY = "test_anthropic_key_1234567890"
-    config.ANTHROPIC_MODEL = "claude-sonnet-4-20250514"
-    config.EMBEDDING_MODEL = "all-MiniLM-L6-v2"
-    config.CHUNK_SIZE = 800
-    config.CHUNK_OVERLAP = 100
-    config.MAX_RESULTS = 5
-    config.MAX_HISTORY = 2
-    config.CHROMA_PATH = "./test_chroma_db"
-    return config
+    """Configuration for testing; shared by the whole session, so never mutate it"""
+    return SimpleNamespace(
+        DEBUG=False,
+        LLM_PROVIDER="groq",
+        GROQ_API_KEY="test_groq_key_1234567890",
+        GROQ_MODEL="llama-3.3-70b-versatile",
+        ANTHROPIC_API_KEY="test_anthropic_key_1234567890",
+        ANTHROPIC_MODEL="claude-sonnet-4-20250514",
+        EMBEDDING_MODEL="all-MiniLM-L6-v2",
+        CHUNK_SIZE=800,
+        CHUNK_OVERLAP=100,
+        MAX_RESULTS=5,
+        MAX_HISTORY=2,
+        CHROMA_PATH="./test_chroma_db",
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_courses():
     """Sample course data for testing"""
+    from models import Course, Lesson
+
     return [
         Course(
             title="MCP: Build Rich-Context AI Apps with Anthropic",
@@ -83,9 +138,11 @@ def sample_courses():
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_chunks():
     """Sample course chunks for testing"""
+    from models import CourseChunk
+
     return [
         CourseChunk(
             content="Course MCP: Build Rich-Context AI Apps with Anthropic Lesson 0 content: MCP stands for Model Context Protocol. It enables rich context sharing between AI applications and external data sources.",
@@ -108,112 +165,174 @@ def sample_chunks():
     ]
 
 
-@pytest.fixture
-def temp_chroma_db(mock_config, sample_courses, sample_chunks):
-    """Create a temporary ChromaDB with test data"""
-    temp_dir = tempfile.mkdtemp()
-    mock_config.CHROMA_PATH = temp_dir
+@pytest.fixture(scope="session")
+def session_chroma_db(
+    shared_embedding_functions, mock_config, sample_courses, sample_chunks
+):
+    """Create an in-memory ChromaDB with test data once per session
+
+    Embedding the sample data is the slow part of the store-backed tests, so
+    it happens only here.
+    """
+    from vector_store import VectorStore
 
     # Create vector store and populate with test data
     vector_store = VectorStore(
-        chroma_path=temp_dir,
+        chroma_path="",
         embedding_model=mock_config.EMBEDDING_MODEL,
         max_results=mock_config.MAX_RESULTS,
     )
 
     # Add sample courses and chunks
-    for course in sample_courses:
-        vector_store.add_course_metadata(course)
+    vector_store.add_courses_metadata(sample_courses)
 
     vector_store.add_course_content(sample_chunks)
 
-    yield vector_store
+    return vector_store
 
-    # Cleanup
-    shutil.rmtree(temp_dir, ignore_errors=True)
 
+@pytest.fixture(scope="session")
+def temp_chroma_db(session_chroma_db):
+    """Populated ChromaDB shared by every test; tests must not write to it"""
+    return session_chroma_db
 
-@pytest.fixture
-def mock_groq_response():
-    """Mock Groq API response without tool calls"""
-    mock_response = Mock()
-    mock_response.choices = [Mock()]
-    mock_response.choices[0].message = Mock()
-    mock_response.choices[0].message.content = "This is a test response from Groq."
-    mock_response.choices[0].message.tool_calls = None
-    mock_response.choices[0].finish_reason = "stop"
-    return mock_response
+
+@pytest.fixture(scope="session")
+def empty_vector_store(shared_embedding_functions, mock_config):
+    """In-memory VectorStore with no courses, shared by empty-catalog tests"""
+    from vector_store import VectorStore
+
+    return VectorStore(
+        chroma_path="",
+        embedding_model=mock_config.EMBEDDING_MODEL,
+        max_results=mock_config.MAX_RESULTS,
+    )
 
 
 @pytest.fixture
-def mock_groq_tool_call_response():
-    """Mock Groq API response with tool call"""
-    import json
-
-    mock_response = Mock()
-    mock_response.choices = [Mock()]
-    mock_response.choices[0].message = Mock()
-    mock_response.choices[0].message.content = ""
-
-    # Mock tool call
-    mock_tool_call = Mock()
-    mock_tool_call.id = "call_123"
-    mock_tool_call.function = Mock()
-    mock_tool_call.function.name = "search_course_content"
-    mock_tool_call.function.arguments = json.dumps(
-        {"query": "MCP", "course_name": None, "lesson_number": None}
+def fresh_chroma_db(shared_embedding_functions, mock_config, session_chroma_db):
+    """Private in-memory copy of the populated ChromaDB for tests that write to it"""
+    from vector_store import VectorStore
+
+    vector_store = VectorStore(
+        chroma_path="",
+        embedding_model=mock_config.EMBEDDING_MODEL,
+        max_results=mock_config.MAX_RESULTS,
     )
 
-    mock_response.choices[0].message.tool_calls = [mock_tool_call]
-    mock_response.choices[0].finish_reason = "tool_calls"
-    return mock_response
+    # Records are copied with their stored embeddings, which is far cheaper
+    # than embedding the sample data again, and read through the session
+    # store's client so the copy is always consistent
+    for name in ("course_catalog", "course_content"):
+        records = getattr(session_chroma_db, name).get(
+            include=["documents", "metadatas", "embeddings"]
+        )
+        if records["ids"]:
+            getattr(vector_store, name).add(
+                ids=records["ids"],
+                documents=records["documents"],
+                metadatas=records["metadatas"],
+                embeddings=records["embeddings"],
+            )
+
+    return vector_store
+
+
+@functools.lru_cache(maxsize=64)
+def tool_call_args_json(**arguments) -> str:
+    """Tool call argument string in Groq's JSON form, serialized once per input"""
+    return json.dumps(arguments)
+
+
+# Provider responses are plain data, so they are built once at import time and
+# shared by every test; tests must not mutate them
+GROQ_RESPONSE = SimpleNamespace(
+    choices=[
+        SimpleNamespace(
+            message=SimpleNamespace(
+                content="This is a test response from Groq.", tool_calls=None
+            ),
+            finish_reason="stop",
+        )
+    ]
+)
+
+GROQ_TOOL_CALL_RESPONSE = SimpleNamespace(
+    choices=[
+        SimpleNamespace(
+            message=SimpleNamespace(
+                content="",
+                tool_calls=[
+                    SimpleNamespace(
+                        id="call_123",
+                        function=SimpleNamespace(
+                            name="search_course_content",
+                            arguments=tool_call_args_json(
+                                query="MCP", course_name=None, lesson_number=None
+                            ),
+                        ),
+                    )
+                ],
+            ),
+            finish_reason="tool_calls",
+        )
+    ]
+)
+
+ANTHROPIC_RESPONSE = SimpleNamespace(
+    content=[
+        SimpleNamespace(type="text", text="This is a test response from Claude.")
+    ],
+    stop_reason="end_turn",
+)
+
+ANTHROPIC_TOOL_CALL_RESPONSE = SimpleNamespace(
+    content=[
+        SimpleNamespace(
+            type="tool_use",
+            id="toolu_123",
+            name="search_course_content",
+            input={"query": "MCP", "course_name": None, "lesson_number": None},
+        )
+    ],
+    stop_reason="tool_use",
+)
 
 
 @pytest.fixture
-def mock_anthropic_response():
-    """Mock Anthropic API response without tool calls"""
-    mock_response = Mock()
+def mock_groq_response():
+    """Groq API response without tool calls"""
+    return GROQ_RESPONSE
 
-    # Mock text block
-    mock_text_block = Mock()
-    mock_text_block.type = "text"
-    mock_text_block.text = "This is a test response from Claude."
 
-    mock_response.content = [mock_text_block]
-    mock_response.stop_reason = "end_turn"
-    return mock_response
+@pytest.fixture
+def mock_groq_tool_call_response():
+    """Groq API response with tool call"""
+    return GROQ_TOOL_CALL_RESPONSE
 
 
 @pytest.fixture
-def mock_anthropic_tool_call_response():
-    """Mock Anthropic API response with tool call"""
-    mock_response = Mock()
+def mock_anthropic_response():
+    """Anthropic API response without tool calls"""
+    return ANTHROPIC_RESPONSE
 
-    # Mock tool use block
-    mock_tool_block = Mock()
-    mock_tool_block.type = "tool_use"
-    mock_tool_block.id = "toolu_123"
-    mock_tool_block.name = "search_course_content"
-    mock_tool_block.input = {"query": "MCP", "course_name": None, "lesson_number": None}
 
-    mock_response.content = [mock_tool_block]
-    mock_response.stop_reason = "tool_use"
-    return mock_response
+@pytest.fixture
+def mock_anthropic_tool_call_response():
+    """Anthropic API response with tool call"""
+    return ANTHROPIC_TOOL_CALL_RESPONSE
 
 
 # ============================================================================
 # FastAPI Testing Fixtures
 # ============================================================================
 
-@pytest.fixture
-def mock_rag_system(sample_courses):
-    """Mock RAG system for API testing"""
-    from rag_system import RAGSystem
-
-    mock_rag = Mock(spec=RAGSystem)
+def configure_mock_rag_system(mock_rag, sample_courses):
+    """Install the default behaviour of the mock RAG system"""
+    from models import Source
 
     # Mock query method
-    mock_rag.query = Mock(return_value=(
+    mock_rag.aquery = AsyncMock(return_value=(
         "This is a test answer about MCP.",
         [
             Source(
@@ -235,24 +354,51 @@ def mock_rag_system(sample_courses):
     mock_rag.session_manager = Mock()
     mock_rag.session_manager.create_session = Mock(return_value="test-session-123")
 
-    return mock_rag
 
+def get_rag_system():
+    """Dependency the test app resolves its RAG system through"""
+    raise RuntimeError("mock_rag_system overrides this dependency")
 
-@pytest.fixture
-def test_app(mock_rag_system):
+
+@pytest.fixture(scope="session")
+def mock_rag_system(test_app, sample_courses):
+    """Mock RAG system for API testing, installed into the shared test app"""
+    from rag_system import RAGSystem
+
+    mock_rag = Mock(spec=RAGSystem)
+    configure_mock_rag_system(mock_rag, sample_courses)
+    test_app.dependency_overrides[get_rag_system] = lambda: mock_rag
+    yield mock_rag
+    test_app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_mock_rag_system(request):
+    """Give each test using the shared mock RAG system a fresh copy of its defaults"""
+    if "mock_rag_system" not in request.fixturenames:
+        return
+    mock_rag = request.getfixturevalue("mock_rag_system")
+    mock_rag.reset_mock()
+    configure_mock_rag_system(mock_rag, request.getfixturevalue("sample_courses"))
+
+
+@pytest.fixture(scope="session")
+def test_app():
     """Create a test FastAPI app without static file mounting"""
-    from fastapi import FastAPI, HTTPException
-    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi import Depends, FastAPI, HTTPException
+    from middleware import CachedCORSMiddleware
     from pydantic import BaseModel
     from typing import List, Optional
     from models import Source
 
+    EMPTY_QUERY_ANSWER = "Please enter a question about the course materials."
+
     # Create test app without static files
     app = FastAPI(title="Course Materials RAG System - Test", root_path="")
 
     # Add CORS middleware
     app.add_middleware(
-        CORSMiddleware,
+        CachedCORSMiddleware,
         allow_origins=["*"],
         allow_credentials=True,
         allow_methods=["*"],
@@ -275,13 +421,22 @@ def test_app(mock_rag_system):
 
     # Define endpoints inline (same logic as backend/app.py)
     @app.post("/api/query", response_model=QueryResponse)
-    async def query_documents(request: QueryRequest):
+    async def query_documents(
+        request: QueryRequest, rag_system=Depends(get_rag_system)
+    ):
         try:
             session_id = request.session_id
             if not session_id:
-                session_id = mock_rag_system.session_manager.create_session()
+                session_id = rag_system.session_manager.create_session()
 
-            answer, sources = mock_rag_system.query(request.query, session_id)
+            if not request.query.strip():
+                return QueryResponse(
+                    answer=EMPTY_QUERY_ANSWER,
+                    sources=[],
+                    session_id=session_id
+                )
+
+            answer, sources = await rag_system.aquery(request.query, session_id)
 
             return QueryResponse(
                 answer=answer,
@@ -292,9 +447,9 @@ def test_app(mock_rag_system):
             raise HTTPException(status_code=500, detail=str(e))
 
     @app.get("/api/courses", response_model=CourseStats)
-    async def get_course_stats():
+    async def get_course_stats(rag_system=Depends(get_rag_system)):
         try:
-            analytics = mock_rag_system.get_course_analytics()
+            analytics = rag_system.get_course_analytics()
             return CourseStats(
                 total_courses=analytics["total_courses"],
                 course_titles=analytics["course_titles"]
@@ -309,8 +464,177 @@ def test_app(mock_rag_system):
     return app
 
 
-@pytest.fixture
-def client(test_app):
-    """Create a test client for the FastAPI app"""
+@pytest.fixture(scope="session")
+def client(test_app, mock_rag_system):
+    """Create a test client for the FastAPI app backed by the mock RAG system
+
+    Entered once for the session, so the app's lifespan runs a single time and
+    every API test reuses the same client and event loop portal.
+    """
     from fastapi.testclient import TestClient
-    return TestClient(test_app)
+
+    with TestClient(test_app, raise_server_exceptions=True) as client:
+        yield client
+
+
+# ============================================================================
+# LLM Replay Cache for Integration Tests
+# ============================================================================
+
+LLM_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixtures", "llm_cache", "responses.json"
+)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--use-llm-cache",
+        action="store_true",
+        help="Replay recorded LLM answers in integration tests; a missing recording fails the test",
+    )
+    parser.addoption(
+        "--record-llm-cache",
+        action="store_true",
+        help="Like --use-llm-cache, but answer missing recordings with the live provider and save them",
+    )
+
+
+class LLMReplayCache:
+    """
+    Recorded integration-test answers, replayed for identical requests.
+
+    Entries match on namespace, model, conversation history and query text
+    exactly: integration queries differing only in a course or lesson name are
+    close in embedding space, so similarity matching could replay the wrong
+    answer.
+    """
+
+    def __init__(self, path: str, record: bool = False):
+        """
+        Args:
+            path: JSON file of recorded answers
+            record: Answer missing recordings with the live provider and keep
+                them; otherwise a missing recording fails the test
+        """
+        self.path = path
+        self.record = record
+        self._entries: Dict[tuple, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for entry in json.load(f):
+                    self._entries[self._key(**entry)] = entry
+        self._dirty = False
+
+    @staticmethod
+    def _key(namespace, model, history, query, **_):
+        return namespace, model, history, query
+
+    def install(self, rag, namespace: str = ""):
+        """
+        Route the RAG system's answer generation through the cache.
+
+        Args:
+            rag: RAG system whose AIGenerator is wrapped
+            namespace: Label for the RAG system's corpus; answers recorded
+                against one corpus are never replayed for another
+        """
+        from dataclasses import asdict
+
+        from models import Source
+
+        generator = rag.ai_generator
+        model = getattr(generator.provider, "model", "")
+        generate = generator.generate_response
+        agenerate = generator.agenerate_response
+
+        def lookup(query, conversation_history):
+            key = self._key(namespace, model, conversation_history, query)
+            entry = self._entries.get(key)
+            if entry is None and not self.record:
+                pytest.fail(
+                    f"No recorded LLM answer for {query!r} in {namespace!r}; "
+                    "re-run with --record-llm-cache to record it",
+                    pytrace=False,
+                )
+            return key, entry
+
+        def replay(entry, tool_manager):
+            if tool_manager is not None:
+                tool_manager._on_sources([Source(**s) for s in entry["sources"]])
+            return entry["answer"]
+
+        def record(key, answer, tool_manager):
+            sources = tool_manager.get_last_sources() if tool_manager else []
+            namespace, model, history, query = key
+            self._entries[key] = {
+                "namespace": namespace,
+                "model": model,
+                "history": history,
+                "query": query,
+                "answer": answer,
+                "sources": [asdict(source) for source in sources],
+            }
+            self._dirty = True
+
+        def generate_response(
+            query, conversation_history=None, tool_manager=None, **kwargs
+        ):
+            key, entry = lookup(query, conversation_history)
+            if entry is not None:
+                return replay(entry, tool_manager)
+            answer = generate(
+                query,
+                conversation_history=conversation_history,
+                tool_manager=tool_manager,
+                **kwargs,
+            )
+            record(key, answer, tool_manager)
+            return answer
+
+        async def agenerate_response(
+            query, conversation_history=None, tool_manager=None, **kwargs
+        ):
+            key, entry = lookup(query, conversation_history)
+            if entry is not None:
+                return replay(entry, tool_manager)
+            answer = await agenerate(
+                query,
+                conversation_history=conversation_history,
+                tool_manager=tool_manager,
+                **kwargs,
+            )
+            record(key, answer, tool_manager)
+            return answer
+
+        generator.generate_response = generate_response
+        generator.agenerate_response = agenerate_response
+
+    def save(self):
+        """Write newly recorded entries back to the cache file"""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(list(self._entries.values()), f, indent=2)
+        self._dirty = False
+
+
+@pytest.fixture(scope="session")
+def llm_response_cache(request):
+    """
+    Replay cache for integration answers.
+
+    With neither --use-llm-cache nor --record-llm-cache this is None and the
+    integration tests call the live provider directly. With either flag,
+    answers are replayed from LLM_CACHE_PATH; --record-llm-cache also answers
+    missing recordings live and saves them, while --use-llm-cache alone fails
+    the test.
+    """
+    record = request.config.getoption("--record-llm-cache")
+    if not (record or request.config.getoption("--use-llm-cache")):
+        yield None
+        return
+
+    cache = LLMReplayCache(LLM_CACHE_PATH, record=record)
+    yield cache
+    cache.save()
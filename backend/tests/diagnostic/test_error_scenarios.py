@@ -1,8 +1,8 @@
 # backend/tests/diagnostic/test_error_scenarios.py
 # Diagnostic tests for "not found" and "query failed" errors
 
-import shutil
-import tempfile
+import json
+from types import SimpleNamespace
 from unittest.mock import Mock, patch
 
 import pytest
@@ -13,33 +13,22 @@ from vector_store import VectorStore
 class TestNotFoundErrors:
     """Diagnostic tests for 'not found' errors"""
 
-    def test_course_not_found_empty_catalog(self, mock_config):
+    def test_course_not_found_empty_catalog(self, empty_vector_store):
         """Test course resolution when catalog is empty"""
-        temp_dir = tempfile.mkdtemp()
-        try:
-            empty_store = VectorStore(
-                chroma_path=temp_dir,
-                embedding_model=mock_config.EMBEDDING_MODEL,
-                max_results=5,
-            )
-
-            # Try to resolve course in empty catalog
-            resolved = empty_store._resolve_course_name("MCP")
-
-            assert resolved is None, "Expected None for empty catalog"
+        # Try to resolve course in empty catalog
+        resolved = empty_vector_store._resolve_course_name("MCP")
 
-            # Try to search with course filter
-            results = empty_store.search(query="anything", course_name="MCP")
+        assert resolved is None, "Expected None for empty catalog"
 
-            assert results.error is not None, "Expected error for non-existent course"
-            assert (
-                "No course found" in results.error
-            ), f"Expected 'No course found' in error, got: {results.error}"
+        # Try to search with course filter
+        results = empty_vector_store.search(query="anything", course_name="MCP")
 
-            print(f"\n✓ Empty catalog error message: {results.error}")
+        assert results.error is not None, "Expected error for non-existent course"
+        assert (
+            "No course found" in results.error
+        ), f"Expected 'No course found' in error, got: {results.error}"
 
-        finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        print(f"\n✓ Empty catalog error message: {results.error}")
 
     def test_course_not_found_via_search_tool(self, temp_chroma_db):
         """CRITICAL: End-to-end 'not found' error via CourseSearchTool"""
@@ -73,27 +62,79 @@ class TestNotFoundErrors:
         print(f"\n✓ Empty results message: {result}")
 
 
-class TestQueryFailedErrors:
-    """Diagnostic tests for 'query failed' errors"""
+@pytest.fixture
+def vector_store_with_broken_chroma(request, shared_embedding_functions, mock_config):
+    """VectorStore whose ChromaDB queries raise; parametrize with the exception"""
+    error = getattr(request, "param", Exception("ChromaDB connection error"))
 
-    @patch("vector_store.chromadb.PersistentClient")
-    def test_chromadb_exception_handling(self, mock_chroma_client, mock_config):
-        """Test how VectorStore handles ChromaDB exceptions"""
-        # Mock ChromaDB to raise exception during search
-        mock_collection = Mock()
-        mock_collection.query.side_effect = Exception("ChromaDB connection error")
+    mock_collection = Mock()
+    mock_collection.query.side_effect = error
 
-        mock_client_instance = Mock()
+    with patch("vector_store.chromadb.PersistentClient") as mock_chroma_client:
+        mock_client_instance = mock_chroma_client.return_value
         mock_client_instance.get_or_create_collection.return_value = mock_collection
-        mock_chroma_client.return_value = mock_client_instance
 
-        store = VectorStore(
+        yield VectorStore(
             chroma_path=mock_config.CHROMA_PATH,
             embedding_model=mock_config.EMBEDDING_MODEL,
             max_results=5,
         )
 
-        results = store.search(query="test")
+
+@pytest.fixture
+def groq_provider_with_mock(request, mock_config):
+    """
+    GroqProvider over a mocked Groq client, as (provider, mock_client).
+
+    Parametrize indirectly with keyword arguments for the mocked
+    chat.completions.create, e.g. {"side_effect": TimeoutError()}.
+    """
+    from llm_providers import GroqProvider
+
+    with patch("llm_providers.Groq") as mock_groq_class:
+        mock_client = mock_groq_class.return_value
+        mock_client.chat.completions.create.configure_mock(
+            **getattr(request, "param", {})
+        )
+
+        provider = GroqProvider(
+            api_key=mock_config.GROQ_API_KEY, model=mock_config.GROQ_MODEL
+        )
+        yield provider, mock_client
+
+
+# Tool call response whose arguments are not valid JSON
+MALFORMED_TOOL_CALL_RESPONSE = SimpleNamespace(
+    choices=[
+        SimpleNamespace(
+            finish_reason="tool_calls",
+            message=SimpleNamespace(
+                content="",
+                tool_calls=[
+                    SimpleNamespace(
+                        id="call_123",
+                        function=SimpleNamespace(
+                            name="search_course_content", arguments='{"query": '
+                        ),
+                    )
+                ],
+            ),
+        )
+    ]
+)
+
+
+class TestQueryFailedErrors:
+    """Diagnostic tests for 'query failed' errors"""
+
+    @pytest.mark.parametrize(
+        "vector_store_with_broken_chroma",
+        [Exception("ChromaDB connection error"), TimeoutError("Query timed out")],
+        indirect=True,
+    )
+    def test_chromadb_exception_handling(self, vector_store_with_broken_chroma):
+        """Test how VectorStore handles ChromaDB exceptions"""
+        results = vector_store_with_broken_chroma.search(query="test")
 
         # Should return SearchResults with error, not raise exception
         assert results.error is not None, "Expected error in results"
@@ -104,21 +145,19 @@ class TestQueryFailedErrors:
 
         print(f"\n✓ ChromaDB exception handled: {results.error}")
 
-    @patch("llm_providers.Groq")
-    def test_provider_api_error_propagation(self, mock_groq_class, mock_config):
+    @pytest.mark.parametrize(
+        "groq_provider_with_mock, expected_error",
+        [
+            ({"side_effect": Exception("API rate limit exceeded")}, "rate limit"),
+            ({"side_effect": TimeoutError("Request timed out")}, "timed out"),
+        ],
+        indirect=["groq_provider_with_mock"],
+    )
+    def test_provider_api_error_propagation(
+        self, groq_provider_with_mock, expected_error
+    ):
         """Test how provider errors propagate through system"""
-        from llm_providers import GroqProvider
-
-        # Mock Groq client to raise API error
-        mock_client = Mock()
-        mock_client.chat.completions.create.side_effect = Exception(
-            "API rate limit exceeded"
-        )
-        mock_groq_class.return_value = mock_client
-
-        provider = GroqProvider(
-            api_key=mock_config.GROQ_API_KEY, model=mock_config.GROQ_MODEL
-        )
+        provider, _ = groq_provider_with_mock
 
         # Should raise exception (not caught at provider level)
         with pytest.raises(Exception) as exc_info:
@@ -129,8 +168,8 @@ class TestQueryFailedErrors:
             )
 
         assert (
-            "rate limit" in str(exc_info.value).lower()
-        ), f"Expected 'rate limit' in error, got: {exc_info.value}"
+            expected_error in str(exc_info.value).lower()
+        ), f"Expected '{expected_error}' in error, got: {exc_info.value}"
 
         print(f"\n✓ API error propagated: {exc_info.value}")
 
@@ -138,37 +177,12 @@ class TestQueryFailedErrors:
 class TestToolCallParsing:
     """Test tool call format parsing between providers"""
 
-    @patch("llm_providers.Groq")
-    def test_groq_tool_call_parsing(self, mock_groq_class, mock_config):
+    def test_groq_tool_call_parsing(
+        self, groq_provider_with_mock, mock_groq_tool_call_response
+    ):
         """Test Groq tool call JSON parsing"""
-        import json
-
-        from llm_providers import GroqProvider
-
-        mock_client = Mock()
-
-        # Create mock response with tool call
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].finish_reason = "tool_calls"
-        mock_response.choices[0].message = Mock()
-        mock_response.choices[0].message.content = ""
-
-        mock_tool_call = Mock()
-        mock_tool_call.id = "call_123"
-        mock_tool_call.function = Mock()
-        mock_tool_call.function.name = "search_course_content"
-        mock_tool_call.function.arguments = json.dumps(
-            {"query": "MCP", "course_name": None, "lesson_number": None}
-        )
-
-        mock_response.choices[0].message.tool_calls = [mock_tool_call]
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_groq_class.return_value = mock_client
-
-        provider = GroqProvider(
-            api_key=mock_config.GROQ_API_KEY, model=mock_config.GROQ_MODEL
-        )
+        provider, mock_client = groq_provider_with_mock
+        mock_client.chat.completions.create.return_value = mock_groq_tool_call_response
 
         response = provider.generate_response(
             messages=[{"role": "user", "content": "What is MCP?"}],
@@ -186,8 +200,25 @@ class TestToolCallParsing:
         assert (
             len(response.tool_calls) == 1
         ), f"Expected 1 tool call, got {len(response.tool_calls)}"
-        assert response.tool_calls[0]["name"] == "search_course_content"
-        assert response.tool_calls[0]["input"]["query"] == "MCP"
-        assert response.tool_calls[0]["input"]["course_name"] is None
+        assert response.tool_calls[0].name == "search_course_content"
+        assert response.tool_calls[0].input["query"] == "MCP"
+        assert response.tool_calls[0].input["course_name"] is None
 
         print(f"\n✓ Groq tool call parsed correctly: {response.tool_calls[0]}")
+
+    @pytest.mark.parametrize(
+        "groq_provider_with_mock",
+        [{"return_value": MALFORMED_TOOL_CALL_RESPONSE}],
+        indirect=True,
+    )
+    def test_groq_malformed_tool_arguments(self, groq_provider_with_mock):
+        """Test that truncated tool arguments fail as a JSON decode error"""
+        provider, _ = groq_provider_with_mock
+
+        # Empty arguments parse to no input; malformed ones must not
+        with pytest.raises(json.JSONDecodeError):
+            provider.generate_response(
+                messages=[{"role": "user", "content": "What is MCP?"}],
+                system_prompt="test",
+                tools=None,
+            )
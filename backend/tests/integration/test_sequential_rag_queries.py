@@ -1,134 +1,208 @@
 # backend/tests/integration/test_sequential_rag_queries.py
 # Integration tests for sequential tool calling in RAG system
 
-import shutil
-import tempfile
+import asyncio
+import re
 
 import pytest
 from config import Config
+from models import Course, CourseChunk, Lesson
 from rag_system import RAGSystem
 
+# Source text patterns; one pass over each text checks every alternative
+MCP_RE = re.compile(r"MCP|Model Context Protocol")
+# "Introduction to Prompt Engineering" contains this too
+PE_RE = re.compile(r"Prompt Engineering")
+
+# Test course data, built once at import time
+
+# Course 1: MCP
+MCP_COURSE = Course(
+    title="MCP: Build Rich-Context AI Apps with Anthropic",
+    instructor="Anthropic Team",
+    course_link="https://example.com/mcp",
+    lessons=[
+        Lesson(
+            lesson_number=0,
+            title="Introduction to MCP",
+            lesson_link="https://example.com/mcp/lesson0",
+        ),
+        Lesson(
+            lesson_number=1,
+            title="Building Context Servers",
+            lesson_link="https://example.com/mcp/lesson1",
+        ),
+    ],
+)
+
+# Course 2: Prompt Engineering
+PE_COURSE = Course(
+    title="Introduction to Prompt Engineering",
+    instructor="AI Educator",
+    course_link="https://example.com/prompt-eng",
+    lessons=[
+        Lesson(
+            lesson_number=0,
+            title="Prompt Engineering Basics",
+            lesson_link="https://example.com/pe/lesson0",
+        ),
+        Lesson(
+            lesson_number=1,
+            title="Advanced Prompting Techniques",
+            lesson_link="https://example.com/pe/lesson1",
+        ),
+    ],
+)
+
+MCP_CHUNKS = [
+    CourseChunk(
+        course_title=MCP_COURSE.title,
+        lesson_number=0,
+        chunk_index=0,
+        content="Course MCP: Build Rich-Context AI Apps with Anthropic Lesson 0 content: The Model Context Protocol (MCP) enables AI applications to access rich contextual information from various data sources. MCP servers act as bridges between AI models and data.",
+    ),
+    CourseChunk(
+        course_title=MCP_COURSE.title,
+        lesson_number=1,
+        chunk_index=1,
+        content="Course MCP: Build Rich-Context AI Apps with Anthropic Lesson 1 content: Building context servers involves implementing the MCP protocol to expose data sources. Servers can provide file system access, database queries, and API integrations.",
+    ),
+]
+
+PE_CHUNKS = [
+    CourseChunk(
+        course_title=PE_COURSE.title,
+        lesson_number=0,
+        chunk_index=0,
+        content="Course Introduction to Prompt Engineering Lesson 0 content: Prompt engineering is the art of crafting effective prompts to guide AI models toward desired outputs. Key techniques include few-shot learning and chain-of-thought prompting.",
+    ),
+    CourseChunk(
+        course_title=PE_COURSE.title,
+        lesson_number=1,
+        chunk_index=1,
+        content="Course Introduction to Prompt Engineering Lesson 1 content: Advanced prompting techniques include role-based prompting, structured output formats, and iterative refinement. These methods improve accuracy and consistency.",
+    ),
+]
+
+
+def build_rag_system(courses, chunks, llm_response_cache, name):
+    """
+    Create a RAG system over the given courses, shared by the whole session.
+
+    Every test queries under its own session_id, so sharing the store and
+    generator doesn't leak conversation history between tests.
+    """
+    # Initialize RAG system with test configuration; the store is in memory
+    # and the embedding cache disabled, so nothing is written to disk
+    rag = RAGSystem(Config(CHROMA_PATH="", EMBEDDING_CACHE_PATH=""))
+
+    # Add course metadata and content
+    rag.vector_store.add_courses_metadata(courses)
+    rag.vector_store.add_course_content(chunks)
+
+    # With --use-llm-cache, recorded answers replace provider calls
+    if llm_response_cache is not None:
+        llm_response_cache.install(rag, namespace=name)
+
+    return rag
+
+
+@pytest.fixture(scope="session")
+def rag_with_mcp_only(shared_embedding_functions, llm_response_cache):
+    """RAG system holding only the MCP course, for single-course tests"""
+    return build_rag_system(
+        [MCP_COURSE],
+        MCP_CHUNKS,
+        llm_response_cache,
+        "mcp_only",
+    )
 
-@pytest.fixture
-def rag_system_with_test_data():
-    """Create RAG system with test course data"""
-    temp_dir = tempfile.mkdtemp()
-
-    try:
-        # Initialize RAG system with test configuration
-        rag = RAGSystem(
-            chroma_path=temp_dir,
-            embedding_model=Config.EMBEDDING_MODEL,
-            llm_provider=Config.LLM_PROVIDER,
-            api_key=(
-                Config.GROQ_API_KEY
-                if Config.LLM_PROVIDER == "groq"
-                else Config.ANTHROPIC_API_KEY
-            ),
-            model=(
-                Config.GROQ_MODEL
-                if Config.LLM_PROVIDER == "groq"
-                else Config.ANTHROPIC_MODEL
-            ),
-        )
 
-        # Add test courses
-        from models import Course, CourseChunk, Lesson
-
-        # Course 1: MCP
-        mcp_course = Course(
-            title="MCP: Build Rich-Context AI Apps with Anthropic",
-            instructor="Anthropic Team",
-            course_link="https://example.com/mcp",
-            lessons=[
-                Lesson(
-                    lesson_number=0,
-                    title="Introduction to MCP",
-                    lesson_link="https://example.com/mcp/lesson0",
-                ),
-                Lesson(
-                    lesson_number=1,
-                    title="Building Context Servers",
-                    lesson_link="https://example.com/mcp/lesson1",
-                ),
-            ],
-        )
+@pytest.fixture(scope="session")
+def rag_with_both_courses(shared_embedding_functions, llm_response_cache):
+    """RAG system holding the MCP and Prompt Engineering courses"""
+    return build_rag_system(
+        [MCP_COURSE, PE_COURSE],
+        MCP_CHUNKS + PE_CHUNKS,
+        llm_response_cache,
+        "both_courses",
+    )
 
-        # Course 2: Prompt Engineering
-        pe_course = Course(
-            title="Introduction to Prompt Engineering",
-            instructor="AI Educator",
-            course_link="https://example.com/prompt-eng",
-            lessons=[
-                Lesson(
-                    lesson_number=0,
-                    title="Prompt Engineering Basics",
-                    lesson_link="https://example.com/pe/lesson0",
-                ),
-                Lesson(
-                    lesson_number=1,
-                    title="Advanced Prompting Techniques",
-                    lesson_link="https://example.com/pe/lesson1",
-                ),
-            ],
-        )
 
-        # Add course metadata
-        rag.vector_store.add_course_metadata(mcp_course)
-        rag.vector_store.add_course_metadata(pe_course)
-
-        # Add course content
-        mcp_chunks = [
-            CourseChunk(
-                course_title=mcp_course.title,
-                lesson_number=0,
-                chunk_index=0,
-                content="Course MCP: Build Rich-Context AI Apps with Anthropic Lesson 0 content: The Model Context Protocol (MCP) enables AI applications to access rich contextual information from various data sources. MCP servers act as bridges between AI models and data.",
+# Single-turn queries checked by the tests below, keyed by check: (RAG system,
+# query, session id). They share no session, so they are sent concurrently
+INDEPENDENT_QUERIES = {
+    "comparison": (
+        "both_courses",
+        "Compare the MCP course and the Prompt Engineering course",
+        "test_session",
+    ),
+    "single_search": (
+        "mcp_only",
+        "What is covered in the MCP course?",
+        "test_session_2",
+    ),
+    "outline_then_search": (
+        "both_courses",
+        "What topics are covered in both the MCP and Prompt Engineering courses?",
+        "test_session_3",
+    ),
+    "general_knowledge": (
+        "mcp_only",
+        "What is artificial intelligence?",
+        "test_session_4",
+    ),
+    "lesson_query": (
+        "mcp_only",
+        "What is covered in lesson 1 of the MCP course?",
+        "test_session_6",
+    ),
+    "missing_course": (
+        "mcp_only",
+        "Compare the NonExistentCourse and MCP courses",
+        "test_session_7",
+    ),
+}
+
+
+@pytest.fixture(scope="session")
+def independent_results(rag_with_mcp_only, rag_with_both_courses):
+    """
+    Answers to INDEPENDENT_QUERIES, requested together in one gather.
+
+    The provider round trips overlap, so the checks cost about as much as the
+    slowest query. A failed query is stored as its exception and re-raised by
+    the test that checks it.
+    """
+    rags = {"mcp_only": rag_with_mcp_only, "both_courses": rag_with_both_courses}
+
+    async def run_all():
+        return await asyncio.gather(
+            *(
+                rags[name].aquery(query, session_id=session_id)
+                for name, query, session_id in INDEPENDENT_QUERIES.values()
             ),
-            CourseChunk(
-                course_title=mcp_course.title,
-                lesson_number=1,
-                chunk_index=1,
-                content="Course MCP: Build Rich-Context AI Apps with Anthropic Lesson 1 content: Building context servers involves implementing the MCP protocol to expose data sources. Servers can provide file system access, database queries, and API integrations.",
-            ),
-        ]
-
-        pe_chunks = [
-            CourseChunk(
-                course_title=pe_course.title,
-                lesson_number=0,
-                chunk_index=0,
-                content="Course Introduction to Prompt Engineering Lesson 0 content: Prompt engineering is the art of crafting effective prompts to guide AI models toward desired outputs. Key techniques include few-shot learning and chain-of-thought prompting.",
-            ),
-            CourseChunk(
-                course_title=pe_course.title,
-                lesson_number=1,
-                chunk_index=1,
-                content="Course Introduction to Prompt Engineering Lesson 1 content: Advanced prompting techniques include role-based prompting, structured output formats, and iterative refinement. These methods improve accuracy and consistency.",
-            ),
-        ]
+            return_exceptions=True,
+        )
 
-        rag.vector_store.add_course_content(mcp_chunks + pe_chunks)
+    return dict(zip(INDEPENDENT_QUERIES, asyncio.run(run_all())))
 
-        yield rag
 
-    finally:
-        # Cleanup
-        shutil.rmtree(temp_dir, ignore_errors=True)
+def independent_result(independent_results, check):
+    """(response, sources) of one independent query, raising its failure"""
+    result = independent_results[check]
+    if isinstance(result, BaseException):
+        raise result
+    return result
 
 
 class TestSequentialRagQueries:
     """Integration tests for sequential tool calling in real RAG queries"""
 
     @pytest.mark.integration
-    def test_comparison_query_uses_two_searches(self, rag_system_with_test_data):
+    def test_comparison_query_uses_two_searches(self, independent_results):
         """Test that comparison queries can use sequential searches"""
-        rag = rag_system_with_test_data
-
-        # Query that should trigger two searches
-        query = "Compare the MCP course and the Prompt Engineering course"
-
-        response, sources = rag.query(query, session_id="test_session")
+        response, sources = independent_result(independent_results, "comparison")
 
         # Verify response is not empty
         assert len(response) > 0
@@ -139,29 +213,19 @@ class TestSequentialRagQueries:
         source_texts = [s.display_text for s in sources]
 
         # At least one source should mention MCP or be from that course
-        mcp_mentioned = any(
-            "MCP" in text or "Model Context Protocol" in text for text in source_texts
-        )
+        mcp_mentioned = any(MCP_RE.search(text) for text in source_texts)
 
         # At least one source should be from Prompt Engineering
-        pe_mentioned = any(
-            "Prompt Engineering" in text or "Introduction to Prompt Engineering" in text
-            for text in source_texts
-        )
+        pe_mentioned = any(PE_RE.search(text) for text in source_texts)
 
         # With sequential tool calling, both should be present
         # (May not always trigger depending on LLM behavior, so we test conservatively)
         assert len(sources) > 0, "Should have at least some sources"
 
     @pytest.mark.integration
-    def test_single_search_still_works(self, rag_system_with_test_data):
+    def test_single_search_still_works(self, independent_results):
         """Test that single-search queries work correctly (backward compatibility)"""
-        rag = rag_system_with_test_data
-
-        # Simple query that should only need one search
-        query = "What is covered in the MCP course?"
-
-        response, sources = rag.query(query, session_id="test_session_2")
+        response, sources = independent_result(independent_results, "single_search")
 
         # Verify response exists
         assert len(response) > 0
@@ -172,23 +236,16 @@ class TestSequentialRagQueries:
 
         # Sources should be relevant to MCP
         source_texts = [s.display_text for s in sources]
-        mcp_relevant = any(
-            "MCP" in text or "Model Context Protocol" in text for text in source_texts
-        )
+        mcp_relevant = any(MCP_RE.search(text) for text in source_texts)
         assert mcp_relevant, "Sources should be relevant to MCP"
 
     @pytest.mark.integration
-    def test_outline_then_search_sequential_query(self, rag_system_with_test_data):
+    def test_outline_then_search_sequential_query(self, independent_results):
         """Test queries that might need outline first, then content search"""
-        rag = rag_system_with_test_data
-
-        # Query that could benefit from getting outline first
-        query = (
-            "What topics are covered in both the MCP and Prompt Engineering courses?"
+        response, sources = independent_result(
+            independent_results, "outline_then_search"
         )
 
-        response, sources = rag.query(query, session_id="test_session_3")
-
         # Verify response
         assert len(response) > 0
         assert isinstance(response, str)
@@ -197,14 +254,9 @@ class TestSequentialRagQueries:
         assert len(sources) >= 0  # Sources may vary depending on tool strategy
 
     @pytest.mark.integration
-    def test_general_knowledge_no_search(self, rag_system_with_test_data):
+    def test_general_knowledge_no_search(self, independent_results):
         """Test that general knowledge questions don't trigger unnecessary searches"""
-        rag = rag_system_with_test_data
-
-        # General knowledge question
-        query = "What is artificial intelligence?"
-
-        response, sources = rag.query(query, session_id="test_session_4")
+        response, sources = independent_result(independent_results, "general_knowledge")
 
         # Verify response exists
         assert len(response) > 0
@@ -214,9 +266,9 @@ class TestSequentialRagQueries:
         # (Some LLMs might still search, but it's not required)
 
     @pytest.mark.integration
-    def test_multi_round_with_conversation_history(self, rag_system_with_test_data):
+    def test_multi_round_with_conversation_history(self, rag_with_both_courses):
         """Test that sequential calling works with conversation history"""
-        rag = rag_system_with_test_data
+        rag = rag_with_both_courses
 
         session_id = "test_session_5"
 
@@ -236,13 +288,9 @@ class TestSequentialRagQueries:
         # Should handle context correctly (exact behavior depends on LLM)
 
     @pytest.mark.integration
-    def test_course_specific_lesson_query(self, rag_system_with_test_data):
+    def test_course_specific_lesson_query(self, independent_results):
         """Test queries about specific lessons (single round should suffice)"""
-        rag = rag_system_with_test_data
-
-        query = "What is covered in lesson 1 of the MCP course?"
-
-        response, sources = rag.query(query, session_id="test_session_6")
+        response, sources = independent_result(independent_results, "lesson_query")
 
         # Verify response
         assert len(response) > 0
@@ -254,14 +302,10 @@ class TestSequentialRagQueries:
             # May or may not be exact depending on search behavior
 
     @pytest.mark.integration
-    def test_error_handling_in_sequential_calls(self, rag_system_with_test_data):
+    def test_error_handling_in_sequential_calls(self, independent_results):
         """Test that errors in sequential calls are handled gracefully"""
-        rag = rag_system_with_test_data
-
         # Query with non-existent course (should handle gracefully)
-        query = "Compare the NonExistentCourse and MCP courses"
-
-        response, sources = rag.query(query, session_id="test_session_7")
+        response, sources = independent_result(independent_results, "missing_course")
 
         # Should get a response (even if it's an error message or fallback)
         assert isinstance(response, str)
@@ -277,9 +321,9 @@ class TestProviderCompatibility:
     @pytest.mark.skipif(
         Config.LLM_PROVIDER != "anthropic", reason="Requires Anthropic provider"
     )
-    def test_anthropic_sequential_calls(self, rag_system_with_test_data):
+    def test_anthropic_sequential_calls(self, rag_with_both_courses):
         """Test sequential calling with Anthropic provider"""
-        rag = rag_system_with_test_data
+        rag = rag_with_both_courses
 
         query = "Compare MCP and Prompt Engineering"
         response, sources = rag.query(query, session_id="anthropic_test")
@@ -289,9 +333,9 @@ class TestProviderCompatibility:
 
     @pytest.mark.integration
     @pytest.mark.skipif(Config.LLM_PROVIDER != "groq", reason="Requires Groq provider")
-    def test_groq_sequential_calls(self, rag_system_with_test_data):
+    def test_groq_sequential_calls(self, rag_with_both_courses):
         """Test sequential calling with Groq provider"""
-        rag = rag_system_with_test_data
+        rag = rag_with_both_courses
 
         query = "Compare MCP and Prompt Engineering"
         response, sources = rag.query(query, session_id="groq_test")
@@ -1,11 +1,63 @@
 # backend/tests/unit/test_ai_generator.py
 # Unit tests for sequential tool calling in AIGenerator
 
-from unittest.mock import Mock, call, patch
+import asyncio
+import functools
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, call, patch
 
 import pytest
-from ai_generator import AIGenerator
-from llm_providers import LLMResponse
+from ai_generator import AIGenerator, _classify_intent
+from llm_providers import BaseLLMProvider, LLMResponse, StreamEvent, ToolCall
+
+# Raw provider payloads are opaque to AIGenerator; it only hands them back to
+# the provider, so plain objects stand in for them instead of Mocks
+RAW_RESPONSE = SimpleNamespace(content=[])
+
+# Provider-formatted tool results; AIGenerator only appends them to the history
+TOOL_RESULT_MESSAGES = (
+    {"role": "user", "content": [{"type": "tool_result", "content": "Result"}]},
+)
+
+
+@functools.lru_cache(maxsize=None)
+def tool_use_raw(call_id=None):
+    """Raw Anthropic-style response holding one tool_use block"""
+    block = {"type": "tool_use"}
+    if call_id is not None:
+        block["id"] = call_id
+    return SimpleNamespace(content=[block])
+
+
+def tool_round(call_id: str, name: str, **tool_input) -> LLMResponse:
+    """Provider response requesting one tool call"""
+    return LLMResponse(
+        content="",
+        requires_tool_execution=True,
+        tool_calls=[ToolCall(id=call_id, name=name, input=tool_input)],
+        raw_response=tool_use_raw(call_id),
+    )
+
+
+def final_answer(content: str) -> LLMResponse:
+    """Provider response answering directly"""
+    return LLMResponse(
+        content=content,
+        requires_tool_execution=False,
+        tool_calls=[],
+        raw_response=RAW_RESPONSE,
+    )
+
+
+def threaded_tool_manager(execute_tool: Mock) -> Mock:
+    """Mock tool manager whose async dispatch runs execute_tool in a worker thread"""
+    manager = Mock()
+    manager.execute_tool = execute_tool
+    manager.aexecute_tool = lambda name, **kwargs: asyncio.to_thread(
+        manager.execute_tool, name, **kwargs
+    )
+    return manager
 
 
 class TestSequentialToolCalling:
@@ -15,6 +67,9 @@ class TestSequentialToolCalling:
     def mock_provider(self):
         """Create mock LLM provider"""
         provider = Mock()
+        provider.build_tool_result_messages = Mock(
+            return_value=list(TOOL_RESULT_MESSAGES)
+        )
         return provider
 
     @pytest.fixture
@@ -27,251 +82,91 @@ class TestSequentialToolCalling:
         """Create mock tool manager"""
         manager = Mock()
         manager.execute_tool = Mock(return_value="Tool result content")
-        return manager
-
-    def test_single_round_tool_execution_backward_compatibility(
-        self, ai_generator, mock_provider, mock_tool_manager
-    ):
-        """Test that single-round queries still work (backward compatibility)"""
-        # Setup: Query needs one tool, Claude answers after seeing result
-
-        # Round 1: Claude wants to use a tool
-        initial_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[
-                {
-                    "id": "call_1",
-                    "name": "search_course_content",
-                    "input": {"query": "What is MCP?"},
-                }
-            ],
-            raw_response=Mock(content=[{"type": "tool_use", "id": "call_1"}]),
-        )
-
-        # Round 1 follow-up: Claude answers directly (no more tools)
-        final_response = LLMResponse(
-            content="MCP stands for Model Context Protocol...",
-            requires_tool_execution=False,
-            tool_calls=[],
-            raw_response=Mock(),
-        )
-
-        # Mock provider to return responses in sequence
-        mock_provider.generate_response = Mock(
-            side_effect=[initial_response, final_response]
-        )
-        mock_provider.build_tool_result_messages = Mock(
-            return_value=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "tool_result", "content": "Tool result content"}
-                    ],
-                }
+        manager.execute_tools_batch = Mock(
+            side_effect=lambda calls: [
+                manager.execute_tool(name, **kwargs) for name, kwargs in calls
             ]
         )
+        return manager
 
-        # Execute
-        result = ai_generator.generate_response(
-            query="What is MCP?",
-            tools=[{"name": "search_course_content"}],
-            tool_manager=mock_tool_manager,
-        )
-
-        # Verify: Should execute 1 tool call and 1 follow-up API call (2 total)
-        assert mock_provider.generate_response.call_count == 2
-        assert mock_tool_manager.execute_tool.call_count == 1
-        assert result == "MCP stands for Model Context Protocol..."
-
-        # Verify tools were available in both calls (round 1 is not final round)
-        # Tools remain enabled until max rounds reached, allowing Claude to decide
-        first_call_tools = mock_provider.generate_response.call_args_list[0][1]["tools"]
-        second_call_tools = mock_provider.generate_response.call_args_list[1][1][
-            "tools"
-        ]
-        assert first_call_tools is not None
-        assert second_call_tools is not None  # Tools still enabled (round 1 of 2)
-
-    def test_two_round_tool_execution(
-        self, ai_generator, mock_provider, mock_tool_manager
+    @pytest.mark.parametrize(
+        "responses, tools_enabled, expected_result",
+        [
+            pytest.param(
+                [
+                    tool_round("call_1", "search_course_content", query="What is MCP?"),
+                    final_answer("MCP stands for Model Context Protocol..."),
+                ],
+                # Tools remain enabled until max rounds reached
+                [True, True],
+                "MCP stands for Model Context Protocol...",
+                id="single_round",
+            ),
+            pytest.param(
+                # Claude answers straight away; no tool round is started
+                [final_answer("The MCP course covers...")],
+                [True],
+                "The MCP course covers...",
+                id="early_termination",
+            ),
+            pytest.param(
+                [
+                    tool_round("call_1", "get_course_outline", course_title="MCP"),
+                    tool_round(
+                        "call_2",
+                        "get_course_outline",
+                        course_title="Prompt Engineering",
+                    ),
+                    final_answer("Comparison: MCP focuses on..."),
+                ],
+                # Tools disabled on the call after the second round
+                [True, True, False],
+                "Comparison: MCP focuses on...",
+                id="two_rounds",
+            ),
+            pytest.param(
+                # Claude keeps requesting tools; execution stops after 2 rounds
+                [tool_round("call_x", "search_course_content", query="test")] * 3,
+                [True, True, False],
+                "Search limit reached.",
+                id="max_rounds_enforced",
+            ),
+        ],
+    )
+    def test_tool_calling_scenarios(
+        self,
+        ai_generator,
+        mock_provider,
+        mock_tool_manager,
+        responses,
+        tools_enabled,
+        expected_result,
     ):
-        """Test that two-round queries work correctly"""
-        # Setup: Comparison query requiring two searches
-
-        # Round 1: Claude wants to search first course
-        initial_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[
-                {
-                    "id": "call_1",
-                    "name": "get_course_outline",
-                    "input": {"course_title": "MCP"},
-                }
-            ],
-            raw_response=Mock(content=[{"type": "tool_use", "id": "call_1"}]),
-        )
-
-        # After round 1: Claude wants to search second course
-        round_2_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[
-                {
-                    "id": "call_2",
-                    "name": "get_course_outline",
-                    "input": {"course_title": "Prompt Engineering"},
-                }
-            ],
-            raw_response=Mock(content=[{"type": "tool_use", "id": "call_2"}]),
-        )
-
-        # After round 2: Claude provides final answer
-        final_response = LLMResponse(
-            content="Comparison: MCP focuses on... while Prompt Engineering covers...",
-            requires_tool_execution=False,
-            tool_calls=[],
-            raw_response=Mock(),
-        )
-
-        # Mock provider to return responses in sequence
-        mock_provider.generate_response = Mock(
-            side_effect=[
-                initial_response,  # Initial call
-                round_2_response,  # After round 1 tools
-                final_response,  # After round 2 tools
-            ]
-        )
-        mock_provider.build_tool_result_messages = Mock(
-            return_value=[
-                {
-                    "role": "user",
-                    "content": [{"type": "tool_result", "content": "Tool result"}],
-                }
-            ]
-        )
+        """Test API calls, tool executions and messages for each round sequence"""
+        mock_provider.generate_response = Mock(side_effect=responses)
+        assistant_message = {"role": "assistant", "content": "Tool call"}
+        mock_provider.build_assistant_message = Mock(return_value=assistant_message)
 
         # Execute
         result = ai_generator.generate_response(
-            query="Compare MCP and Prompt Engineering courses",
-            tools=[{"name": "get_course_outline"}],
+            query="Test query",
+            tools=[{"name": "search_course_content"}, {"name": "get_course_outline"}],
             tool_manager=mock_tool_manager,
         )
 
-        # Verify: 3 API calls (initial + 2 follow-ups), 2 tool executions
-        assert mock_provider.generate_response.call_count == 3
-        assert mock_tool_manager.execute_tool.call_count == 2
-        assert (
-            result == "Comparison: MCP focuses on... while Prompt Engineering covers..."
-        )
-
-        # Verify tools were enabled in rounds 1 and 2, disabled in final call
+        # Verify: one API call per round plus the initial call, one tool each
         call_args = mock_provider.generate_response.call_args_list
-        assert call_args[0][1]["tools"] is not None  # Initial call
-        assert (
-            call_args[1][1]["tools"] is not None
-        )  # After round 1 (tools still enabled)
-        assert call_args[2][1]["tools"] is None  # After round 2 (tools disabled)
-
-    def test_max_rounds_enforced(self, ai_generator, mock_provider, mock_tool_manager):
-        """Test that execution stops after 2 rounds even if Claude wants more tools"""
-        # Setup: Claude keeps requesting tools indefinitely
-
-        # All responses request tools (simulating Claude never satisfied)
-        tool_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[
-                {
-                    "id": "call_x",
-                    "name": "search_course_content",
-                    "input": {"query": "test"},
-                }
-            ],
-            raw_response=Mock(content=[{"type": "tool_use", "id": "call_x"}]),
-        )
-
-        # Mock provider to always want more tools
-        mock_provider.generate_response = Mock(return_value=tool_response)
-        mock_provider.build_tool_result_messages = Mock(
-            return_value=[
-                {
-                    "role": "user",
-                    "content": [{"type": "tool_result", "content": "Result"}],
-                }
+        assert len(call_args) == len(tools_enabled)
+        assert mock_tool_manager.execute_tool.call_count == len(tools_enabled) - 1
+        assert result == expected_result
+
+        for index, (args, enabled) in enumerate(zip(call_args, tools_enabled)):
+            assert (args.kwargs["tools"] is not None) == enabled
+            # Each round adds exactly the assistant tool call and the tool result
+            assert args.kwargs["messages"] == [
+                {"role": "user", "content": "Test query"},
+                *[assistant_message, *TOOL_RESULT_MESSAGES] * index,
             ]
-        )
-
-        # Execute
-        result = ai_generator.generate_response(
-            query="Complex question",
-            tools=[{"name": "search_course_content"}],
-            tool_manager=mock_tool_manager,
-        )
-
-        # Verify: Stops after 2 rounds (3 API calls: initial + 2 follow-ups)
-        assert mock_provider.generate_response.call_count == 3
-        assert mock_tool_manager.execute_tool.call_count == 2
-
-        # Should return response even if Claude wants more tools
-        assert result is not None
-
-        # Verify tools were disabled on final call (round 2)
-        final_call_tools = mock_provider.generate_response.call_args_list[2][1]["tools"]
-        assert final_call_tools is None
-
-    def test_early_termination_no_tools(
-        self, ai_generator, mock_provider, mock_tool_manager
-    ):
-        """Test early termination when Claude answers directly after round 1"""
-        # Setup: Claude makes one tool call, then answers
-
-        # Round 1: Claude wants to search
-        initial_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[
-                {
-                    "id": "call_1",
-                    "name": "get_course_outline",
-                    "input": {"course_title": "MCP"},
-                }
-            ],
-            raw_response=Mock(content=[{"type": "tool_use", "id": "call_1"}]),
-        )
-
-        # After round 1: Claude has enough info, answers directly
-        final_response = LLMResponse(
-            content="The MCP course covers...",
-            requires_tool_execution=False,
-            tool_calls=[],
-            raw_response=Mock(),
-        )
-
-        mock_provider.generate_response = Mock(
-            side_effect=[initial_response, final_response]
-        )
-        mock_provider.build_tool_result_messages = Mock(
-            return_value=[
-                {
-                    "role": "user",
-                    "content": [{"type": "tool_result", "content": "Outline data"}],
-                }
-            ]
-        )
-
-        # Execute
-        result = ai_generator.generate_response(
-            query="What does MCP course cover?",
-            tools=[{"name": "get_course_outline"}],
-            tool_manager=mock_tool_manager,
-        )
-
-        # Verify: Only 2 API calls (terminates early)
-        assert mock_provider.generate_response.call_count == 2
-        assert mock_tool_manager.execute_tool.call_count == 1
-        assert result == "The MCP course covers..."
 
     def test_tool_execution_error_terminates_gracefully(
         self, ai_generator, mock_provider, mock_tool_manager
@@ -279,21 +174,9 @@ class TestSequentialToolCalling:
         """Test that tool execution errors are handled gracefully"""
         # Setup: Tool execution raises exception
 
-        initial_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[
-                {
-                    "id": "call_1",
-                    "name": "search_course_content",
-                    "input": {"query": "test"},
-                }
-            ],
-            raw_response=Mock(content=[{"type": "tool_use", "id": "call_1"}]),
-        )
+        initial_response = tool_round("call_1", "search_course_content", query="test")
 
         mock_provider.generate_response = Mock(return_value=initial_response)
-        mock_provider.build_tool_result_messages = Mock(return_value=[])
 
         # Tool execution fails
         mock_tool_manager.execute_tool = Mock(
@@ -315,76 +198,11 @@ class TestSequentialToolCalling:
         # Should not make follow-up API call after error
         assert mock_provider.generate_response.call_count == 1
 
-    def test_message_accumulation_across_rounds(
-        self, ai_generator, mock_provider, mock_tool_manager
-    ):
-        """Test that messages accumulate correctly across rounds"""
-        # Setup: Two-round execution
-
-        initial_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[{"id": "call_1", "name": "tool1", "input": {}}],
-            raw_response=Mock(content=[{"type": "tool_use", "id": "call_1"}]),
-        )
-
-        round_2_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[{"id": "call_2", "name": "tool2", "input": {}}],
-            raw_response=Mock(content=[{"type": "tool_use", "id": "call_2"}]),
-        )
-
-        final_response = LLMResponse(
-            content="Final answer",
-            requires_tool_execution=False,
-            tool_calls=[],
-            raw_response=Mock(),
-        )
-
-        mock_provider.generate_response = Mock(
-            side_effect=[initial_response, round_2_response, final_response]
-        )
-        mock_provider.build_tool_result_messages = Mock(
-            return_value=[
-                {
-                    "role": "user",
-                    "content": [{"type": "tool_result", "content": "Result"}],
-                }
-            ]
-        )
-
-        # Execute
-        ai_generator.generate_response(
-            query="Test",
-            tools=[{"name": "tool1"}, {"name": "tool2"}],
-            tool_manager=mock_tool_manager,
-        )
-
-        # Verify message accumulation
-        call_args = mock_provider.generate_response.call_args_list
-
-        # Initial call: 1 message (user query)
-        assert len(call_args[0][1]["messages"]) == 1
-
-        # After round 1: 1 (user) + 1 (assistant tool call) + 1 (tool result) = 3
-        round_2_messages = call_args[1][1]["messages"]
-        assert len(round_2_messages) >= 3
-
-        # After round 2: Previous 3 + 1 (assistant tool call) + 1 (tool result) = 5
-        final_messages = call_args[2][1]["messages"]
-        assert len(final_messages) >= 5
-
     def test_no_tools_no_tool_execution(self, ai_generator, mock_provider):
         """Test that queries without tools work normally"""
         # Setup: Direct answer, no tools
 
-        direct_response = LLMResponse(
-            content="This is general knowledge...",
-            requires_tool_execution=False,
-            tool_calls=[],
-            raw_response=Mock(),
-        )
+        direct_response = final_answer("This is general knowledge...")
 
         mock_provider.generate_response = Mock(return_value=direct_response)
 
@@ -403,42 +221,37 @@ class TestSequentialToolCalling:
         """Test that Groq provider message format is handled correctly"""
         # Setup: Groq-style response with choices
 
-        mock_message = Mock()
-        mock_message.content = ""
-        mock_message.tool_calls = [
-            Mock(
-                id="call_1", function=Mock(name="search", arguments='{"query": "test"}')
-            )
-        ]
-
-        mock_choice = Mock()
-        mock_choice.message = mock_message
-
-        mock_raw_response = Mock()
-        mock_raw_response.choices = [mock_choice]
         # Groq format doesn't have .content attribute at top level
+        mock_raw_response = SimpleNamespace(
+            choices=[
+                SimpleNamespace(
+                    message=SimpleNamespace(
+                        content="",
+                        tool_calls=[
+                            SimpleNamespace(
+                                id="call_1",
+                                function=SimpleNamespace(
+                                    name="search", arguments='{"query": "test"}'
+                                ),
+                            )
+                        ],
+                    )
+                )
+            ]
+        )
 
         initial_response = LLMResponse(
             content="",
             requires_tool_execution=True,
-            tool_calls=[{"id": "call_1", "name": "search", "input": {"query": "test"}}],
+            tool_calls=[ToolCall(id="call_1", name="search", input={"query": "test"})],
             raw_response=mock_raw_response,
         )
 
-        final_response = LLMResponse(
-            content="Answer",
-            requires_tool_execution=False,
-            tool_calls=[],
-            raw_response=Mock(),
-        )
+        final_response = final_answer("Answer")
 
         mock_provider.generate_response = Mock(
             side_effect=[initial_response, final_response]
         )
-        mock_provider.build_tool_result_messages = Mock(
-            return_value=[{"role": "user", "content": "Result"}]
-        )
-
         # Execute
         result = ai_generator.generate_response(
             query="Test", tools=[{"name": "search"}], tool_manager=mock_tool_manager
@@ -448,33 +261,20 @@ class TestSequentialToolCalling:
         assert result == "Answer"
         assert mock_tool_manager.execute_tool.call_count == 1
 
-    @patch("config.Config.DEBUG", True)
     def test_debug_logging_enabled(
-        self, ai_generator, mock_provider, mock_tool_manager, capsys
+        self, ai_generator, mock_provider, mock_tool_manager, capsys, monkeypatch
     ):
         """Test that debug logging works when DEBUG=True"""
+        monkeypatch.setattr("config.Config.DEBUG", True)
+
         # Setup
-        initial_response = LLMResponse(
-            content="",
-            requires_tool_execution=True,
-            tool_calls=[{"id": "call_1", "name": "tool", "input": {}}],
-            raw_response=Mock(content=[{"type": "tool_use"}]),
-        )
+        initial_response = tool_round("call_1", "tool")
 
-        final_response = LLMResponse(
-            content="Answer",
-            requires_tool_execution=False,
-            tool_calls=[],
-            raw_response=Mock(),
-        )
+        final_response = final_answer("Answer")
 
         mock_provider.generate_response = Mock(
             side_effect=[initial_response, final_response]
         )
-        mock_provider.build_tool_result_messages = Mock(
-            return_value=[{"role": "user", "content": "Result"}]
-        )
-
         # Execute
         ai_generator.generate_response(
             query="Test", tools=[{"name": "tool"}], tool_manager=mock_tool_manager
@@ -484,3 +284,328 @@ class TestSequentialToolCalling:
         captured = capsys.readouterr()
         assert "[DEBUG]" in captured.out
         assert "Tool calling round" in captured.out
+
+
+class TestAsyncToolCalling:
+    """Tests for the async generation path"""
+
+    @pytest.fixture
+    def mock_provider(self):
+        """Create mock LLM provider with an async generate method"""
+        provider = Mock()
+        provider.agenerate_response = AsyncMock()
+        # Stream through the base class fallback over agenerate_response
+        provider.astream_response = functools.partial(
+            BaseLLMProvider.astream_response, provider
+        )
+        provider.build_tool_result_messages = Mock(
+            return_value=list(TOOL_RESULT_MESSAGES)
+        )
+        return provider
+
+    @pytest.fixture
+    def ai_generator(self, mock_provider):
+        """Create AIGenerator with mock provider"""
+        return AIGenerator(provider=mock_provider)
+
+    async def test_async_direct_response(self, ai_generator, mock_provider):
+        """Test that async queries without tools return the provider content"""
+        mock_provider.agenerate_response.return_value = final_answer("Direct answer")
+
+        result = await ai_generator.agenerate_response(query="What is 2+2?")
+
+        assert result == "Direct answer"
+        assert mock_provider.agenerate_response.await_count == 1
+
+    async def test_async_tool_calls_run_concurrently(self, ai_generator, mock_provider):
+        """Test that tool calls within one round are executed in parallel"""
+        initial_response = LLMResponse(
+            content="",
+            requires_tool_execution=True,
+            tool_calls=[
+                ToolCall(id="call_1", name="search_course_content", input={}),
+                ToolCall(id="call_2", name="search_course_content", input={}),
+            ],
+            raw_response=tool_use_raw(),
+        )
+        final_response = final_answer("Combined answer")
+        mock_provider.agenerate_response.side_effect = [
+            initial_response,
+            final_response,
+        ]
+
+        # Both tool calls must be in flight at once to pass the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def execute_tool(name, **kwargs):
+            barrier.wait()
+            return "Tool result"
+
+        tool_manager = threaded_tool_manager(Mock(side_effect=execute_tool))
+
+        result = await ai_generator.agenerate_response(
+            query="Compare MCP and Prompt Engineering",
+            tools=[{"name": "search_course_content"}],
+            tool_manager=tool_manager,
+        )
+
+        assert result == "Combined answer"
+        assert tool_manager.execute_tool.call_count == 2
+        tool_results = mock_provider.build_tool_result_messages.call_args.args[0]
+        assert [r.tool_call_id for r in tool_results] == ["call_1", "call_2"]
+
+    async def test_async_tool_error_terminates_gracefully(
+        self, ai_generator, mock_provider
+    ):
+        """Test that a failing tool returns an error message without a follow-up call"""
+        mock_provider.agenerate_response.return_value = tool_round(
+            "call_1", "search_course_content"
+        )
+        tool_manager = threaded_tool_manager(
+            Mock(side_effect=Exception("Database down"))
+        )
+
+        result = await ai_generator.agenerate_response(
+            query="Test",
+            tools=[{"name": "search_course_content"}],
+            tool_manager=tool_manager,
+        )
+
+        assert "Error executing tool" in result
+        assert "Database down" in result
+        assert mock_provider.agenerate_response.await_count == 1
+
+    async def test_tool_starts_before_stream_finishes(
+        self, ai_generator, mock_provider
+    ):
+        """Test that a tool runs while the rest of the response is still streaming"""
+        tool_round_response = tool_round("call_1", "search_course_content")
+        tool_call = tool_round_response.tool_calls[0]
+        tool_started = threading.Event()
+        calls = []
+
+        async def stream(**kwargs):
+            calls.append(kwargs)
+            if len(calls) > 1:
+                yield StreamEvent(
+                    "done",
+                    response=final_answer("Final answer"),
+                )
+                return
+            yield StreamEvent("tool_call", tool_call=tool_call)
+            # The stream only completes once the tool is already running
+            assert await asyncio.to_thread(tool_started.wait, 5)
+            yield StreamEvent("done", response=tool_round_response)
+
+        def execute_tool(name, **kwargs):
+            tool_started.set()
+            return "Tool result"
+
+        mock_provider.astream_response = stream
+        tool_manager = threaded_tool_manager(Mock(side_effect=execute_tool))
+
+        result = await ai_generator.agenerate_response(
+            query="What is MCP?",
+            tools=[{"name": "search_course_content"}],
+            tool_manager=tool_manager,
+        )
+
+        assert result == "Final answer"
+        assert tool_manager.execute_tool.call_count == 1
+
+
+class TestSystemPromptCaching:
+    """Tests for keeping the static system prompt separate from history"""
+
+    def test_history_passed_as_system_context(self):
+        """Conversation history is sent as context, not baked into the prompt"""
+        provider = Mock()
+        provider.generate_response = Mock(return_value=final_answer("Answer"))
+        generator = AIGenerator(provider=provider)
+
+        generator.generate_response(query="Next?", conversation_history="User: Hi")
+
+        kwargs = provider.generate_response.call_args.kwargs
+        assert kwargs["system_prompt"] is AIGenerator.SYSTEM_PROMPT
+        assert kwargs["system_context"] == "Previous conversation:\nUser: Hi"
+
+
+class TestTokenBudget:
+    """Tests for keyword-based token budget selection"""
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("Show me the OUTLINE of MCP", "TOKEN_BUDGET_OUTLINE"),
+            ("What topics are in lesson 2?", "TOKEN_BUDGET_OUTLINE"),
+            ("Compare MCP and Chroma", "TOKEN_BUDGET_COMPARISON"),
+            ("What are the differences between them?", "TOKEN_BUDGET_COMPARISON"),
+            ("MCP vs. RAG", "TOKEN_BUDGET_COMPARISON"),
+            ("How do I draw on a canvas?", "TOKEN_BUDGET_GENERAL"),
+        ],
+    )
+    def test_keyword_budgets(self, query, expected):
+        """Keywords match case-insensitively at word starts only"""
+        from config import Config
+
+        generator = AIGenerator(provider=Mock())
+
+        assert generator._determine_max_tokens(query) == getattr(Config, expected)
+
+
+class TestBatchGeneration:
+    """Tests for concurrent batch generation"""
+
+    async def test_results_keep_query_order_within_concurrency(self):
+        """Test that at most `concurrency` queries run at once, in order"""
+        in_flight = 0
+        peak = 0
+
+        async def agenerate(messages, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return final_answer(messages[0]["content"].upper())
+
+        provider = Mock()
+        provider.agenerate_response = agenerate
+        provider.astream_response = functools.partial(
+            BaseLLMProvider.astream_response, provider
+        )
+        generator = AIGenerator(provider=provider)
+
+        results = await generator.agenerate_responses(
+            ["a", "b", "c", "d", "e"], concurrency=2
+        )
+
+        assert results == ["A", "B", "C", "D", "E"]
+        assert peak == 2
+
+    async def test_rate_limited_query_is_retried(self):
+        """Test that an HTTP 429 is retried instead of failing the batch"""
+        rate_limited = Exception("Too many requests")
+        rate_limited.status_code = 429
+
+        provider = Mock()
+        provider.agenerate_response = AsyncMock(
+            side_effect=[rate_limited, final_answer("Answer")]
+        )
+        provider.astream_response = functools.partial(
+            BaseLLMProvider.astream_response, provider
+        )
+        generator = AIGenerator(provider=provider)
+
+        with patch("config.Config.RATE_LIMIT_BACKOFF", 0):
+            results = await generator.agenerate_responses(["What is MCP?"])
+
+        assert results == ["Answer"]
+        assert provider.agenerate_response.await_count == 2
+
+    async def test_rate_limit_in_tool_round_is_retried(self):
+        """Test that a 429 after a tool round retries the query, not answers it"""
+        rate_limited = Exception("Too many requests")
+        rate_limited.status_code = 429
+        search = tool_round("call_1", "search_course_content", query="MCP")
+
+        provider = Mock()
+        provider.agenerate_response = AsyncMock(
+            side_effect=[search, rate_limited, search, final_answer("Answer")]
+        )
+        provider.astream_response = functools.partial(
+            BaseLLMProvider.astream_response, provider
+        )
+        provider.build_tool_result_messages = Mock(
+            return_value=list(TOOL_RESULT_MESSAGES)
+        )
+        tool_manager = threaded_tool_manager(Mock(return_value="Tool result"))
+        generator = AIGenerator(provider=provider)
+
+        with patch("config.Config.RATE_LIMIT_BACKOFF", 0):
+            results = await generator.agenerate_responses(
+                ["What is MCP?"],
+                tools=[{"name": "search_course_content"}],
+                tool_manager=tool_manager,
+            )
+
+        assert results == ["Answer"]
+        assert provider.agenerate_response.await_count == 4
+        assert tool_manager.execute_tool.call_count == 2
+
+
+class TestIntentClassification:
+    """Tests for skipping tools on questions that need no course search"""
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("What is 2+2?", "general"),
+            ("Answer this question about course materials: 3 * (4 + 5)", "general"),
+            ("Hello!", "general"),
+            ("What is in lesson 2?", "course"),
+            ("Who is Ada Lovelace?", "course"),
+            ("What is 2+2 in lesson 3?", "course"),
+        ],
+    )
+    def test_classify_intent(self, query, expected):
+        """Only unmistakable general questions are classified as general"""
+        assert _classify_intent(query) == expected
+
+    def test_general_query_sent_without_tools(self):
+        """Tool schemas are not sent for general questions"""
+        provider = Mock()
+        provider.generate_response = Mock(return_value=final_answer("4"))
+        generator = AIGenerator(provider=provider)
+
+        generator.generate_response(
+            query="What is 2+2?", tools=[{"name": "search_course_content"}]
+        )
+
+        assert provider.generate_response.call_args.kwargs["tools"] is None
+
+
+class TestResponseStreaming:
+    """Tests for streaming response text to the caller"""
+
+    async def test_text_deltas_streamed_in_order(self):
+        """Test that provider text deltas are yielded as they arrive"""
+
+        async def stream(**kwargs):
+            for text in ["MCP is ", "a protocol."]:
+                yield StreamEvent("text", text=text)
+            yield StreamEvent(
+                "done",
+                response=final_answer("MCP is a protocol."),
+            )
+
+        provider = Mock()
+        provider.astream_response = stream
+        generator = AIGenerator(provider=provider)
+
+        chunks = [chunk async for chunk in generator.astream_response("What is MCP?")]
+
+        assert chunks == ["MCP is ", "a protocol."]
+
+    async def test_unstreamed_answer_yielded_whole(self):
+        """Test that answers not decoded by the provider still reach the caller"""
+        provider = Mock()
+        provider.agenerate_response = AsyncMock(
+            return_value=tool_round("call_1", "search")
+        )
+        provider.astream_response = functools.partial(
+            BaseLLMProvider.astream_response, provider
+        )
+        tool_manager = threaded_tool_manager(
+            Mock(side_effect=Exception("Database down"))
+        )
+        generator = AIGenerator(provider=provider)
+
+        chunks = [
+            chunk
+            async for chunk in generator.astream_response(
+                "Test", tools=[{"name": "search"}], tool_manager=tool_manager
+            )
+        ]
+
+        assert chunks == ["Error executing tool 'search': Database down"]
@@ -0,0 +1,39 @@
+# backend/tests/unit/test_embedding_cache.py
+# Unit tests for the persistent embedding cache
+
+import numpy as np
+import pytest
+from embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "embeddings.db")
+
+
+class TestEmbeddingCache:
+    """Tests for storing and reloading embeddings"""
+
+    def test_round_trip(self, path):
+        cache = EmbeddingCache(path, "model-a")
+        cache.put("What is MCP?", [0.1, 0.2, 0.3])
+
+        assert np.allclose(cache.get("What is MCP?"), [0.1, 0.2, 0.3])
+        assert cache.get("Who teaches the course?") is None
+
+    def test_survives_reopen(self, path):
+        cache = EmbeddingCache(path, "model-a")
+        cache.put_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+        cache.close()
+
+        reopened = EmbeddingCache(path, "model-a")
+        a, missing, b = reopened.get_many(["a", "c", "b"])
+
+        assert np.array_equal(a, [1.0, 0.0])
+        assert missing is None
+        assert np.array_equal(b, [0.0, 1.0])
+
+    def test_model_name_is_part_of_key(self, path):
+        EmbeddingCache(path, "model-a").put("What is MCP?", [1.0])
+
+        assert EmbeddingCache(path, "model-b").get("What is MCP?") is None
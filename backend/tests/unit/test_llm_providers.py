@@ -0,0 +1,324 @@
+# backend/tests/unit/test_llm_providers.py
+# Unit tests for provider request building and response parsing
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from llm_providers import AnthropicProvider, BatchRequest, GroqProvider, ToolCall
+
+TOOLS = [
+    {
+        "name": "search_course_content",
+        "description": "Search",
+        "input_schema": {"type": "object", "properties": {}},
+    },
+    {
+        "name": "get_course_outline",
+        "description": "Outline",
+        "input_schema": {"type": "object", "properties": {}},
+    },
+]
+
+
+class TestAnthropicPromptCaching:
+    """Tests for Anthropic cache breakpoints on static request prefixes"""
+
+    @pytest.fixture
+    def provider(self):
+        return AnthropicProvider(api_key="test_key", model="claude-test")
+
+    def test_static_prompt_is_cacheable_block(self, provider):
+        """The static system prompt is sent as a cacheable block on its own"""
+        params = provider._build_api_params(
+            messages=[{"role": "user", "content": "Hi"}],
+            system_prompt="STATIC",
+            system_context=None,
+            tools=None,
+            temperature=0,
+            max_tokens=100,
+        )
+
+        assert params["system"] == [
+            {"type": "text", "text": "STATIC", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert "tools" not in params
+
+    def test_history_follows_cached_prefix(self, provider):
+        """Conversation history is appended after the cache breakpoint"""
+        params = provider._build_api_params(
+            messages=[{"role": "user", "content": "Hi"}],
+            system_prompt="STATIC",
+            system_context="Previous conversation:\nUser: Hello",
+            tools=None,
+            temperature=0,
+            max_tokens=100,
+        )
+
+        assert params["system"][0]["text"] == "STATIC"
+        assert params["system"][1] == {
+            "type": "text",
+            "text": "Previous conversation:\nUser: Hello",
+        }
+
+    def test_last_tool_marked_for_caching(self, provider):
+        """Only the last tool carries cache_control and inputs stay untouched"""
+        params = provider._build_api_params(
+            messages=[],
+            system_prompt="STATIC",
+            system_context=None,
+            tools=TOOLS,
+            temperature=0,
+            max_tokens=100,
+        )
+
+        assert "cache_control" not in params["tools"][0]
+        assert params["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert all("cache_control" not in t for t in TOOLS)
+
+    def test_marked_tools_reused_for_same_definitions(self, provider):
+        """The same definitions list gets one prebuilt cacheable tools list"""
+        first, second = (
+            provider._build_api_params(
+                messages=[],
+                system_prompt="STATIC",
+                system_context=None,
+                tools=TOOLS,
+                temperature=0,
+                max_tokens=100,
+            )["tools"]
+            for _ in range(2)
+        )
+
+        assert first is second
+
+    def test_static_system_blocks_reused_across_requests(self, provider):
+        """Requests with the same prompt share prebuilt system blocks"""
+        first, second = (
+            provider._build_api_params(
+                messages=[],
+                system_prompt="STATIC",
+                system_context=None,
+                tools=None,
+                temperature=0,
+                max_tokens=100,
+            )
+            for _ in range(2)
+        )
+
+        assert first["system"] is second["system"]
+
+
+class TestAnthropicBatches:
+    """Tests for the Message Batches API integration"""
+
+    @pytest.fixture
+    def provider(self):
+        provider = AnthropicProvider(api_key="test_key", model="claude-test")
+        provider.async_client = Mock()
+        return provider
+
+    async def test_submit_builds_standard_params(self, provider):
+        batches = provider.async_client.messages.batches
+        batches.create = AsyncMock(return_value=SimpleNamespace(id="batch_1"))
+
+        batch_id = await provider.asubmit_batch(
+            [
+                BatchRequest(
+                    custom_id="query-0",
+                    messages=[{"role": "user", "content": "Hi"}],
+                    system_prompt="STATIC",
+                )
+            ]
+        )
+
+        assert batch_id == "batch_1"
+        request = batches.create.call_args.kwargs["requests"][0]
+        assert request["custom_id"] == "query-0"
+        assert request["params"]["model"] == "claude-test"
+        assert request["params"]["system"][0]["text"] == "STATIC"
+
+    async def test_results_parsed_after_batch_ends(self, provider):
+        message = SimpleNamespace(
+            stop_reason="end_turn", content=[SimpleNamespace(text="Hello")]
+        )
+        entries = [
+            SimpleNamespace(
+                custom_id="query-0",
+                result=SimpleNamespace(type="succeeded", message=message),
+            ),
+            SimpleNamespace(
+                custom_id="query-1", result=SimpleNamespace(type="errored")
+            ),
+        ]
+
+        async def results():
+            for entry in entries:
+                yield entry
+
+        batches = provider.async_client.messages.batches
+        batches.retrieve = AsyncMock(
+            side_effect=[
+                SimpleNamespace(processing_status="in_progress"),
+                SimpleNamespace(processing_status="ended"),
+            ]
+        )
+        batches.results = AsyncMock(return_value=results())
+
+        responses = await provider.await_batch_results("batch_1", poll_interval=0)
+
+        assert list(responses) == ["query-0"]
+        assert responses["query-0"].content == "Hello"
+        assert batches.retrieve.await_count == 2
+
+
+class TestAssistantMessages:
+    """Tests for echoing tool-use responses back in provider format"""
+
+    def test_anthropic_echoes_content_blocks(self):
+        provider = AnthropicProvider(api_key="test_key", model="claude-test")
+        blocks = [SimpleNamespace(type="tool_use")]
+
+        message = provider.build_assistant_message(SimpleNamespace(content=blocks))
+
+        assert message == {"role": "assistant", "content": blocks}
+
+    def test_groq_echoes_tool_calls(self):
+        provider = GroqProvider(api_key="test_key", model="llama-test")
+        tool_calls = [SimpleNamespace(id="call_1")]
+        raw = SimpleNamespace(
+            choices=[
+                SimpleNamespace(
+                    message=SimpleNamespace(content=None, tool_calls=tool_calls)
+                )
+            ]
+        )
+
+        message = provider.build_assistant_message(raw)
+
+        assert message == {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": tool_calls,
+        }
+
+
+class TestGroqSystemPrompt:
+    """Tests for Groq system message construction"""
+
+    @pytest.fixture
+    def provider(self):
+        return GroqProvider(api_key="test_key", model="llama-test")
+
+    def test_history_appended_to_static_prefix(self, provider):
+        """Static prompt leads the system message so prefixes stay identical"""
+        params = provider._build_api_params(
+            messages=[{"role": "user", "content": "Hi"}],
+            system_prompt="STATIC",
+            system_context="Previous conversation:\nUser: Hello",
+            tools=None,
+            temperature=0,
+            max_tokens=100,
+        )
+
+        assert params["messages"][0] == {
+            "role": "system",
+            "content": "STATIC\n\nPrevious conversation:\nUser: Hello",
+        }
+        assert params["messages"][1] == {"role": "user", "content": "Hi"}
+
+    def test_tool_conversion_reused(self, provider):
+        """Tool definitions are converted once per definitions list"""
+        first = provider._convert_tools(TOOLS)
+        second = provider._convert_tools(TOOLS)
+        changed = [{**TOOLS[0], "input_schema": {"type": "object", "properties": {}}}]
+        third = provider._convert_tools(changed)
+
+        assert first is second
+        assert first[0]["function"]["name"] == "search_course_content"
+        # Same name and description, different schema: converted afresh
+        assert third[0]["function"]["parameters"] == changed[0]["input_schema"]
+
+    def test_system_message_reused_for_same_history(self, provider):
+        """Repeated calls with unchanged history share one system string"""
+        contents = [
+            provider._build_api_params(
+                messages=[],
+                system_prompt="STATIC",
+                system_context="Previous conversation:\nUser: Hello",
+                tools=None,
+                temperature=0,
+                max_tokens=100,
+            )["messages"][0]["content"]
+            for _ in range(2)
+        ]
+
+        assert contents[0] is contents[1]
+
+
+def groq_chunk(content=None, tool_calls=None, finish_reason=None):
+    """Build a minimal streamed Groq chunk"""
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(
+        id="chunk",
+        created=0,
+        model="llama-test",
+        choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)],
+    )
+
+
+def groq_fragment(index, id=None, name=None, arguments=None):
+    """Build a streamed tool call fragment"""
+    return SimpleNamespace(
+        index=index,
+        id=id,
+        function=SimpleNamespace(name=name, arguments=arguments),
+    )
+
+
+class TestGroqStreaming:
+    """Tests for assembling streamed Groq deltas"""
+
+    async def test_tool_calls_emitted_as_they_complete(self):
+        provider = GroqProvider(api_key="test_key", model="llama-test")
+        chunks = [
+            groq_chunk(tool_calls=[groq_fragment(0, "call_1", "search", '{"que')]),
+            groq_chunk(tool_calls=[groq_fragment(0, arguments='ry": "MCP"}')]),
+            groq_chunk(tool_calls=[groq_fragment(1, "call_2", "outline", "{}")]),
+            groq_chunk(finish_reason="tool_calls"),
+        ]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        provider.async_client.chat.completions.create = AsyncMock(return_value=stream())
+
+        events = [
+            event
+            async for event in provider.astream_response(
+                messages=[{"role": "user", "content": "Hi"}], system_prompt="STATIC"
+            )
+        ]
+
+        assert [e.type for e in events] == ["tool_call", "tool_call", "done"]
+        assert events[0].tool_call == ToolCall(
+            id="call_1", name="search", input={"query": "MCP"}
+        )
+        response = events[-1].response
+        assert response.requires_tool_execution
+        assert [tc.id for tc in response.tool_calls] == ["call_1", "call_2"]
+
+    def test_empty_tool_arguments_parse_to_no_input(self):
+        provider = GroqProvider(api_key="test_key", model="llama-test")
+        tool_call = SimpleNamespace(
+            id="call_1", function=SimpleNamespace(name="outline", arguments="")
+        )
+        message = SimpleNamespace(content=None, tool_calls=[tool_call])
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=message, finish_reason="tool_calls")]
+        )
+
+        parsed = provider._parse_response(response)
+
+        assert parsed.tool_calls == [ToolCall(id="call_1", name="outline", input={})]
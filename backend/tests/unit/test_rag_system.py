@@ -0,0 +1,52 @@
+# backend/tests/unit/test_rag_system.py
+# Unit tests for loading course folders into the RAG system
+
+from unittest.mock import Mock, patch
+
+import pytest
+from config import Config
+from models import Course, CourseChunk
+from rag_system import RAGSystem
+
+
+def course_with_chunks(title):
+    course = Course(title=title)
+    return course, [
+        CourseChunk(content=f"{title} text", course_title=title, chunk_index=0)
+    ]
+
+
+@pytest.fixture
+def rag(tmp_path):
+    for name in ("good.txt", "bad.txt"):
+        (tmp_path / name).write_text("course")
+    with patch("rag_system.VectorStore"), patch("rag_system.create_llm_provider"):
+        rag = RAGSystem(Config())
+    rag.document_processor = Mock()
+    rag.document_processor.process_course_document.side_effect = lambda path: (
+        course_with_chunks("Good" if path.endswith("good.txt") else "Bad")
+    )
+    rag.vector_store.get_existing_course_titles.return_value = []
+    return rag
+
+
+class TestAddCourseFolder:
+    """Tests for adding a folder of course documents"""
+
+    def test_one_failing_course_keeps_the_rest(self, rag, tmp_path):
+        def add_content(chunks):
+            if any(chunk.course_title == "Bad" for chunk in chunks):
+                raise ValueError("rejected")
+
+        rag.vector_store.add_course_content.side_effect = add_content
+
+        assert rag.add_course_folder(str(tmp_path)) == (1, 1)
+        # The failed course never reaches the catalog, so a re-run retries it
+        rag.vector_store.add_course_metadata.assert_called_once()
+        assert rag.vector_store.add_course_metadata.call_args.args[0].title == "Good"
+
+    def test_new_courses_added_in_one_batch(self, rag, tmp_path):
+        assert rag.add_course_folder(str(tmp_path)) == (2, 2)
+        assert rag.vector_store.add_course_content.call_count == 1
+        assert rag.vector_store.add_courses_metadata.call_count == 1
+        rag.vector_store.add_course_metadata.assert_not_called()
@@ -0,0 +1,262 @@
+# backend/tests/unit/test_response_cache.py
+# Unit tests for the semantic response cache
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import numpy as np
+import pytest
+from ai_generator import QUESTION_PREFIX, AIGenerator
+from llm_providers import LLMResponse, ToolCall
+from response_cache import ExactMatchCache, LRUCache, SemanticCache
+
+# Hand-picked vectors: the two MCP phrasings are near-duplicates (cosine ~0.99),
+# the unrelated question is orthogonal to both
+VECTORS = {
+    "What is MCP?": [1.0, 0.0, 0.0],
+    "What's MCP?": [0.99, 0.1, 0.0],
+    "Who teaches the course?": [0.0, 0.0, 1.0],
+}
+
+
+def fake_embedding_function(texts):
+    return [VECTORS[text] for text in texts]
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(fake_embedding_function, threshold=0.92, max_entries=2)
+
+
+class TestSemanticCache:
+    """Tests for similarity lookup, tag matching, and eviction"""
+
+    def test_embed_returns_unit_vector(self, cache):
+        vector = cache.embed("What's MCP?")
+        assert np.isclose(np.linalg.norm(vector), 1.0)
+
+    def test_paraphrase_hits(self, cache):
+        cache.put(cache.embed("What is MCP?"), "MCP answer")
+        assert cache.get(cache.embed("What's MCP?")) == "MCP answer"
+
+    def test_unrelated_query_misses(self, cache):
+        cache.put(cache.embed("What is MCP?"), "MCP answer")
+        assert cache.get(cache.embed("Who teaches the course?")) is None
+
+    def test_tag_must_match(self, cache):
+        cache.put(cache.embed("What is MCP?"), "MCP answer", tag=("search",))
+        assert cache.get(cache.embed("What is MCP?"), tag=None) is None
+        assert cache.get(cache.embed("What is MCP?"), tag=("search",)) == "MCP answer"
+
+    def test_least_recently_used_entry_evicted(self, cache):
+        cache.put(cache.embed("What is MCP?"), "MCP answer")
+        cache.put(cache.embed("Who teaches the course?"), "Instructor answer")
+
+        # Touch the MCP entry so the instructor entry becomes least recent
+        cache.get(cache.embed("What is MCP?"))
+        cache.put(cache.embed("What's MCP?"), "Newer MCP answer", tag="other")
+
+        assert len(cache) == 2
+        assert cache.get(cache.embed("Who teaches the course?")) is None
+        assert cache.get(cache.embed("What is MCP?")) == "MCP answer"
+
+
+class TestExactMatchCache:
+    """Tests for TTL expiry and LRU eviction"""
+
+    def test_hit_until_expired(self):
+        cache = ExactMatchCache(ttl=10)
+        with patch("response_cache.time.monotonic", return_value=100.0):
+            cache.put(("q", None, None), "answer")
+        with patch("response_cache.time.monotonic", return_value=109.0):
+            assert cache.get(("q", None, None)) == "answer"
+        with patch("response_cache.time.monotonic", return_value=110.0):
+            assert cache.get(("q", None, None)) is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_evicted(self):
+        cache = ExactMatchCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+
+class TestLRUCache:
+    """Tests for the expiry-free LRU cache"""
+
+    def test_least_recently_used_entry_evicted(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", [0.1])
+        cache.put("b", [0.2])
+        cache.get("a")
+        cache.put("c", [0.3])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == [0.1]
+        assert len(cache) == 2
+
+    def test_entries_never_expire(self):
+        cache = LRUCache()
+        with patch("response_cache.time.monotonic") as monotonic:
+            cache.put("a", [0.1])
+            assert cache.get("a") == [0.1]
+
+        monotonic.assert_not_called()
+
+
+class TestAIGeneratorResponseCache:
+    """Tests for the response cache in front of the provider"""
+
+    @pytest.fixture
+    def provider(self):
+        provider = Mock()
+        provider.generate_response = Mock(
+            return_value=LLMResponse(
+                content="MCP stands for Model Context Protocol.",
+                requires_tool_execution=False,
+                tool_calls=[],
+                raw_response=SimpleNamespace(),
+            )
+        )
+        return provider
+
+    def test_paraphrase_served_from_cache(self, provider, cache):
+        generator = AIGenerator(provider=provider, response_cache=cache)
+
+        first = generator.generate_response(query="What is MCP?")
+        second = generator.generate_response(query="What's MCP?")
+
+        assert first == second == "MCP stands for Model Context Protocol."
+        assert provider.generate_response.call_count == 1
+
+    def test_instruction_prefix_not_embedded(self, provider, cache):
+        generator = AIGenerator(provider=provider, response_cache=cache)
+
+        # The fake embedding function only knows the bare questions
+        generator.generate_response(query=QUESTION_PREFIX + "What is MCP?")
+        generator.generate_response(query=QUESTION_PREFIX + "What's MCP?")
+        generator.generate_response(query=QUESTION_PREFIX + "Who teaches the course?")
+
+        assert provider.generate_response.call_count == 2
+
+    def test_queries_with_history_bypass_cache(self, provider, cache):
+        generator = AIGenerator(provider=provider, response_cache=cache)
+
+        generator.generate_response(query="What is MCP?")
+        generator.generate_response(query="What is MCP?", conversation_history="...")
+
+        assert provider.generate_response.call_count == 2
+
+    def test_tool_backed_answers_not_cached(self, cache):
+        provider = Mock()
+        provider.generate_response = Mock(
+            side_effect=[
+                LLMResponse(
+                    content="",
+                    requires_tool_execution=True,
+                    tool_calls=[ToolCall(id="call_1", name="search", input={})],
+                    raw_response=SimpleNamespace(content=[]),
+                ),
+                LLMResponse(
+                    content="Answer from search",
+                    requires_tool_execution=False,
+                    tool_calls=[],
+                    raw_response=SimpleNamespace(),
+                ),
+            ]
+        )
+        provider.build_tool_result_messages = Mock(return_value=[])
+        tool_manager = Mock()
+        tool_manager.execute_tools_batch = Mock(return_value=["Tool result"])
+        generator = AIGenerator(provider=provider, response_cache=cache)
+
+        generator.generate_response(
+            query="What is MCP?",
+            tools=[{"name": "search"}],
+            tool_manager=tool_manager,
+        )
+
+        assert len(cache) == 0
+
+    def test_identical_request_with_history_served_from_exact_cache(self, provider):
+        generator = AIGenerator(provider=provider, exact_cache=ExactMatchCache())
+
+        first = generator.generate_response(
+            query="What is MCP?", conversation_history="User: Hi"
+        )
+        second = generator.generate_response(
+            query="What is MCP?", conversation_history="User: Hi"
+        )
+        generator.generate_response(
+            query="What is MCP?", conversation_history="User: Hello"
+        )
+
+        assert first == second
+        assert provider.generate_response.call_count == 2
+
+    async def test_precompute_caches_direct_answers_only(self, cache):
+        provider = Mock()
+        provider.asubmit_batch = AsyncMock(return_value="batch_1")
+        provider.await_batch_results = AsyncMock(
+            return_value={
+                "query-0": LLMResponse(
+                    content="MCP stands for Model Context Protocol.",
+                    requires_tool_execution=False,
+                    tool_calls=[],
+                    raw_response=SimpleNamespace(),
+                ),
+                "query-1": LLMResponse(
+                    content="",
+                    requires_tool_execution=True,
+                    tool_calls=[ToolCall(id="call_1", name="search", input={})],
+                    raw_response=SimpleNamespace(),
+                ),
+            }
+        )
+        generator = AIGenerator(
+            provider=provider, response_cache=cache, exact_cache=ExactMatchCache()
+        )
+
+        cached = await generator.precompute_responses(
+            ["What is MCP?", "Who teaches the course?"], poll_interval=0
+        )
+
+        assert cached == 1
+        requests = provider.asubmit_batch.call_args.args[0]
+        assert [r.custom_id for r in requests] == ["query-0", "query-1"]
+        assert generator.generate_response(query="What's MCP?") == (
+            "MCP stands for Model Context Protocol."
+        )
+        provider.generate_response.assert_not_called()
+
+    async def test_precompute_without_batch_api_answers_directly(self, cache):
+        provider = Mock()
+        provider.supports_batches = False
+        provider.agenerate_response = AsyncMock(
+            side_effect=[
+                LLMResponse(
+                    content="MCP stands for Model Context Protocol.",
+                    requires_tool_execution=False,
+                    tool_calls=[],
+                    raw_response=SimpleNamespace(),
+                ),
+                Exception("Service unavailable"),
+            ]
+        )
+        generator = AIGenerator(provider=provider, response_cache=cache)
+
+        cached = await generator.precompute_responses(
+            ["What is MCP?", "Who teaches the course?"]
+        )
+
+        assert cached == 1
+        provider.asubmit_batch.assert_not_called()
+        assert provider.agenerate_response.await_count == 2
+        assert generator.generate_response(query="What's MCP?") == (
+            "MCP stands for Model Context Protocol."
+        )
@@ -0,0 +1,423 @@
+# backend/tests/unit/test_search_tools.py
+# Unit tests for the course search tool
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from response_cache import SemanticCache
+from search_tools import CourseOutlineTool, CourseSearchTool, Tool, ToolManager
+from vector_store import SearchResults
+
+# The two MCP phrasings are near-duplicates, the instructor question is not
+VECTORS = {
+    "What is MCP?": [1.0, 0.0, 0.0],
+    "what is MCP": [0.999, 0.02, 0.0],
+    "Who teaches the course?": [0.0, 0.0, 1.0],
+}
+
+
+@pytest.fixture
+def store():
+    store = Mock()
+    store.data_version = 0
+    store.embed_query = Mock(side_effect=lambda query: VECTORS[query])
+    store.embed_batch = Mock(side_effect=lambda queries: [VECTORS[q] for q in queries])
+    store.search = Mock(
+        return_value=SearchResults(
+            documents=["MCP connects models to tools"],
+            metadata=[{"course_title": "MCP Course", "lesson_number": 1}],
+            distances=[0.1],
+        )
+    )
+    store.search_batch = Mock(
+        side_effect=lambda queries, **kwargs: [store.search.return_value] * len(queries)
+    )
+    store.get_source_links_batch = Mock(
+        side_effect=lambda sources: dict.fromkeys(
+            sources, "https://example.com/lesson1"
+        )
+    )
+    return store
+
+
+@pytest.fixture
+def tool(store):
+    cache = SemanticCache(embedding_function=None, threshold=0.97)
+    return CourseSearchTool(store, search_cache=cache)
+
+
+class TestSearchCache:
+    """Tests for reusing search results across near-duplicate queries"""
+
+    def test_paraphrase_served_from_cache(self, tool, store):
+        first = tool.execute(query="What is MCP?")
+        first_sources = tool.last_sources
+        tool.last_sources = []
+
+        second = tool.execute(query="what is MCP")
+
+        assert first == second
+        assert tool.last_sources == first_sources
+        assert store.search.call_count == 1
+        assert (
+            store.search.call_args.kwargs["query_embedding"] == VECTORS["What is MCP?"]
+        )
+
+    def test_filters_are_part_of_the_key(self, tool, store):
+        tool.execute(query="What is MCP?")
+        tool.execute(query="What is MCP?", lesson_number=2)
+
+        assert store.search.call_count == 2
+
+    def test_store_writes_invalidate_entries(self, tool, store):
+        tool.execute(query="What is MCP?")
+        store.data_version += 1
+        tool.execute(query="What is MCP?")
+
+        assert store.search.call_count == 2
+
+    def test_empty_results_not_cached(self, tool, store):
+        store.search.return_value = SearchResults.empty("")
+
+        tool.execute(query="Who teaches the course?")
+        tool.execute(query="Who teaches the course?")
+
+        assert store.search.call_count == 2
+
+    def test_interleaved_search_keeps_its_own_sources(self, tool, store):
+        """A search running in between cannot swap the sources of a cached entry"""
+        instructor_results = SearchResults(
+            documents=["Taught by the MCP team"],
+            metadata=[{"course_title": "Instructors", "lesson_number": None}],
+            distances=[0.1],
+        )
+        first_search_results = store.search.return_value
+
+        def interleave(sources):
+            # Another query finishes on the shared tool before this one returns
+            tool.set_sources_sink(Mock())
+            store.search.return_value = instructor_results
+            tool.execute(query="Who teaches the course?")
+
+        tool.set_sources_sink(interleave)
+        tool.execute(query="What is MCP?")
+        store.search.return_value = first_search_results
+
+        tool.execute(query="what is MCP")
+
+        assert [s.course_title for s in tool.last_sources] == ["MCP Course"]
+
+    def test_no_cache_searches_by_text(self, store):
+        tool = CourseSearchTool(store)
+
+        tool.execute(query="What is MCP?")
+
+        store.embed_query.assert_not_called()
+        assert "query_embedding" not in store.search.call_args.kwargs
+
+    def test_blank_query_skips_search(self, tool, store):
+        assert tool.execute(query="   ") == "Please provide a search query."
+        assert tool.execute_batch([{"query": ""}]) == ["Please provide a search query."]
+
+        store.embed_query.assert_not_called()
+        store.search.assert_not_called()
+        store.search_batch.assert_not_called()
+
+
+class TestBatchExecution:
+    """Tests for executing several tool calls of one turn together"""
+
+    def test_searches_share_one_store_call(self, store):
+        tool = CourseSearchTool(store)
+
+        outputs = tool.execute_batch(
+            [{"query": "What is MCP?"}, {"query": "Who teaches the course?"}]
+        )
+
+        assert len(outputs) == 2
+        assert all("MCP connects models to tools" in output for output in outputs)
+        store.search.assert_not_called()
+        assert store.search_batch.call_count == 1
+        assert len(tool.last_sources) == 1
+
+    def test_cached_searches_skip_the_store(self, tool, store):
+        tool.execute(query="What is MCP?")
+
+        tool.execute_batch([{"query": "what is MCP"}, {"query": "What is MCP?"}])
+
+        store.search_batch.assert_not_called()
+        store.embed_batch.assert_called_once_with(["what is MCP", "What is MCP?"])
+
+    def test_misses_searched_with_batch_embeddings(self, tool, store):
+        tool.execute_batch(
+            [{"query": "What is MCP?"}, {"query": "Who teaches the course?"}]
+        )
+
+        assert store.embed_batch.call_count == 1
+        store.embed_query.assert_not_called()
+        assert store.search_batch.call_args.kwargs["query_embeddings"] == [
+            VECTORS["What is MCP?"],
+            VECTORS["Who teaches the course?"],
+        ]
+
+    def test_calls_grouped_by_tool(self):
+        search = Mock(spec=Tool)
+        search.get_tool_definition.return_value = {"name": "search"}
+        search.execute_batch.return_value = ["first", "second"]
+        outline = Mock(spec=Tool)
+        outline.get_tool_definition.return_value = {"name": "outline"}
+        outline.execute_batch.return_value = ["outline"]
+        manager = ToolManager()
+        manager.register_tool(search)
+        manager.register_tool(outline)
+
+        outputs = manager.execute_tools_batch(
+            [
+                ("search", {"query": "a"}),
+                ("outline", {"course_title": "MCP"}),
+                ("missing", {}),
+                ("search", {"query": "b"}),
+            ]
+        )
+
+        assert outputs == ["first", "outline", "Tool 'missing' not found", "second"]
+        search.execute_batch.assert_called_once_with([{"query": "a"}, {"query": "b"}])
+
+
+class TestToolDefinitions:
+    """Tests for tool definitions built at registration"""
+
+    def test_definitions_built_once(self, store):
+        tool = CourseSearchTool(store)
+        manager = ToolManager()
+        with patch.object(
+            CourseSearchTool,
+            "get_tool_definition",
+            autospec=True,
+            side_effect=CourseSearchTool.get_tool_definition,
+        ) as get_definition:
+            manager.register_tool(tool)
+            first = manager.get_tool_definitions()
+            second = manager.get_tool_definitions()
+
+        assert first is second
+        assert [d["name"] for d in first] == ["search_course_content"]
+        assert get_definition.call_count == 1
+
+    async def test_blank_nullable_arguments_dispatched_as_none(self):
+        tool = Mock(spec=Tool)
+        tool.get_tool_definition.return_value = {
+            "name": "search",
+            "input_schema": {
+                "properties": {
+                    "query": {"type": "string"},
+                    "course_name": {"type": ["string", "null"]},
+                }
+            },
+        }
+        tool.execute.return_value = "result"
+        tool.execute_batch.return_value = ["result"]
+        tool.aexecute = AsyncMock(return_value="result")
+        manager = ToolManager()
+        manager.register_tool(tool)
+
+        assert manager.execute_tool("search", query="", course_name="") == "result"
+        tool.execute.assert_called_once_with(query="", course_name=None)
+        assert manager.execute_tools_batch([("search", {"course_name": ""})]) == [
+            "result"
+        ]
+        tool.execute_batch.assert_called_once_with([{"course_name": None}])
+        assert await manager.aexecute_tool("search", course_name="") == "result"
+        tool.aexecute.assert_awaited_once_with(course_name=None)
+        assert manager.execute_tool("missing") == "Tool 'missing' not found"
+
+    def test_blank_filters_from_direct_callers_ignored(self, store):
+        tool = CourseSearchTool(store)
+
+        tool.execute(query="What is MCP?", course_name="", lesson_number="")
+
+        store.search.assert_called_once_with(
+            query="What is MCP?", course_name=None, lesson_number=None
+        )
+
+    def test_search_tool_dispatched_positionally(self, store):
+        tool = CourseSearchTool(store)
+        manager = ToolManager()
+        manager.register_tool(tool)
+
+        with patch.object(tool, "execute", wraps=tool.execute) as execute:
+            manager.execute_tool("search_course_content", lesson_number=2, query="q")
+            with pytest.raises(TypeError):
+                manager.execute_tool("search_course_content", query="q", extra=1)
+
+        assert execute.call_args_list[0].args == ("q", None, 2)
+        assert execute.call_args_list[0].kwargs == {}
+        # Unknown arguments still reach the tool, which rejects them
+        assert execute.call_args_list[1].kwargs == {"query": "q", "extra": 1}
+
+    def test_reregistering_replaces_definition(self, store):
+        manager = ToolManager()
+        manager.register_tool(CourseSearchTool(store))
+        manager.register_tool(CourseSearchTool(store))
+
+        assert len(manager.get_tool_definitions()) == 1
+
+
+class TestCourseOutline:
+    """Tests for outline lookups"""
+
+    def test_outline_looks_up_resolved_course(self, store):
+        store._resolve_course_name = Mock(return_value="MCP Course")
+        store.get_course_metadata = Mock(
+            return_value={
+                "title": "MCP Course",
+                "course_link": "https://example.com/mcp",
+                "instructor": "Ada",
+                "lessons": [{"lesson_number": 1, "lesson_title": "Intro"}],
+            }
+        )
+        tool = CourseOutlineTool(store)
+
+        output = tool.execute(course_title="MCP")
+
+        store.get_course_metadata.assert_called_once_with("MCP Course")
+        store.get_all_courses_metadata.assert_not_called()
+        assert "Lesson 1: Intro" in output
+        assert tool.last_sources[0].url == "https://example.com/mcp"
+
+    def test_outline_format(self, store):
+        tool = CourseOutlineTool(store)
+        course = {
+            "title": "MCP Course",
+            "course_link": "https://example.com/mcp",
+            "instructor": "Ada",
+            "lesson_count": 2,
+            "lessons": [
+                {"lesson_number": 1, "lesson_title": "Intro", "lesson_link": "l1"},
+                {"lesson_number": 2, "lesson_title": "Servers"},
+            ],
+        }
+
+        assert tool._format_outline(course) == (
+            "Course: MCP Course\n"
+            "Course Link: https://example.com/mcp\n"
+            "Instructor: Ada\n"
+            "Total Lessons: 2\n\n"
+            "Lesson Outline:\n"
+            "  Lesson 1: Intro\n"
+            "    Link: l1\n"
+            "  Lesson 2: Servers\n"
+        )
+        assert tool._format_outline({"title": "Empty"}).endswith(
+            "Lesson Outline:\n  (No lesson details available)\n"
+        )
+
+
+class TestFormatResults:
+    """Tests for formatting hits and their sources"""
+
+    def test_links_resolved_in_one_lookup(self, store):
+        store.search.return_value = SearchResults(
+            documents=["first", "second", "third"],
+            metadata=[
+                {"course_title": "MCP Course", "lesson_number": 1},
+                {"course_title": "MCP Course", "lesson_number": 1},
+                {"course_title": "MCP Course", "lesson_number": 2},
+            ],
+            distances=[0.1, 0.2, 0.3],
+        )
+        tool = CourseSearchTool(store)
+
+        output = tool.execute(query="What is MCP?")
+
+        assert output.startswith("[MCP Course - Lesson 1]\nfirst\n\n")
+        store.get_source_links_batch.assert_called_once_with(
+            [("MCP Course", 1), ("MCP Course", 2)]
+        )
+        assert [s.display_text for s in tool.last_sources] == [
+            "MCP Course - Lesson 1",
+            "MCP Course - Lesson 2",
+        ]
+
+
+class TestAsyncExecution:
+    """Tests for running tools off the event loop"""
+
+    async def test_tool_runs_in_worker_thread(self, store):
+        import threading
+
+        loop_thread = threading.get_ident()
+        threads = []
+        store.search.side_effect = lambda **kwargs: (
+            threads.append(threading.get_ident()) or SearchResults.empty("none")
+        )
+        manager = ToolManager()
+        manager.register_tool(CourseSearchTool(store))
+
+        output = await manager.aexecute_tool("search_course_content", query="MCP")
+        missing = await manager.aexecute_tool("missing")
+
+        assert output == "none"
+        assert threads and threads[0] != loop_thread
+        assert missing == "Tool 'missing' not found"
+
+    def test_render_reports_error_then_empty(self):
+        format_fn = Mock(return_value="formatted")
+
+        error = SearchResults.empty("Search error: boom")
+        assert error.render("MCP", None, format_fn) == "Search error: boom"
+        assert SearchResults([], [], []).render("MCP", 2, format_fn) == (
+            "No relevant content found in course 'MCP' in lesson 2."
+        )
+        format_fn.assert_not_called()
+
+
+class TestSourceCollection:
+    """Tests for sources gathered by the tool manager"""
+
+    @pytest.fixture
+    def manager(self, store):
+        store._resolve_course_name = Mock(return_value="MCP Course")
+        store.get_course_metadata = Mock(
+            return_value={"title": "MCP Course", "course_link": "https://example.com"}
+        )
+        manager = ToolManager()
+        manager.register_tool(CourseSearchTool(store))
+        manager.register_tool(CourseOutlineTool(store))
+        return manager
+
+    def test_sources_from_every_tool_collected(self, manager):
+        manager.reset_sources()
+        manager.execute_tools_batch(
+            [
+                ("search_course_content", {"query": "What is MCP?"}),
+                ("get_course_outline", {"course_title": "MCP"}),
+                ("search_course_content", {"query": "Who teaches the course?"}),
+            ]
+        )
+
+        assert [s.display_text for s in manager.get_last_sources()] == [
+            "MCP Course - Lesson 1",
+            "MCP Course - Course Outline",
+        ]
+
+        manager.reset_sources()
+        assert manager.get_last_sources() == []
+
+    async def test_concurrent_queries_collect_separately(self, manager):
+        import asyncio
+
+        async def run(tool_name, **kwargs):
+            manager.reset_sources()
+            await manager.aexecute_tool(tool_name, **kwargs)
+            return manager.get_last_sources()
+
+        search_sources, outline_sources = await asyncio.gather(
+            run("search_course_content", query="What is MCP?"),
+            run("get_course_outline", course_title="MCP"),
+        )
+
+        assert [s.lesson_number for s in search_sources] == [1]
+        assert [s.display_text for s in outline_sources] == [
+            "MCP Course - Course Outline"
+        ]
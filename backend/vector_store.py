@@ -1,9 +1,12 @@
+import uuid
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import chromadb
 from chromadb.config import Settings
+from embedding_cache import EmbeddingCache
 from models import Course, CourseChunk
+from response_cache import LRUCache
 
 
 @dataclass
@@ -16,17 +19,17 @@ class SearchResults:
     error: Optional[str] = None
 
     @classmethod
-    def from_chroma(cls, chroma_results: Dict) -> "SearchResults":
-        """Create SearchResults from ChromaDB query results"""
+    def from_chroma(cls, chroma_results: Dict, row: int = 0) -> "SearchResults":
+        """Create SearchResults from one query's row of ChromaDB query results"""
         return cls(
             documents=(
-                chroma_results["documents"][0] if chroma_results["documents"] else []
+                chroma_results["documents"][row] if chroma_results["documents"] else []
             ),
             metadata=(
-                chroma_results["metadatas"][0] if chroma_results["metadatas"] else []
+                chroma_results["metadatas"][row] if chroma_results["metadatas"] else []
             ),
             distances=(
-                chroma_results["distances"][0] if chroma_results["distances"] else []
+                chroma_results["distances"][row] if chroma_results["distances"] else []
             ),
         )
 
@@ -37,18 +40,74 @@ class SearchResults:
 
     def is_empty(self) -> bool:
         """Check if results are empty"""
-        return len(self.documents) == 0
+        return not self.documents
+
+    def render(
+        self,
+        course_name: Optional[str],
+        lesson_number: Optional[int],
+        format_fn: Callable[["SearchResults"], str],
+    ) -> str:
+        """
+        Turn these results into tool output.
+
+        Args:
+            course_name: Course filter of the search, named in the empty message
+            lesson_number: Lesson filter of the search, named in the empty message
+            format_fn: Formats non-empty, error-free results
+
+        Returns:
+            The error, a no-results message, or the formatted results
+        """
+        if self.error:
+            return self.error
+
+        if not self.documents:
+            filter_info = ""
+            if course_name:
+                filter_info += f" in course '{course_name}'"
+            if lesson_number:
+                filter_info += f" in lesson {lesson_number}"
+            return f"No relevant content found{filter_info}."
+
+        return format_fn(self)
 
 
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
 
-    def __init__(self, chroma_path: str, embedding_model: str, max_results: int = 5):
+    def __init__(
+        self,
+        chroma_path: str,
+        embedding_model: str,
+        max_results: int = 5,
+        embedding_cache_path: Optional[str] = None,
+        embedding_memory_cache_size: int = 1024,
+    ):
         self.max_results = max_results
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=chroma_path, settings=Settings(anonymized_telemetry=False)
+        # Query embeddings persisted across restarts, keyed by model and text
+        self._emb_cache = (
+            EmbeddingCache(embedding_cache_path, embedding_model)
+            if embedding_cache_path
+            else None
         )
+        # Recently used query embeddings, checked before the on-disk cache
+        self._emb_memory = (
+            LRUCache(max_entries=embedding_memory_cache_size)
+            if embedding_memory_cache_size
+            else None
+        )
+        # Bumped on every write so caches of search results can tell when
+        # their entries are stale
+        self.data_version = 0
+        # Parsed course metadata keyed by title, loaded on first lookup
+        self._course_meta_by_title: Optional[Dict[str, Dict[str, Any]]] = None
+        # Initialize ChromaDB client; without a path the data stays in memory
+        settings = Settings(anonymized_telemetry=False)
+        if chroma_path:
+            self.client = chromadb.PersistentClient(path=chroma_path, settings=settings)
+        else:
+            self.client = self._ephemeral_client(settings)
 
         # Set up sentence transformer embedding function
         self.embedding_function = (
@@ -65,6 +124,15 @@ class VectorStore:
             "course_content"
         )  # Actual course material
 
+    @staticmethod
+    def _ephemeral_client(settings: Settings):
+        """In-memory client backed by a database of its own"""
+        # Chroma runs one in-memory system per process, so stores only stay
+        # separate when each uses a different database
+        database = f"store_{uuid.uuid4().hex}"
+        chromadb.AdminClient(settings).create_database(database)
+        return chromadb.EphemeralClient(settings=settings, database=database)
+
     def _create_collection(self, name: str):
         """Create or get a ChromaDB collection"""
         return self.client.get_or_create_collection(
@@ -77,6 +145,7 @@ class VectorStore:
         course_name: Optional[str] = None,
         lesson_number: Optional[int] = None,
         limit: Optional[int] = None,
+        query_embedding: Optional[Sequence[float]] = None,
     ) -> SearchResults:
         """
         Main search interface that handles course resolution and content search.
@@ -86,6 +155,7 @@ class VectorStore:
             course_name: Optional course name/title to filter by
             lesson_number: Optional lesson number to filter by
             limit: Maximum results to return
+            query_embedding: Precomputed embedding of query, from embed_query
 
         Returns:
             SearchResults object with documents and metadata
@@ -95,14 +165,7 @@ class VectorStore:
         if course_name:
             course_title = self._resolve_course_name(course_name)
             if not course_title:
-                # Get list of available courses for helpful error
-                available = self.get_existing_course_titles()
-                error_msg = f"No course found matching '{course_name}'."
-                if available:
-                    error_msg += f" Available courses: {', '.join(available[:3])}"
-                    if len(available) > 3:
-                        error_msg += f" (and {len(available) - 3} more)"
-                return SearchResults.empty(error_msg)
+                return self._course_not_found(course_name)
 
         # Step 2: Build filter for content search
         filter_dict = self._build_filter(course_title, lesson_number)
@@ -112,13 +175,137 @@ class VectorStore:
         search_limit = limit if limit is not None else self.max_results
 
         try:
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
             results = self.course_content.query(
-                query_texts=[query], n_results=search_limit, where=filter_dict
+                query_embeddings=[query_embedding],
+                n_results=search_limit,
+                where=filter_dict,
             )
             return SearchResults.from_chroma(results)
         except Exception as e:
             return SearchResults.empty(f"Search error: {str(e)}")
 
+    def search_batch(
+        self,
+        queries: List[str],
+        course_names: Optional[List[Optional[str]]] = None,
+        lesson_numbers: Optional[List[Optional[int]]] = None,
+        limit: Optional[int] = None,
+        query_embeddings: Optional[List[Sequence[float]]] = None,
+    ) -> List[SearchResults]:
+        """
+        Run several searches with one embedding pass and one content query per
+        distinct filter.
+
+        Args:
+            queries: What to search for, one entry per search
+            course_names: Optional course filter per search
+            lesson_numbers: Optional lesson filter per search
+            limit: Maximum results to return per search
+            query_embeddings: Precomputed embeddings of queries
+
+        Returns:
+            SearchResults per search, in the order of queries
+        """
+        count = len(queries)
+        course_names = course_names or [None] * count
+        lesson_numbers = lesson_numbers or [None] * count
+        results: List[Optional[SearchResults]] = [None] * count
+
+        # Group searches by filter; Chroma applies one where clause per query call
+        groups: Dict[tuple, List[int]] = {}
+        resolved: Dict[str, Optional[str]] = {}
+        for index, (course_name, lesson_number) in enumerate(
+            zip(course_names, lesson_numbers)
+        ):
+            course_title = None
+            if course_name:
+                if course_name not in resolved:
+                    resolved[course_name] = self._resolve_course_name(course_name)
+                course_title = resolved[course_name]
+                if not course_title:
+                    results[index] = self._course_not_found(course_name)
+                    continue
+            groups.setdefault((course_title, lesson_number), []).append(index)
+
+        if not groups:
+            return results
+
+        if query_embeddings is None:
+            query_embeddings = [None] * count
+            pending = [index for indices in groups.values() for index in indices]
+            embedded = self._embed([queries[i] for i in pending])
+            for index, embedding in zip(pending, embedded):
+                query_embeddings[index] = embedding
+
+        search_limit = limit if limit is not None else self.max_results
+        for (course_title, lesson_number), indices in groups.items():
+            try:
+                chroma_results = self.course_content.query(
+                    query_embeddings=[query_embeddings[i] for i in indices],
+                    n_results=search_limit,
+                    where=self._build_filter(course_title, lesson_number),
+                )
+                for row, index in enumerate(indices):
+                    results[index] = SearchResults.from_chroma(chroma_results, row)
+            except Exception as e:
+                for index in indices:
+                    results[index] = SearchResults.empty(f"Search error: {str(e)}")
+
+        return results
+
+    def embed_query(self, query: str) -> Sequence[float]:
+        """Embed a query with the same model used for the stored content"""
+        return self._embed([query])[0]
+
+    def embed_batch(self, texts: List[str]) -> List[Sequence[float]]:
+        """Embed several queries with one model call for those not cached"""
+        return self._embed(texts)
+
+    def _embed(self, texts: List[str]) -> List[Sequence[float]]:
+        """Embed texts, serving repeats from the in-memory and on-disk caches"""
+        memory = self._emb_memory
+        if memory is None:
+            embeddings = [None] * len(texts)
+        else:
+            embeddings = [memory.get(text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+
+        if self._emb_cache is not None:
+            stored = self._emb_cache.get_many([texts[i] for i in missing])
+            for index, embedding in zip(missing, stored):
+                embeddings[index] = embedding
+            uncached = [i for i in missing if embeddings[i] is None]
+        else:
+            uncached = missing
+
+        if uncached:
+            # One model call for every text not embedded before
+            computed = self.embedding_function([texts[i] for i in uncached])
+            if self._emb_cache is not None:
+                self._emb_cache.put_many([texts[i] for i in uncached], computed)
+            for index, embedding in zip(uncached, computed):
+                embeddings[index] = embedding
+
+        if memory is not None:
+            for index in missing:
+                memory.put(texts[index], embeddings[index])
+        return embeddings
+
+    def _course_not_found(self, course_name: str) -> SearchResults:
+        """Build the error result for a course name that matched nothing"""
+        # Get list of available courses for helpful error
+        available = self.get_existing_course_titles()
+        error_msg = f"No course found matching '{course_name}'."
+        if available:
+            error_msg += f" Available courses: {', '.join(available[:3])}"
+            if len(available) > 3:
+                error_msg += f" (and {len(available) - 3} more)"
+        return SearchResults.empty(error_msg)
+
     def _resolve_course_name(self, course_name: str) -> Optional[str]:
         """
         Use vector search to find best matching course by name.
@@ -170,36 +357,42 @@ class VectorStore:
 
     def add_course_metadata(self, course: Course):
         """Add course information to the catalog for semantic search"""
+        self.add_courses_metadata([course])
+
+    def add_courses_metadata(self, courses: List[Course]):
+        """Add several courses to the catalog, embedding their titles in one call"""
         import json
 
-        course_text = course.title
+        if not courses:
+            return
 
-        # Build lessons metadata and serialize as JSON string
-        lessons_metadata = []
-        for lesson in course.lessons:
-            lessons_metadata.append(
+        metadatas = []
+        for course in courses:
+            # Build lessons metadata and serialize as JSON string
+            lessons_metadata = [
                 {
                     "lesson_number": lesson.lesson_number,
                     "lesson_title": lesson.title,
                     "lesson_link": lesson.lesson_link,
                 }
-            )
-
-        self.course_catalog.add(
-            documents=[course_text],
-            metadatas=[
+                for lesson in course.lessons
+            ]
+            metadatas.append(
                 {
                     "title": course.title,
                     "instructor": course.instructor,
                     "course_link": course.course_link,
-                    "lessons_json": json.dumps(
-                        lessons_metadata
-                    ),  # Serialize as JSON string
+                    "lessons_json": json.dumps(lessons_metadata),
                     "lesson_count": len(course.lessons),
                 }
-            ],
-            ids=[course.title],
+            )
+
+        titles = [course.title for course in courses]
+        self._add_batched(
+            self.course_catalog, documents=titles, metadatas=metadatas, ids=titles
         )
+        self.data_version += 1
+        self._course_meta_by_title = None
 
     def add_course_content(self, chunks: List[CourseChunk]):
         """Add course content chunks to the vector store"""
@@ -221,7 +414,27 @@ class VectorStore:
             for chunk in chunks
         ]
 
-        self.course_content.add(documents=documents, metadatas=metadatas, ids=ids)
+        self._add_batched(
+            self.course_content, documents=documents, metadatas=metadatas, ids=ids
+        )
+        self.data_version += 1
+
+    def _add_batched(
+        self,
+        collection,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+    ):
+        """Add records in as few calls as ChromaDB's batch size limit allows"""
+        step = self.client.get_max_batch_size()
+        for start in range(0, len(ids), step):
+            end = start + step
+            collection.add(
+                documents=documents[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end],
+            )
 
     def clear_all_data(self):
         """Clear all data from both collections"""
@@ -231,6 +444,8 @@ class VectorStore:
             # Recreate collections
             self.course_catalog = self._create_collection("course_catalog")
             self.course_content = self._create_collection("course_content")
+            self.data_version += 1
+            self._course_meta_by_title = None
         except Exception as e:
             print(f"Error clearing data: {e}")
 
@@ -280,6 +495,18 @@ class VectorStore:
             print(f"Error getting courses metadata: {e}")
             return []
 
+    def get_course_metadata(self, course_title: str) -> Optional[Dict[str, Any]]:
+        """Get parsed metadata for one course by its exact title"""
+        if self._course_meta_by_title is None:
+            courses = self.get_all_courses_metadata()
+            if not courses:
+                return None
+            # Built once and reset by writes to the catalog
+            self._course_meta_by_title = {
+                course.get("title"): course for course in courses
+            }
+        return self._course_meta_by_title.get(course_title)
+
     def get_course_link(self, course_title: str) -> Optional[str]:
         """Get course link for a given course title"""
         try:
@@ -313,6 +540,31 @@ class VectorStore:
         except Exception as e:
             print(f"Error getting lesson link: {e}")
 
+    def get_source_links_batch(
+        self, sources: List[Tuple[str, Optional[int]]]
+    ) -> Dict[Tuple[str, Optional[int]], Optional[str]]:
+        """
+        Get best available links for several sources at once.
+
+        Args:
+            sources: (course_title, lesson_number) pairs
+
+        Returns:
+            Dict mapping each pair to its URL (lesson link > course link > None)
+        """
+        links = {}
+        for course_title, lesson_number in sources:
+            # Served from the parsed catalog, so no per-source collection query
+            course = self.get_course_metadata(course_title) or {}
+            link = None
+            if lesson_number is not None:
+                for lesson in course.get("lessons", []):
+                    if lesson.get("lesson_number") == lesson_number:
+                        link = lesson.get("lesson_link")
+                        break
+            links[(course_title, lesson_number)] = link or course.get("course_link")
+        return links
+
     def get_source_link(
         self, course_title: str, lesson_number: Optional[int] = None
     ) -> Optional[str]:
@@ -0,0 +1,17 @@
+#!/usr/bin/env bash
+# Run the integration tests against recorded LLM answers. Until answers have
+# been recorded, they are recorded from the live provider (needs an API key);
+# pass --record-llm-cache to also record answers missing from an existing file
+
+set -e
+
+RECORDINGS="backend/tests/fixtures/llm_cache/responses.json"
+CACHE_FLAG="--use-llm-cache"
+if [ ! -f "$RECORDINGS" ]; then
+    echo "📼 No recorded answers yet; recording them from the live provider"
+    CACHE_FLAG="--record-llm-cache"
+fi
+
+echo "🧪 Running integration tests..."
+uv run pytest backend/tests/ -m integration "$CACHE_FLAG" "$@"
+echo "✅ Integration tests passed"